@@ -42,6 +42,7 @@ class EventListView(APIView):
         'min_price',
         'start_at',
         'end_at',
+        'available_count',
     ]
     filter_fields = [
         'area__name',
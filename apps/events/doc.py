@@ -71,7 +71,8 @@ event_list_parameters = [
     ),
     OpenApiParameter(
         name='ordering',
-        description='Название мероприятия/Дата и время начала/окончания/Минимальная цена',
+        description='Название мероприятия/Дата и время начала/окончания/Минимальная цена/'
+                    'Количество свободных мест',
         required=False,
         type=OpenApiTypes.STR
     ),
@@ -0,0 +1,328 @@
+import csv
+import io
+import json
+import os
+import time
+from decimal import (
+    Decimal,
+    InvalidOperation,
+)
+
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+from django.db import (
+    DatabaseError,
+    connection,
+    transaction,
+)
+from django.utils.text import slugify
+
+from events.models import (
+    Event,
+    Landing,
+    SpecialSeat,
+)
+from events.serializers import (
+    EventImportSerializer,
+    LandingImportSerializer,
+    SpecialSeatImportSerializer,
+)
+
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Массовый импорт мероприятий, посадок и особенных мест. '
+        'JSON: список мероприятий с вложенными landings и special_seats. '
+        'CSV: посадки и места одного мероприятия (--event), колонки '
+        'section,row,quantity,price,seat,seat_price,seat_type'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Путь к файлу .json или .csv',
+        )
+        parser.add_argument(
+            '--event',
+            type=int,
+            help='Id мероприятия для импорта посадок из CSV',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Размер пачки для bulk_create',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        self.batch_size = options['batch_size']
+        extension = os.path.splitext(path)[1].lower()
+
+        logger.info(
+            msg=f'Импорт мероприятий из файла {path}',
+        )
+        started_at = time.monotonic()
+
+        try:
+            with transaction.atomic():
+                if extension == '.json':
+                    event_ids, landings_count, seats_count = self.import_json(path)
+                elif extension == '.csv':
+                    if options['event'] is None:
+                        raise CommandError('Для импорта из CSV требуется --event')
+                    event_ids, landings_count, seats_count = self.import_csv(
+                        path=path,
+                        event_id=options['event'],
+                    )
+                else:
+                    raise CommandError(f'Неподдерживаемый формат файла {path}')
+
+                # bulk_create не вызывает сигналы, поэтому производные поля
+                # пересчитываются один раз для всех мероприятий
+                Event.objects.filter(
+                    pk__in=event_ids,
+                ).update_landing_aggregates()
+        except (OSError, ValueError, DatabaseError) as exc:
+            logger.error(
+                msg=f'Не удалось импортировать мероприятия из файла {path}: {exc}',
+            )
+            raise CommandError(exc)
+
+        duration = time.monotonic() - started_at
+        message = (
+            f'Импортировано мероприятий: {len(event_ids)}, посадок: {landings_count}, '
+            f'особенных мест: {seats_count} за {duration:.2f} с'
+        )
+        logger.info(
+            msg=message,
+        )
+        self.stdout.write(self.style.SUCCESS(message))
+
+    def validate(self, serializer_class, data: dict, line: str) -> dict:
+        serializer = serializer_class(
+            data=data,
+        )
+        if not serializer.is_valid():
+            raise CommandError(f'Невалидные данные ({line}): {serializer.errors}')
+        return serializer.validated_data
+
+    def import_json(self, path: str) -> (list, int, int):
+        '''
+        Импорт мероприятий с посадками и особенными местами из JSON
+
+        Args:
+            path: путь к файлу
+                [
+                    {
+                        "area": 1,
+                        "category": 1,
+                        "name": "Test event",
+                        "start_at": "2024-08-28T00:00:00+05:00",
+                        "end_at": "2024-08-29T04:00:00+05:00",
+                        "age_limit": 0,
+                        "quantity": 50,
+                        "landings": [
+                            {
+                                "section": "1",
+                                "row": "1",
+                                "quantity": 25,
+                                "price": "4000.00",
+                                "special_seats": [
+                                    {
+                                        "seat": "12",
+                                        "price": "8000.00",
+                                        "seat_type": "vip"
+                                    }
+                                ]
+                            }
+                        ]
+                    }
+                ]
+
+        Returns:
+            Список id мероприятий, количество посадок и особенных мест
+        '''
+
+        with open(path, encoding='utf-8') as file:
+            data = json.load(file)
+
+        events = []
+        landings_data = []
+        for index, event_data in enumerate(data):
+            validated_data = self.validate(
+                serializer_class=EventImportSerializer,
+                data=event_data,
+                line=f'мероприятие {index}',
+            )
+            landings_data.append(validated_data.pop('landings', []))
+            events.append(Event(
+                slug=slugify(validated_data['name']),
+                **validated_data,
+            ))
+
+        events = Event.objects.bulk_create(events, batch_size=self.batch_size)
+
+        landings = []
+        seats_data = []
+        for event, event_landings in zip(events, landings_data):
+            for landing_data in event_landings:
+                seats_data.append(landing_data.pop('special_seats', []))
+                landings.append(Landing(event=event, **landing_data))
+
+        landings = Landing.objects.bulk_create(landings, batch_size=self.batch_size)
+
+        seats = (
+            dict(seat_data, landing=landing)
+            for landing, landing_seats in zip(landings, seats_data)
+            for seat_data in landing_seats
+        )
+        seats_count = self.create_seats(seats)
+
+        return [event.pk for event in events], len(landings), seats_count
+
+    def import_csv(self, path: str, event_id: int) -> (list, int, int):
+        '''
+        Импорт посадок и особенных мест мероприятия из CSV.
+        Строка без seat описывает только посадку, строки посадки
+        с seat добавляют особенные места
+
+        Args:
+            path: путь к файлу
+                section,row,quantity,price,seat,seat_price,seat_type
+                1,1,25,4000.00,12,8000.00,vip
+            event_id: id мероприятия
+
+        Returns:
+            Список id мероприятий, количество посадок и особенных мест
+        '''
+
+        event = Event.objects.filter(pk=event_id).first()
+        if event is None:
+            raise CommandError(f'Мероприятие по id {event_id} не найдено')
+
+        landings = {
+            (landing.section, landing.row): landing
+            for landing in event.landings.all()
+        }
+        new_landings = []
+        seats_data = []
+        with open(path, encoding='utf-8', newline='') as file:
+            for line, row in enumerate(csv.DictReader(file), start=2):
+                key = (row.get('section') or None, row.get('row') or None)
+                if key not in landings:
+                    landing_data = self.validate(
+                        serializer_class=LandingImportSerializer,
+                        data={
+                            'section': key[0],
+                            'row': key[1],
+                            'quantity': row.get('quantity'),
+                            'price': row.get('price'),
+                        },
+                        line=f'строка {line}',
+                    )
+                    landings[key] = Landing(event=event, **landing_data)
+                    new_landings.append(landings[key])
+
+                if row.get('seat'):
+                    seats_data.append((key, row, line))
+
+        Landing.objects.bulk_create(new_landings, batch_size=self.batch_size)
+
+        seat_types = {choice for choice, _ in SpecialSeat._meta.get_field('seat_type').choices}
+        seats = (
+            dict(
+                self.clean_seat(row=row, line=line, seat_types=seat_types),
+                landing=landings[key],
+            )
+            for key, row, line in seats_data
+        )
+        seats_count = self.create_seats(seats)
+
+        return [event.pk], len(new_landings), seats_count
+
+    def clean_seat(self, row: dict, line: int, seat_types: set) -> dict:
+        # Сериализатор на каждую строку схемы зала в десятки тысяч мест
+        # слишком медленный, поэтому он вызывается только для невалидных строк
+        seat_data = {
+            'seat': row['seat'],
+            'price': row.get('seat_price') or row.get('price'),
+            'seat_type': row.get('seat_type'),
+        }
+        try:
+            price = Decimal(seat_data['price'])
+        except (InvalidOperation, TypeError):
+            price = None
+
+        if price is None or seat_data['seat_type'] not in seat_types:
+            return self.validate(
+                serializer_class=SpecialSeatImportSerializer,
+                data=seat_data,
+                line=f'строка {line}',
+            )
+
+        seat_data['price'] = price
+        return seat_data
+
+    def create_seats(self, seats) -> int:
+        '''
+        Создание особенных мест пачками. В PostgreSQL через COPY,
+        в остальных базах через bulk_create
+
+        Args:
+            seats: итератор словарей данных особенных мест
+                {
+                    "landing": Landing,
+                    "seat": "12",
+                    "price": Decimal("8000.00"),
+                    "seat_type": "vip"
+                }
+
+        Returns:
+            Количество созданных мест
+        '''
+
+        count = 0
+        batch = []
+        for seat_data in seats:
+            batch.append(seat_data)
+            if len(batch) >= self.batch_size:
+                count += self.insert_seats(batch)
+                batch = []
+
+        if batch:
+            count += self.insert_seats(batch)
+        return count
+
+    def insert_seats(self, batch: list) -> int:
+        if connection.vendor != 'postgresql':
+            SpecialSeat.objects.bulk_create(
+                SpecialSeat(**seat_data) for seat_data in batch
+            )
+            return len(batch)
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for seat_data in batch:
+            writer.writerow((
+                seat_data['landing'].pk,
+                seat_data['seat'],
+                seat_data['price'],
+                seat_data['seat_type'],
+            ))
+        buffer.seek(0)
+
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                sql=f'COPY {SpecialSeat._meta.db_table} '
+                    f'(landing_id, seat, price, seat_type) FROM STDIN WITH CSV',
+                file=buffer,
+            )
+        return len(batch)
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-19 12:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0006_alter_specialseat_seat_type'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('canceled', False)), fields=['end_at', 'start_at'], name='events_active_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2 on 2026-10-19 12:48
+
+from django.db import migrations, models
+from django.db.models import (
+    OuterRef,
+    Subquery,
+    Sum,
+)
+from django.db.models.functions import Coalesce
+
+
+def fill_available_count(apps, schema_editor):
+    Event = apps.get_model('events', 'Event')
+    Landing = apps.get_model('events', 'Landing')
+    landings = Landing.objects.filter(
+        event=OuterRef('pk'),
+    ).values('event').annotate(
+        total=Sum('quantity'),
+    ).values('total')
+    Event.objects.update(
+        available_count=Coalesce(Subquery(landings), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0007_event_active_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='available_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False, verbose_name='Количество свободных мест'),
+        ),
+        migrations.RunPython(
+            code=fill_available_count,
+            reverse_code=migrations.RunPython.noop,
+        ),
+    ]
@@ -1,6 +1,17 @@
 from django.db import models
 from django.contrib.auth import get_user_model
-from django.db.models import Sum
+from django.db.models import (
+    Aggregate,
+    Min,
+    OuterRef,
+    Subquery,
+    Sum,
+)
+from django.db.models.functions import (
+    Cast,
+    Coalesce,
+    Floor,
+)
 from django.utils.text import slugify
 
 from utils.constants import (
@@ -60,10 +71,52 @@ class Category(models.Model):
         verbose_name_plural = 'Категории'
 
 
+class EventQuerySet(models.QuerySet):
+
+    @staticmethod
+    def _landings_aggregate(aggregate: Aggregate) -> Coalesce:
+        landings = Landing.objects.filter(
+            event=OuterRef('pk'),
+        ).values('event').annotate(
+            value=aggregate,
+        ).values('value')
+        return Coalesce(Subquery(landings), 0)
+
+    def update_available_count(self) -> int:
+        '''
+        Пересчет количества свободных мест по посадкам одним запросом
+
+        Returns:
+            Количество обновленных мероприятий
+        '''
+
+        return self.update(
+            available_count=self._landings_aggregate(Sum('quantity')),
+        )
+
+    def update_landing_aggregates(self) -> int:
+        '''
+        Пересчет минимальной цены и количества свободных мест
+        по посадкам одним запросом
+
+        Returns:
+            Количество обновленных мероприятий
+        '''
+
+        min_price = Cast(Floor(Min('price')), models.IntegerField())
+        return self.update(
+            min_price=self._landings_aggregate(min_price),
+            available_count=self._landings_aggregate(Sum('quantity')),
+        )
+
+
 class Event(models.Model):
     '''
-        min_price обновляется через сигнал в events.signals
-        при изменении связанной записи в таблице landing
+        min_price и available_count пересчитываются один раз на транзакцию
+        через сигналы в events.signals при изменении цены или количества мест
+        связанной записи в таблице landing.
+        При покупке и отмене билетов available_count меняется
+        атомарно вместе с количеством мест посадки
     '''
 
     area = models.ForeignKey(
@@ -110,6 +163,12 @@ class Event(models.Model):
         verbose_name='Минимальная цена',
         default=0,
     )
+    available_count = models.PositiveIntegerField(
+        verbose_name='Количество свободных мест',
+        default=0,
+        db_index=True,
+        editable=False,
+    )
     canceled = models.BooleanField(
         verbose_name='Отменено',
         default=False,
@@ -125,9 +184,11 @@ class Event(models.Model):
         auto_now_add=True,
     )
 
+    objects = EventQuerySet.as_manager()
+
     @property
     def available_tickets(self):
-        return self.landings.aggregate(Sum('quantity'))['quantity__sum']
+        return self.available_count
 
     def __str__(self):
         return self.name
@@ -141,6 +202,14 @@ class Event(models.Model):
         verbose_name = 'Мероприятие'
         verbose_name_plural = 'Мероприятия'
 
+        indexes = [
+            models.Index(
+                fields=['end_at', 'start_at'],
+                condition=models.Q(canceled=False),
+                name='events_active_idx',
+            ),
+        ]
+
 
 class Landing(models.Model):
     event = models.ForeignKey(
@@ -98,3 +98,51 @@ class EventLandingSerializer(EventSerializer):
             'tickets',
         ]
 
+
+class SpecialSeatImportSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = SpecialSeat
+        fields = [
+            'seat',
+            'price',
+            'seat_type',
+        ]
+
+
+class LandingImportSerializer(serializers.ModelSerializer):
+    special_seats = SpecialSeatImportSerializer(
+        many=True,
+        required=False,
+    )
+
+    class Meta:
+        model = Landing
+        fields = [
+            'section',
+            'row',
+            'quantity',
+            'price',
+            'special_seats',
+        ]
+
+
+class EventImportSerializer(serializers.ModelSerializer):
+    landings = LandingImportSerializer(
+        many=True,
+        required=False,
+    )
+
+    class Meta:
+        model = Event
+        fields = [
+            'area',
+            'category',
+            'name',
+            'start_at',
+            'end_at',
+            'age_limit',
+            'description',
+            'quantity',
+            'landings',
+        ]
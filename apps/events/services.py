@@ -17,6 +17,7 @@ from utils import (
     redis_cache,
     constants,
 )
+from utils.db_router import get_read_db
 from utils.logger import get_logger
 
 
@@ -60,7 +61,7 @@ def get_all_events(request: Any, filter_backends: list, view: Any) -> (int, list
     )
 
     try:
-        events = Event.objects.filter(
+        events = Event.objects.using(get_read_db()).filter(
             canceled=False,
             end_at__gte=timezone.now(),
         ).select_related('area', 'category')
@@ -162,7 +163,7 @@ def get_event(user: User | AnonymousUser, slug: str) -> (int, dict):
     )
 
     try:
-        event = Event.objects.filter(
+        event = Event.objects.using(get_read_db(user=user)).filter(
             canceled=False,
             end_at__gte=timezone.now(),
             slug=slug,
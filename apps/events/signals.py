@@ -1,13 +1,97 @@
-from django.db.models import Min
+import weakref
+
+from django.db import transaction
 from django.dispatch import receiver
-from django.db.models.signals import post_save
+from django.db.models.signals import (
+    pre_save,
+    post_save,
+    post_delete,
+)
+
+from events.models import (
+    Event,
+    Landing,
+)
+
+
+class DirtyEvents:
+    '''
+    Мероприятия, посадки которых изменились в транзакции.
+    Экземпляр регистрируется в on_commit, а соединение хранит на него
+    только слабую ссылку: при откате транзакции или точки сохранения
+    Django отбрасывает callback вместе с набором, и следующее изменение
+    начинает новый набор
+    '''
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.event_ids = set()
+
+    def __call__(self) -> None:
+        '''
+        Пересчет min_price и available_count мероприятий после коммита
+
+        Returns:
+            None
+        '''
+
+        self.connection.dirty_events = None
+        event_ids, self.event_ids = self.event_ids, set()
+        if event_ids:
+            Event.objects.filter(pk__in=event_ids).update_landing_aggregates()
+
+
+def mark_event_dirty(event_id: int) -> None:
+    '''
+    Отложенный пересчет мероприятия после коммита транзакции.
+    Все изменения посадок в одной транзакции дают один UPDATE
 
-from events.models import Landing
+    Args:
+        event_id: id мероприятия
+
+    Returns:
+        None
+    '''
+
+    connection = transaction.get_connection()
+    ref = getattr(connection, 'dirty_events', None)
+    dirty_events = ref() if ref is not None else None
+    if dirty_events is not None:
+        dirty_events.event_ids.add(event_id)
+        return
+
+    dirty_events = DirtyEvents(connection=connection)
+    dirty_events.event_ids.add(event_id)
+    connection.dirty_events = weakref.ref(dirty_events)
+    transaction.on_commit(dirty_events)
+
+
+@receiver(signal=pre_save, sender=Landing)
+def check_landing_changes(sender, instance, raw, update_fields, **kwargs):
+    # цена и количество мест сравниваются с базой только при сохранении,
+    # а не при каждой загрузке посадки
+    instance._aggregates_changed = False
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not {'price', 'quantity'} & set(update_fields):
+        return
+
+    old_values = Landing.objects.filter(
+        pk=instance.pk,
+    ).values_list('price', 'quantity').first()
+    instance._aggregates_changed = old_values != (instance.price, instance.quantity)
 
 
 @receiver(signal=post_save, sender=Landing)
-def update_min_price(sender, instance, **kwargs):
-    event = instance.event
-    min_price = event.landings.aggregate(Min('price', default=0))['price__min']
-    event.min_price = min_price
-    event.save()
+def update_landing_aggregates(sender, instance, created, raw, **kwargs):
+    # фикстуры загружаются как есть, вместе с рассчитанными полями
+    if raw:
+        return
+
+    if created or instance._aggregates_changed:
+        mark_event_dirty(event_id=instance.event_id)
+
+
+@receiver(signal=post_delete, sender=Landing)
+def update_landing_aggregates_on_delete(sender, instance, **kwargs):
+    mark_event_dirty(event_id=instance.event_id)
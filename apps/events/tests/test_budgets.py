@@ -0,0 +1,57 @@
+from datetime import datetime
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from events.api import EventListView
+from events.services import (
+    get_all_events,
+    get_event,
+)
+
+from utils.testing import (
+    Budget,
+    BudgetMixin,
+)
+
+
+User = get_user_model()
+
+
+@patch('django.utils.timezone.now', return_value=datetime(2024, 8, 1, tzinfo=timezone.utc))
+class TestBudgets(BudgetMixin, TestCase):
+    fixtures = [
+        'areas.json', 'categories.json', 'events.json',
+        'landings.json', 'special_seats.json', 'users.json',
+    ]
+    budgets = {
+        'get_all_events': Budget(queries=1),
+        'get_event': Budget(queries=6, redis=1),
+    }
+
+    def test_get_all_events(self, mock_timezone):
+        view = EventListView
+        request = Request(APIRequestFactory().get('/', {'ordering': 'min_price'}))
+
+        with self.assertBudget('get_all_events'):
+            status_code, response_data = get_all_events(
+                request=request,
+                filter_backends=view.filter_backends,
+                view=view,
+            )
+        self.assertEqual(status_code, 200)
+
+    def test_get_event(self, mock_timezone):
+        user = User.objects.first()
+
+        with self.assertBudget('get_event'):
+            status_code, response_data = get_event(
+                user=user,
+                slug='testing-test1-event',
+            )
+        self.assertEqual(status_code, 200)
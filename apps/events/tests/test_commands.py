@@ -0,0 +1,62 @@
+import os
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from events.models import (
+    Event,
+    SpecialSeat,
+)
+
+
+CUR_DIR = os.path.dirname(__file__)
+
+
+class TestCommands(TestCase):
+    fixtures = [
+        'areas.json', 'categories.json', 'events.json', 'landings.json',
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.path = f'{CUR_DIR}/fixtures/commands'
+
+    def test_import_events_json(self):
+        path = f'{self.path}/import_events/events.json'
+        stdout = StringIO()
+        call_command('import_events', path, stdout=stdout)
+
+        self.assertIn(
+            'Импортировано мероприятий: 1, посадок: 2, особенных мест: 1',
+            stdout.getvalue(),
+        )
+
+        event = Event.objects.get(slug='imported-event')
+        self.assertEqual(event.landings.count(), 2)
+        self.assertEqual(event.min_price, 2500)
+        self.assertEqual(event.available_count, 40)
+        self.assertEqual(
+            SpecialSeat.objects.filter(landing__event=event).count(),
+            1,
+        )
+
+    def test_import_events_csv(self):
+        path = f'{self.path}/import_events/landings.csv'
+        event = Event.objects.get(pk=2)
+        stdout = StringIO()
+        call_command('import_events', path, event=event.pk, stdout=stdout)
+
+        self.assertIn(
+            'Импортировано мероприятий: 1, посадок: 2, особенных мест: 3',
+            stdout.getvalue(),
+        )
+
+        event.refresh_from_db()
+        self.assertEqual(event.landings.count(), 3)
+        self.assertEqual(event.min_price, 800)
+        self.assertEqual(event.available_count, 60)
+        self.assertEqual(
+            SpecialSeat.objects.filter(landing__event=event).count(),
+            3,
+        )
@@ -0,0 +1,20 @@
+from django.test import TestCase
+from django.utils import timezone
+
+from events.models import Event
+
+from utils.testing import (
+    ExplainMixin,
+    postgres_only,
+)
+
+
+@postgres_only
+class TestIndexes(ExplainMixin, TestCase):
+
+    def test_active_events(self):
+        events = Event.objects.filter(
+            canceled=False,
+            end_at__gte=timezone.now(),
+        ).order_by('start_at')
+        self.assertUsesIndex(events, 'events_active_idx')
@@ -0,0 +1,72 @@
+from django.db import transaction
+from django.test import TestCase
+
+from events.models import (
+    Event,
+    Landing,
+)
+
+
+class TestSignals(TestCase):
+    fixtures = [
+        'areas.json', 'categories.json', 'events.json', 'landings.json',
+    ]
+
+    def test_update_landing_aggregates(self):
+        event = Event.objects.get(pk=1)
+        landings = list(event.landings.all())
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                for landing in landings:
+                    landing.price = 500
+                    landing.save()
+
+        self.assertEqual(len(callbacks), 1)
+        event.refresh_from_db()
+        self.assertEqual(event.min_price, 500)
+        self.assertEqual(
+            event.available_count,
+            sum(landing.quantity for landing in landings),
+        )
+
+    def test_skip_unchanged_landing(self):
+        landing = Landing.objects.filter(event_id=1).first()
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            landing.save()
+
+        self.assertEqual(len(callbacks), 0)
+
+    def test_quantity_change(self):
+        landing = Landing.objects.filter(event_id=1).first()
+        landing.quantity += 1
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            landing.save(update_fields=['quantity'])
+
+        self.assertEqual(len(callbacks), 1)
+        event = Event.objects.get(pk=1)
+        self.assertEqual(
+            event.available_count,
+            sum(Landing.objects.filter(event_id=1).values_list('quantity', flat=True)),
+        )
+
+    def test_rolled_back_savepoint(self):
+        landing = Landing.objects.filter(event_id=1).first()
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    landing.price = 1
+                    landing.save()
+                    raise ValueError
+            except ValueError:
+                pass
+
+            landing.price = 500
+            landing.save()
+
+        self.assertEqual(len(callbacks), 1)
+        event = Event.objects.get(pk=1)
+        self.assertEqual(event.min_price, 500)
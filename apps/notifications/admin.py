@@ -6,6 +6,7 @@ from notifications.forms import EmailTemplateForm
 from notifications.models import (
     EmailTemplate,
     EmailSettings,
+    OutboxEmail,
 )
 
 
@@ -20,3 +21,27 @@ class EmailTemplateAdmin(admin.ModelAdmin):
 @admin.register(EmailSettings)
 class EmailConfigurationAdmin(SingletonModelAdmin):
     pass
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = [
+        'email_type',
+        'recipient',
+        'status',
+        'attempts',
+        'next_attempt_at',
+        'created_at',
+        'sent_at',
+    ]
+    list_filter = [
+        'status',
+        'email_type',
+    ]
+    search_fields = [
+        'recipient',
+    ]
+    raw_id_fields = [
+        'user',
+        'event',
+    ]
@@ -0,0 +1,169 @@
+import os
+import threading
+import time
+
+from config.settings import EMAIL_CACHE_TTL
+
+from notifications.models import (
+    EmailSettings,
+    EmailTemplate,
+)
+from notifications.rendering import CompiledEmail
+from utils import redis_cache
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+# Канал redis, в который публикуются изменения шаблонов и настроек,
+# чтобы сбросить кэш во всех процессах: веб, run_tickets, воркеры celery
+INVALIDATION_CHANNEL = 'notifications_cache'
+SETTINGS_KEY = 'email_settings'
+
+# ключ -> (время сохранения, значение)
+_cache = {}
+_listener = {'pid': None, 'thread': None}
+_lock = threading.Lock()
+
+
+def _get_cached(key: str):
+    cached = _cache.get(key)
+    if cached is None:
+        return None
+
+    cached_at, value = cached
+    if time.monotonic() - cached_at > EMAIL_CACHE_TTL:
+        _cache.pop(key, None)
+        return None
+    return value
+
+
+def _handle_message(message: dict) -> None:
+    key = message['data'].decode('utf-8')
+    logger.info(
+        msg=f'Получено оповещение об изменении {key}',
+    )
+    invalidate(key=key)
+
+
+def _start_listener() -> bool:
+    '''
+    Подписка процесса на оповещения об изменениях. После fork
+    поток подписки не наследуется, поэтому проверяется pid
+
+    Returns:
+        True, если подписка активна
+    '''
+
+    pid = os.getpid()
+    thread = _listener['thread']
+    if _listener['pid'] == pid and thread is not None and thread.is_alive():
+        return True
+
+    with _lock:
+        if _listener['pid'] == pid and _listener['thread'] is not None:
+            return _listener['thread'].is_alive()
+
+        try:
+            pubsub = redis_cache.redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{INVALIDATION_CHANNEL: _handle_message})
+            thread = pubsub.run_in_thread(sleep_time=1, daemon=True)
+        except Exception as exc:
+            logger.error(
+                msg=f'Не удалось подписаться на канал {INVALIDATION_CHANNEL}. '
+                    f'Ошибки: {exc}',
+            )
+            return False
+
+        _listener['pid'] = pid
+        _listener['thread'] = thread
+    return True
+
+
+def invalidate(key: str | None = None) -> None:
+    '''
+    Сброс кэша процесса
+
+    Args:
+        key: тип письма, email_settings или None для полного сброса
+
+    Returns:
+        None
+    '''
+
+    if key is None:
+        _cache.clear()
+    else:
+        _cache.pop(key, None)
+
+
+def publish_invalidation(key: str) -> None:
+    '''
+    Сброс кэша в текущем процессе и оповещение остальных процессов
+
+    Args:
+        key: тип письма или email_settings
+
+    Returns:
+        None
+    '''
+
+    invalidate(key=key)
+    try:
+        redis_cache.redis_client.publish(INVALIDATION_CHANNEL, key)
+    except Exception as exc:
+        logger.error(
+            msg=f'Не удалось опубликовать изменение {key}. Ошибки: {exc}',
+        )
+
+
+def get_template(email_type: str) -> CompiledEmail | None:
+    '''
+    Получение скомпилированного шаблона письма из кэша процесса,
+    при промахе из базы. Без подписки на изменения кэш не используется
+
+    Args:
+        email_type: тип письма
+
+    Returns:
+        Объект CompiledEmail или None
+    '''
+
+    template = _get_cached(key=email_type)
+    if template is not None:
+        return template
+
+    template = EmailTemplate.objects.filter(email_type=email_type).first()
+    if template is None:
+        return None
+
+    template = CompiledEmail(template=template)
+    if _start_listener():
+        _cache[email_type] = (time.monotonic(), template)
+    return template
+
+
+def get_settings() -> dict | None:
+    '''
+    Получение настроек email из кэша процесса, при промахе из redis
+
+    Returns:
+        Словарь настроек или None
+    '''
+
+    email_settings = _get_cached(key=SETTINGS_KEY)
+    if email_settings is not None:
+        return email_settings
+
+    status, email_settings = redis_cache.get(
+        key=SETTINGS_KEY,
+        model=EmailSettings,
+        timeout=60*60,
+        pk=1,
+    )
+    if status != 200:
+        return None
+
+    if _start_listener():
+        _cache[SETTINGS_KEY] = (time.monotonic(), email_settings)
+    return email_settings
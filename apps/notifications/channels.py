@@ -0,0 +1,186 @@
+import json
+import sys
+import threading
+from abc import (
+    ABC,
+    abstractmethod,
+)
+
+import requests
+from django.core.mail import (
+    EmailMessage,
+    get_connection,
+)
+
+from config.settings import (
+    EMAIL_BATCH_SIZE,
+    EMAIL_CHANNEL,
+    EMAIL_FILE_PATH,
+    EMAIL_HTTP_BATCH_SIZE,
+    EMAIL_HTTP_TIMEOUT,
+    EMAIL_HTTP_TOKEN,
+    EMAIL_HTTP_URL,
+)
+
+
+class Channel(ABC):
+    '''
+    Канал доставки писем. Письма передаются пачками не больше batch_size
+    между open и close, при ошибке send_messages выбрасывает исключение
+
+        channel = get_channel()
+        channel.open()
+        try:
+            sent = channel.send_messages(messages)
+        finally:
+            channel.close()
+    '''
+
+    name = None
+    batch_size = EMAIL_BATCH_SIZE
+
+    def open(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def reopen(self) -> None:
+        # после ошибки соединение может быть разорвано
+        self.close()
+        self.open()
+
+    @abstractmethod
+    def send_messages(self, messages: list) -> int:
+        pass
+
+    @staticmethod
+    def serialize(message: EmailMessage) -> dict:
+        data = {
+            'from': message.from_email,
+            'to': message.to,
+            'subject': message.subject,
+            'text': message.body,
+        }
+        for content, mimetype in getattr(message, 'alternatives', ()):
+            if mimetype == 'text/html':
+                data['html'] = content
+        return data
+
+
+class SmtpChannel(Channel):
+    '''
+    Отправка через почтовый бэкенд django из EMAIL_BACKEND
+    с одним соединением на все пачки
+    '''
+
+    name = 'smtp'
+
+    def __init__(self, **kwargs):
+        # kwargs передаются в get_connection: backend, host, port, use_tls
+        self.connection = get_connection(**kwargs)
+
+    def open(self) -> None:
+        self.connection.open()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def send_messages(self, messages: list) -> int:
+        return self.connection.send_messages(messages) or 0
+
+
+class HttpChannel(Channel):
+    '''
+    Отправка пачками через HTTP API почтового провайдера:
+    POST {"messages": [{"from", "to", "subject", "text", "html"}]}
+    с keep-alive соединением сессии requests
+    '''
+
+    name = 'http'
+    batch_size = EMAIL_HTTP_BATCH_SIZE
+
+    def __init__(self, url: str = EMAIL_HTTP_URL, token: str = EMAIL_HTTP_TOKEN):
+        self.url = url
+        self.token = token
+        self.session = None
+
+    def open(self) -> None:
+        if self.session is not None:
+            return
+
+        self.session = requests.Session()
+        if self.token:
+            self.session.headers['Authorization'] = f'Bearer {self.token}'
+
+    def close(self) -> None:
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+
+    def send_messages(self, messages: list) -> int:
+        self.open()
+        response = self.session.post(
+            url=self.url,
+            json={'messages': [self.serialize(message) for message in messages]},
+            timeout=EMAIL_HTTP_TIMEOUT,
+        )
+        response.raise_for_status()
+        return len(messages)
+
+
+class FileChannel(Channel):
+    '''
+    Локальный приемник писем для разработки и бенчмарков: одна строка JSON
+    на письмо в файл EMAIL_FILE_PATH, "-" - в консоль
+    '''
+
+    name = 'file'
+    _lock = threading.Lock()
+
+    def __init__(self, path: str = EMAIL_FILE_PATH):
+        self.path = path
+        self.stream = None
+
+    def open(self) -> None:
+        if self.stream is not None:
+            return
+        self.stream = sys.stdout if self.path == '-' else open(self.path, 'a', encoding='utf-8')
+
+    def close(self) -> None:
+        if self.stream is None:
+            return
+        if self.stream is not sys.stdout:
+            self.stream.close()
+        self.stream = None
+
+    def send_messages(self, messages: list) -> int:
+        self.open()
+        lines = ''.join(
+            json.dumps(self.serialize(message), ensure_ascii=False) + '\n'
+            for message in messages
+        )
+        with self._lock:
+            self.stream.write(lines)
+            self.stream.flush()
+        return len(messages)
+
+
+CHANNELS = {
+    channel.name: channel
+    for channel in (SmtpChannel, HttpChannel, FileChannel)
+}
+
+
+def get_channel(name: str = None) -> Channel:
+    '''
+    Получение канала доставки по названию
+
+    Args:
+        name: smtp, http или file, по умолчанию EMAIL_CHANNEL
+
+    Returns:
+        Объект Channel
+    '''
+
+    return CHANNELS[name or EMAIL_CHANNEL]()
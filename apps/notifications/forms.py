@@ -12,6 +12,7 @@ class EmailTemplateForm(forms.ModelForm):
             'email_type',
             'subject',
             'message',
+            'html_message',
         ]
 
     def __init__(self, *args, **kwargs):
@@ -0,0 +1,36 @@
+# Generated by Django 4.2 on 2026-10-19 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_alter_emailtemplate_email_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email_type', models.CharField(choices=[('confirm_email', 'Подтверждение адреса электронной почты'), ('password_restore', 'Восстановление пароля'), ('notify_day_in_day', 'Оповещение день в день'), ('notify_3_days', 'Оповещенеи за 3 дня'), ('notify_expired', 'Оповещение о просроченном билете')], max_length=64, verbose_name='Тип письма')),
+                ('recipient', models.EmailField(max_length=254, verbose_name='Получатель')),
+                ('mail_data', models.JSONField(default=dict, verbose_name='Данные письма')),
+                ('status', models.CharField(choices=[('queued', 'В очереди'), ('sending', 'Отправляется'), ('sent', 'Отправлено'), ('failed', 'Ошибка отправки')], default='queued', max_length=16, verbose_name='Статус')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Количество попыток')),
+                ('last_error', models.TextField(blank=True, verbose_name='Последняя ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата отправки')),
+            ],
+            options={
+                'verbose_name': 'Письмо в очереди',
+                'verbose_name_plural': 'Очередь писем',
+                'db_table': 'outbox_emails',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='outboxemail',
+            index=models.Index(fields=['status', 'created_at'], name='outbox_status_idx'),
+        ),
+    ]
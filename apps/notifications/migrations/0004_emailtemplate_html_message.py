@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 13:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_outbox_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailtemplate',
+            name='html_message',
+            field=models.TextField(blank=True, help_text='Если не заполнено, HTML версия строится из сообщения', verbose_name='HTML сообщение'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2 on 2026-10-19 13:16
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('events', '0008_event_available_count'),
+        ('notifications', '0004_emailtemplate_html_message'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='outboxemail',
+            name='outbox_status_idx',
+        ),
+        migrations.AddField(
+            model_name='outboxemail',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата начала отправки'),
+        ),
+        migrations.AddField(
+            model_name='outboxemail',
+            name='event',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='outbox_emails', to='events.event', verbose_name='Мероприятие'),
+        ),
+        migrations.AddField(
+            model_name='outboxemail',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Дата следующей попытки'),
+        ),
+        migrations.AddField(
+            model_name='outboxemail',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='outbox_emails', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+        migrations.AddIndex(
+            model_name='outboxemail',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='outboxemail',
+            constraint=models.UniqueConstraint(condition=models.Q(('event__isnull', False), ('user__isnull', False)), fields=('user', 'event', 'email_type'), name='outbox_notification_uniq'),
+        ),
+    ]
@@ -1,10 +1,22 @@
+from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import Q
 from django.forms import model_to_dict
+from django.utils import timezone
 
 from solo.models import SingletonModel
 
+from events.models import Event
+
 from utils import redis_cache
-from utils.constants import EMAIL_TYPES
+from utils.constants import (
+    EMAIL_TYPES,
+    OUTBOX_STATUSES,
+    outbox_queued,
+)
+
+
+User = get_user_model()
 
 
 class EmailTemplate(models.Model):
@@ -21,6 +33,12 @@ class EmailTemplate(models.Model):
     message = models.TextField(
         verbose_name='Сообщение',
     )
+    html_message = models.TextField(
+        verbose_name='HTML сообщение',
+        help_text='Шаблон django: {{ event_name }}. Если не заполнено, '
+                  'HTML версия строится из сообщения',
+        blank=True,
+    )
 
     def __str__(self):
         return self.email_type
@@ -51,3 +69,85 @@ class EmailSettings(SingletonModel):
     class Meta:
         db_table = 'email_settings'
         verbose_name = 'Настройки email'
+
+
+class OutboxEmail(models.Model):
+    email_type = models.CharField(
+        verbose_name='Тип письма',
+        max_length=64,
+        choices=EMAIL_TYPES,
+    )
+    recipient = models.EmailField(
+        verbose_name='Получатель',
+    )
+    user = models.ForeignKey(
+        verbose_name='Пользователь',
+        to=User,
+        on_delete=models.CASCADE,
+        related_name='outbox_emails',
+        null=True,
+        blank=True,
+    )
+    event = models.ForeignKey(
+        verbose_name='Мероприятие',
+        to=Event,
+        on_delete=models.SET_NULL,
+        related_name='outbox_emails',
+        null=True,
+        blank=True,
+    )
+    mail_data = models.JSONField(
+        verbose_name='Данные письма',
+        default=dict,
+    )
+    status = models.CharField(
+        verbose_name='Статус',
+        max_length=16,
+        choices=OUTBOX_STATUSES,
+        default=outbox_queued,
+    )
+    attempts = models.PositiveIntegerField(
+        verbose_name='Количество попыток',
+        default=0,
+    )
+    last_error = models.TextField(
+        verbose_name='Последняя ошибка',
+        blank=True,
+    )
+    next_attempt_at = models.DateTimeField(
+        verbose_name='Дата следующей попытки',
+        default=timezone.now,
+    )
+    claimed_at = models.DateTimeField(
+        verbose_name='Дата начала отправки',
+        null=True,
+        blank=True,
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Дата создания',
+        auto_now_add=True,
+    )
+    sent_at = models.DateTimeField(
+        verbose_name='Дата отправки',
+        null=True,
+        blank=True,
+    )
+
+    def __str__(self):
+        return f'{self.email_type} {self.recipient}'
+
+    class Meta:
+        db_table = 'outbox_emails'
+        verbose_name = 'Письмо в очереди'
+        verbose_name_plural = 'Очередь писем'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_idx'),
+        ]
+        constraints = [
+            # оповещение по мероприятию ставится в очередь один раз
+            models.UniqueConstraint(
+                fields=['user', 'event', 'email_type'],
+                condition=Q(user__isnull=False, event__isnull=False),
+                name='outbox_notification_uniq',
+            ),
+        ]
@@ -0,0 +1,67 @@
+from html import escape
+
+from django.template import (
+    Context,
+    Template,
+)
+
+from notifications.models import EmailTemplate
+
+
+def text_to_html(text: str) -> str:
+    return escape(text).replace('\n', '<br>\n')
+
+
+class CompiledEmail:
+    '''
+    Шаблон письма, подготовленный один раз и хранящийся в кэше процесса
+    notifications.cache. Тема и сообщение в синтаксисе str.format,
+    html_message - шаблон django с автоэкранированием. Без html_message
+    HTML версия строится из готового текста с экранированием
+    '''
+
+    __slots__ = ('email_type', 'subject', 'message', 'html_message')
+
+    def __init__(self, template: EmailTemplate):
+        self.email_type = template.email_type
+        self.subject = template.subject
+        self.message = template.message
+        self.html_message = Template(template.html_message) if template.html_message else None
+
+    def __str__(self):
+        return self.email_type
+
+    def render(self, mail_data: dict, personal_data: dict = None) -> dict:
+        '''
+        Рендеринг письма
+
+        Args:
+            mail_data: общие данные письма
+                {
+                    "url": "http://127.0.0.1:8000/api/v1/users/confirm/hash/"
+                }
+            personal_data: данные получателя, дополняют mail_data
+                {
+                    "email": "test@cc.com"
+                }
+
+        Returns:
+            Словарь данных
+            {
+                "subject": "Подтверждение email",
+                "message": "Подтвердите свой email по ссылке",
+                "html_message": "Подтвердите свой email по ссылке"
+            }
+        '''
+
+        context = {**mail_data, **personal_data} if personal_data else mail_data
+        message = self.message.format_map(context)
+        if self.html_message is None:
+            html_message = text_to_html(message)
+        else:
+            html_message = self.html_message.render(Context(context))
+        return {
+            'subject': self.subject.format_map(context),
+            'message': message,
+            'html_message': html_message,
+        }
@@ -1,15 +1,34 @@
-from django.core.mail import send_mail
+import datetime
+import time
+
+from django.core.mail import EmailMultiAlternatives
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
 
 from config.settings import (
     EMAIL_HOST_USER,
+    EMAIL_OUTBOX_CLAIM_SIZE,
+    EMAIL_OUTBOX_MAX_RETRIES,
+    EMAIL_OUTBOX_RETRY_DELAY,
+    EMAIL_OUTBOX_SENDING_TIMEOUT,
+    EMAIL_RATE_LIMIT,
 )
 
-from notifications.models import (
-    EmailSettings,
-    EmailTemplate,
+from notifications import cache
+from notifications.channels import (
+    Channel,
+    get_channel,
+)
+from notifications.models import OutboxEmail
+from notifications.rendering import CompiledEmail
+from utils.constants import (
+    outbox_queued,
+    outbox_sending,
+    outbox_sent,
+    outbox_failed,
 )
-from utils import redis_cache
 from utils.logger import get_logger
 
 
@@ -20,24 +39,34 @@ logger = get_logger(__name__)
 class Email:
     email_host_user = EMAIL_HOST_USER
 
-    def __init__(self, email_type: str, mail_data: dict, recipient: list | User):
+    def __init__(
+            self,
+            email_type: str,
+            mail_data: dict,
+            recipient: list | User,
+            personal_data: dict = None,
+    ):
         self.email_type = email_type
         self.mail_data = mail_data
         self.recipient = recipient if isinstance(recipient, list) else [recipient]
+        # email получателя -> его данные для письма, например места
+        self.personal_data = personal_data or {}
+        # получатели, которым не удалось отправить письмо в send_mass
+        self.failed_recipients = []
 
     def _get_email_template(self):
         '''
         Получение шаблона письма
 
         Returns:
-            Объект EmailTemplate или None
+            Объект CompiledEmail или None
         '''
 
         logger.info(
             msg=f'Поиск шаблона для письма {self.email_type}',
         )
         try:
-            mail = EmailTemplate.objects.filter(email_type=self.email_type).first()
+            mail = cache.get_template(email_type=self.email_type)
         except Exception as exc:
             logger.error(
                 msg=f'Не удалось найти шаблон для письма {self.email_type} '
@@ -59,13 +88,8 @@ class Email:
             msg='Получение настроек email',
         )
 
-        status, email_settings = redis_cache.get(
-            key='email_settings',
-            model=EmailSettings,
-            timeout=60*60,
-            pk=1,
-        )
-        if status != 200:
+        email_settings = cache.get_settings()
+        if email_settings is None:
             logger.error(
                 msg=f'Не удалось получить настройки email',
             )
@@ -76,16 +100,20 @@ class Email:
         )
         return email_settings
 
-    def formate_email_text(self) -> (int, dict):
+    def formate_email_text(self, recipient: str | User = None) -> (int, dict):
         '''
         Форматирование текста для письма
 
+        Args:
+            recipient: получатель для персонализации письма или None
+
         Returns:
             Код статуса и словарь данных
             200,
             {
                 "subject": "Подтверждение email",
-                "message": "Подствердите свой email по ссылке"
+                "message": "Подствердите свой email по ссылке",
+                "html_message": "Подствердите свой email по ссылке"
             }
         '''
 
@@ -105,24 +133,43 @@ class Email:
             msg=f'Шаблон письма {self.email_type} найден',
         )
 
-        subject = mail.subject
+        status_code, email_text = self.render_email_text(mail=mail, recipient=recipient)
+        if status_code != 200:
+            return status_code, {}
+
+        logger.info(
+            msg=f'Текст для письма {mail} успешно сформирован',
+        )
+        return 200, email_text
+
+    def render_email_text(self, mail: CompiledEmail, recipient: str | User = None) -> (int, dict):
+        '''
+        Рендеринг шаблона из кэша процесса. Для получателя в данные
+        письма добавляются email и его данные из personal_data
+
+        Args:
+            mail: шаблон письма
+            recipient: получатель или None
+
+        Returns:
+            Код статуса и словарь данных, как в formate_email_text
+        '''
+
+        personal_data = None
+        if recipient is not None:
+            email = getattr(recipient, 'email', recipient)
+            personal_data = {'email': email, **self.personal_data.get(email, {})}
+
         try:
-            message = mail.message.format(**self.mail_data)
+            email_text = mail.render(mail_data=self.mail_data, personal_data=personal_data)
         except Exception as exc:
             logger.error(
                 msg=f'Не удалось сформатировать текст для письма {mail} '
-                    f'с данными {self.mail_data} пользователю {self.recipient}'
+                    f'с данными {self.mail_data} пользователю {recipient or self.recipient}'
                     f'Ошибки: {exc}',
             )
             return 500, {}
-
-        logger.info(
-            msg=f'Текст для письма {mail} успешно сформирован',
-        )
-        return 200, {
-            'subject': subject,
-            'message': message,
-        }
+        return 200, email_text
 
     def send(self) -> int:
         '''
@@ -152,13 +199,14 @@ class Email:
         logger.info(
             msg=f'Отправка письма {subject} пользователю {self.recipient}',
         )
+        message = self.build_message(
+            email_text=email_text,
+            to=[getattr(recipient, 'email', recipient) for recipient in self.recipient],
+        )
+        channel = get_channel()
         try:
-            send_mail(
-                subject=subject,
-                message=email_text['message'],
-                from_email=self.email_host_user,
-                recipient_list=self.recipient,
-            )
+            channel.open()
+            channel.send_messages([message])
         except Exception as exc:
             logger.error(
                 msg=f'Не удалось отправить письмо {subject} '
@@ -166,8 +214,428 @@ class Email:
                     f'Ошибки: {exc}',
             )
             return 500
+        finally:
+            channel.close()
 
         logger.info(
             msg=f'Письмо {subject} пользователю {self.recipient} успешно отправлено',
         )
         return 200
+
+    def build_message(self, email_text: dict, to: list) -> EmailMultiAlternatives:
+        message = EmailMultiAlternatives(
+            subject=email_text['subject'],
+            body=email_text['message'],
+            from_email=self.email_host_user,
+            to=to,
+        )
+        message.attach_alternative(email_text['html_message'], 'text/html')
+        return message
+
+    def send_mass(
+            self,
+            batch_size: int = None,
+            rate_limit: float = EMAIL_RATE_LIMIT,
+            channel: Channel = None,
+    ) -> int:
+        '''
+        Массовая отправка: отдельное письмо каждому получателю через одно
+        соединение канала, пачками по batch_size с ограничением скорости.
+        Шаблон берется из кэша процесса один раз на всю рассылку
+
+        Args:
+            batch_size: количество писем в одном вызове send_messages,
+                по умолчанию размер пачки канала
+            rate_limit: максимальное количество писем в секунду, 0 - без ограничения
+            channel: канал доставки, по умолчанию EMAIL_CHANNEL
+
+        Returns:
+            Код статуса
+            200
+        '''
+
+        email_settings = self.get_send_email_settings
+        if not email_settings or not email_settings['send_emails']:
+            logger.warning(
+                msg='Отправка писем отключена',
+            )
+            return 403
+
+        mail = self._get_email_template()
+        if mail is None:
+            logger.error(
+                msg=f'Шаблон письма {self.email_type} не найден',
+            )
+            return 501
+
+        subject = mail.subject
+        messages = []
+        for recipient in self.recipient:
+            status_code, email_text = self.render_email_text(mail=mail, recipient=recipient)
+            if status_code != 200:
+                logger.error(
+                    msg=f'Не удалось сформировать текст для письма {self.email_type} '
+                        f'{len(self.recipient)} получателям'
+                )
+                return status_code
+
+            messages.append(self.build_message(
+                email_text=email_text,
+                to=[getattr(recipient, 'email', recipient)],
+            ))
+
+        if channel is None:
+            channel = get_channel()
+        if batch_size is None:
+            batch_size = channel.batch_size
+        logger.info(
+            msg=f'Массовая отправка письма {subject} {len(messages)} получателям '
+                f'через {channel.name} пачками по {batch_size}',
+        )
+
+        sent = 0
+        failed = 0
+        start = 0
+        started_at = time.monotonic()
+        try:
+            channel.open()
+            for start in range(0, len(messages), batch_size):
+                batch = messages[start:start + batch_size]
+                try:
+                    sent += channel.send_messages(batch)
+                except Exception as exc:
+                    failed += len(batch)
+                    self.failed_recipients.extend(message.to[0] for message in batch)
+                    logger.error(
+                        msg=f'Не удалось отправить пачку из {len(batch)} писем '
+                            f'{subject}. Ошибки: {exc}',
+                    )
+                    channel.reopen()
+
+                if rate_limit:
+                    delay = (sent + failed) / rate_limit - (time.monotonic() - started_at)
+                    if delay > 0:
+                        time.sleep(delay)
+        except Exception as exc:
+            logger.error(
+                msg=f'Не удалось открыть канал {channel.name} для массовой отправки '
+                    f'письма {subject}. Ошибки: {exc}',
+            )
+            self.failed_recipients = list(dict.fromkeys(
+                self.failed_recipients + [message.to[0] for message in messages[start:]],
+            ))
+            return 500
+        finally:
+            channel.close()
+
+        if failed:
+            logger.error(
+                msg=f'Письмо {subject} отправлено {sent} из {len(messages)} получателей',
+            )
+            return 500
+
+        logger.info(
+            msg=f'Письмо {subject} успешно отправлено {sent} получателям',
+        )
+        return 200
+
+
+def get_retry_delay(attempts: int) -> int:
+    return EMAIL_OUTBOX_RETRY_DELAY * 2 ** max(attempts - 1, 0)
+
+
+def set_outbox_status(outbox_email: OutboxEmail, status: int, retry: bool) -> None:
+    '''
+    Статус письма из очереди по результату отправки. При ошибке SMTP
+    письмо возвращается в очередь с экспоненциальной задержкой. Пока
+    отправка писем отключена, письмо остается в очереди без учета попытки
+
+    Args:
+        outbox_email: объект OutboxEmail с учтенной попыткой
+        status: код статуса отправки
+        retry: вернуть письмо в очередь при ошибке отправки
+
+    Returns:
+        None
+    '''
+
+    now = timezone.now()
+    if status == 200:
+        outbox_email.status = outbox_sent
+        outbox_email.sent_at = now
+        outbox_email.last_error = ''
+    elif status == 403:
+        outbox_email.status = outbox_queued
+        outbox_email.attempts = max(outbox_email.attempts - 1, 0)
+        outbox_email.next_attempt_at = now + datetime.timedelta(
+            seconds=EMAIL_OUTBOX_RETRY_DELAY,
+        )
+        outbox_email.last_error = 'Отправка писем отключена'
+    elif status == 500 and retry:
+        outbox_email.status = outbox_queued
+        outbox_email.next_attempt_at = now + datetime.timedelta(
+            seconds=get_retry_delay(attempts=outbox_email.attempts),
+        )
+        outbox_email.last_error = f'Код статуса {status}'
+    else:
+        outbox_email.status = outbox_failed
+        outbox_email.last_error = f'Код статуса {status}'
+
+
+def queue_email(email_type: str, mail_data: dict, recipient: str) -> int:
+    '''
+    Постановка письма в очередь. Письмо сохраняется в текущей транзакции
+    и передается в celery только после ее коммита
+
+    Args:
+        email_type: тип письма
+            "confirm_email"
+        mail_data: данные для формирования текста письма
+            {
+                "url": "http://127.0.0.1:8000/api/v1/users/confirm/hash/"
+            }
+        recipient: email получателя
+            "test@cc.com"
+
+    Returns:
+        Код статуса
+    '''
+
+    # задача celery импортирует сервис доставки, поэтому импорт здесь
+    from notifications.tasks import send_outbox_email
+
+    logger.info(
+        msg=f'Постановка письма {email_type} пользователю {recipient} в очередь',
+    )
+
+    # своя точка сохранения: ошибка вставки не ломает транзакцию
+    # вызывающего кода, и он сам решает, что делать со статусом
+    try:
+        with transaction.atomic():
+            outbox_email = OutboxEmail.objects.create(
+                email_type=email_type,
+                mail_data=mail_data,
+                recipient=recipient,
+            )
+    except Exception as exc:
+        logger.error(
+            msg=f'Не удалось поставить письмо {email_type} пользователю '
+                f'{recipient} в очередь: {exc}',
+        )
+        return 500
+
+    # при недоступном брокере письмо остается в очереди и будет отправлено
+    # воркером run_tickets, ошибка не возвращается вызывающему коду
+    transaction.on_commit(
+        lambda: send_outbox_email.delay(outbox_id=outbox_email.pk),
+        robust=True,
+    )
+    logger.info(
+        msg=f'Письмо {email_type} пользователю {recipient} поставлено в очередь',
+    )
+    return 200
+
+
+def deliver_outbox_email(outbox_id: int, retry: bool = True) -> int:
+    '''
+    Отправка письма из очереди. Письмо забирается из статуса queued,
+    поэтому повторный вызов для отправленного письма ничего не делает
+
+    Args:
+        outbox_id: id письма в очереди
+        retry: вернуть письмо в очередь при ошибке отправки
+
+    Returns:
+        Код статуса
+    '''
+
+    logger.info(
+        msg=f'Отправка письма {outbox_id} из очереди',
+    )
+
+    claimed = OutboxEmail.objects.filter(
+        pk=outbox_id,
+        status=outbox_queued,
+    ).update(status=outbox_sending, claimed_at=timezone.now())
+    if not claimed:
+        logger.warning(
+            msg=f'Письмо {outbox_id} уже отправлено или отправляется',
+        )
+        return 409
+
+    outbox_email = OutboxEmail.objects.get(pk=outbox_id)
+    email = Email(
+        email_type=outbox_email.email_type,
+        mail_data=outbox_email.mail_data,
+        recipient=[outbox_email.recipient],
+    )
+    status = email.send()
+
+    outbox_email.attempts += 1
+    set_outbox_status(outbox_email=outbox_email, status=status, retry=retry)
+    outbox_email.save(update_fields=[
+        'status', 'attempts', 'last_error', 'sent_at', 'next_attempt_at',
+    ])
+
+    logger.info(
+        msg=f'Письмо {outbox_id} из очереди обработано со статусом '
+            f'{outbox_email.status}',
+    )
+    return status
+
+
+def queue_notifications(email_type: str, event_id: int, mail_data: dict, recipients: dict) -> int:
+    '''
+    Постановка оповещений по мероприятию в очередь. Оповещение пользователя
+    по мероприятию и типу письма уникально, поэтому повторная постановка
+    после сбоя не создает дубликатов
+
+    Args:
+        email_type: тип письма
+            "notify_3_days"
+        event_id: id мероприятия
+        mail_data: общие данные письма
+        recipients: email получателя -> id пользователя и его данные письма
+            {
+                "test@cc.com": {
+                    "user_id": 1,
+                    "mail_data": {"seats": "место 7", "tickets_count": 1}
+                }
+            }
+
+    Returns:
+        Код статуса
+    '''
+
+    logger.info(
+        msg=f'Постановка {len(recipients)} оповещений {email_type} по мероприятию '
+            f'{event_id} в очередь',
+    )
+
+    try:
+        OutboxEmail.objects.bulk_create(
+            [
+                OutboxEmail(
+                    email_type=email_type,
+                    recipient=email,
+                    user_id=recipient['user_id'],
+                    event_id=event_id,
+                    mail_data={**mail_data, **recipient['mail_data']},
+                )
+                for email, recipient in recipients.items()
+            ],
+            ignore_conflicts=True,
+        )
+    except Exception as exc:
+        logger.error(
+            msg=f'Не удалось поставить оповещения {email_type} по мероприятию '
+                f'{event_id} в очередь: {exc}',
+        )
+        return 500
+    return 200
+
+
+def claim_outbox_emails(limit: int = EMAIL_OUTBOX_CLAIM_SIZE) -> list:
+    '''
+    Захват писем из очереди для отправки. Строки, заблокированные другими
+    воркерами, пропускаются (SKIP LOCKED), поэтому воркеров может быть
+    несколько. Письма, брошенные в статусе sending дольше
+    EMAIL_OUTBOX_SENDING_TIMEOUT, забираются снова
+
+    Args:
+        limit: максимальное количество писем
+
+    Returns:
+        Список объектов OutboxEmail в статусе sending
+    '''
+
+    now = timezone.now()
+    stale_at = now - datetime.timedelta(seconds=EMAIL_OUTBOX_SENDING_TIMEOUT)
+    with transaction.atomic():
+        outbox_emails = list(
+            OutboxEmail.objects.select_for_update(
+                skip_locked=True,
+            ).filter(
+                Q(status=outbox_queued, next_attempt_at__lte=now) |
+                Q(status=outbox_sending, claimed_at__lt=stale_at)
+            ).order_by(
+                'next_attempt_at',
+            )[:limit]
+        )
+        for outbox_email in outbox_emails:
+            outbox_email.status = outbox_sending
+            outbox_email.claimed_at = now
+            outbox_email.attempts += 1
+        OutboxEmail.objects.bulk_update(
+            outbox_emails,
+            fields=['status', 'claimed_at', 'attempts'],
+        )
+    return outbox_emails
+
+
+def deliver_outbox_emails(limit: int = EMAIL_OUTBOX_CLAIM_SIZE) -> int:
+    '''
+    Отправка писем из очереди пачками. Письма одного типа по одному
+    мероприятию отправляются через одно соединение send_mass, статус
+    каждого письма обновляется по результату его получателя
+
+    Args:
+        limit: максимальное количество писем за один захват
+
+    Returns:
+        Количество обработанных писем
+    '''
+
+    email_settings = cache.get_settings()
+    if not email_settings or not email_settings['send_emails']:
+        # письма остаются в очереди до включения отправки
+        logger.warning(
+            msg='Отправка писем отключена, очередь не обрабатывается',
+        )
+        return 0
+
+    processed = 0
+    while True:
+        outbox_emails = claim_outbox_emails(limit=limit)
+        if not outbox_emails:
+            break
+
+        groups = {}
+        for outbox_email in outbox_emails:
+            # письма без мероприятия отправляются по одному
+            key = (outbox_email.email_type, outbox_email.event_id or f'pk{outbox_email.pk}')
+            groups.setdefault(key, []).append(outbox_email)
+
+        for (email_type, _), group_emails in groups.items():
+            email = Email(
+                email_type=email_type,
+                mail_data={},
+                recipient=[outbox_email.recipient for outbox_email in group_emails],
+                personal_data={
+                    outbox_email.recipient: outbox_email.mail_data
+                    for outbox_email in group_emails
+                },
+            )
+            status = email.send_mass()
+            failed_recipients = set(email.failed_recipients)
+            for outbox_email in group_emails:
+                email_status = status
+                if status == 500 and failed_recipients and outbox_email.recipient not in failed_recipients:
+                    email_status = 200
+                set_outbox_status(
+                    outbox_email=outbox_email,
+                    status=email_status,
+                    retry=outbox_email.attempts < EMAIL_OUTBOX_MAX_RETRIES,
+                )
+
+        OutboxEmail.objects.bulk_update(
+            outbox_emails,
+            fields=['status', 'attempts', 'sent_at', 'last_error', 'next_attempt_at'],
+        )
+        processed += len(outbox_emails)
+        logger.info(
+            msg=f'Обработано {len(outbox_emails)} писем из очереди',
+        )
+        if len(outbox_emails) < limit:
+            break
+    return processed
@@ -0,0 +1,45 @@
+from functools import partial
+
+from django.db import transaction
+from django.dispatch import receiver
+from django.db.models.signals import (
+    post_save,
+    post_delete,
+)
+
+from notifications.cache import (
+    SETTINGS_KEY,
+    invalidate,
+    publish_invalidation,
+)
+from notifications.models import (
+    EmailSettings,
+    EmailTemplate,
+)
+
+
+def schedule_invalidation(key: str) -> None:
+    '''
+    Сброс кэша сразу в текущем процессе и после коммита во всех процессах,
+    чтобы остальные процессы не закэшировали старые данные до коммита
+
+    Args:
+        key: тип письма или email_settings
+
+    Returns:
+        None
+    '''
+
+    invalidate(key=key)
+    transaction.on_commit(partial(publish_invalidation, key=key))
+
+
+@receiver(signal=post_save, sender=EmailTemplate)
+@receiver(signal=post_delete, sender=EmailTemplate)
+def invalidate_template(sender, instance, **kwargs):
+    schedule_invalidation(key=instance.email_type)
+
+
+@receiver(signal=post_save, sender=EmailSettings)
+def invalidate_settings(sender, instance, **kwargs):
+    schedule_invalidation(key=SETTINGS_KEY)
@@ -0,0 +1,31 @@
+from celery import shared_task
+
+from config.settings import (
+    EMAIL_OUTBOX_MAX_RETRIES,
+    EMAIL_OUTBOX_RETRY_DELAY,
+)
+
+from notifications.services import deliver_outbox_email
+
+
+@shared_task(bind=True, max_retries=EMAIL_OUTBOX_MAX_RETRIES)
+def send_outbox_email(self, outbox_id: int) -> int:
+    '''
+    Асинхронная отправка письма из очереди с повторными попытками
+    при ошибке SMTP
+
+    Args:
+        outbox_id: id письма в очереди
+
+    Returns:
+        Код статуса
+    '''
+
+    retries = self.request.retries
+    status = deliver_outbox_email(
+        outbox_id=outbox_id,
+        retry=retries < self.max_retries,
+    )
+    if status == 500 and retries < self.max_retries:
+        raise self.retry(countdown=EMAIL_OUTBOX_RETRY_DELAY * 2 ** retries)
+    return status
@@ -0,0 +1,41 @@
+from django.test import TestCase
+
+from notifications import cache
+from notifications.models import (
+    EmailSettings,
+    EmailTemplate,
+)
+
+from utils import constants
+
+
+class CacheTest(TestCase):
+    fixtures = ['email_template.json']
+
+    def setUp(self):
+        cache.invalidate()
+
+    def test_get_template(self):
+        template = cache.get_template(email_type=constants.CONFIRM_EMAIL)
+        with self.assertNumQueries(0):
+            self.assertEqual(cache.get_template(email_type=constants.CONFIRM_EMAIL), template)
+
+        EmailTemplate.objects.get(email_type=constants.CONFIRM_EMAIL).save()
+        self.assertIsNot(cache.get_template(email_type=constants.CONFIRM_EMAIL), template)
+
+    def test_get_settings(self):
+        settings = EmailSettings.get_solo()
+        settings.send_emails = True
+        settings.save()
+        self.assertTrue(cache.get_settings()['send_emails'])
+
+        settings.send_emails = False
+        settings.save()
+        self.assertFalse(cache.get_settings()['send_emails'])
+
+    def test_handle_message(self):
+        cache.get_template(email_type=constants.CONFIRM_EMAIL)
+        EmailTemplate.objects.filter(email_type=constants.CONFIRM_EMAIL).update(subject='Новая тема')
+
+        cache._handle_message({'data': constants.CONFIRM_EMAIL.encode('utf-8')})
+        self.assertEqual(cache.get_template(email_type=constants.CONFIRM_EMAIL).subject, 'Новая тема')
@@ -0,0 +1,154 @@
+import datetime
+from unittest.mock import patch
+
+from django.core import mail
+from django.test import TestCase
+from django.utils import timezone
+
+from notifications.models import (
+    EmailSettings,
+    OutboxEmail,
+)
+from notifications.services import (
+    deliver_outbox_email,
+    deliver_outbox_emails,
+    queue_email,
+)
+
+from utils import constants
+
+
+class OutboxTest(TestCase):
+    fixtures = ['email_template.json']
+
+    def setUp(self):
+        settings = EmailSettings.get_solo()
+        settings.send_emails = True
+        settings.save()
+
+    @patch('notifications.tasks.send_outbox_email.delay')
+    def test_queue_email(self, mock_delay):
+        with self.captureOnCommitCallbacks(execute=True):
+            status_code = queue_email(
+                email_type=constants.CONFIRM_EMAIL,
+                mail_data={'url': 'http://testserver/confirm/'},
+                recipient='test@cc.com',
+            )
+            mock_delay.assert_not_called()
+
+        self.assertEqual(status_code, 200)
+        outbox_email = OutboxEmail.objects.get()
+        self.assertEqual(outbox_email.status, constants.outbox_queued)
+        mock_delay.assert_called_once_with(outbox_id=outbox_email.pk)
+
+    @patch('notifications.tasks.send_outbox_email.delay', side_effect=ConnectionError)
+    def test_queue_email_broker_error(self, mock_delay):
+        with self.captureOnCommitCallbacks(execute=True):
+            status_code = queue_email(
+                email_type=constants.CONFIRM_EMAIL,
+                mail_data={'url': 'http://testserver/confirm/'},
+                recipient='test@cc.com',
+            )
+
+        self.assertEqual(status_code, 200)
+        mock_delay.assert_called_once()
+        self.assertEqual(OutboxEmail.objects.get().status, constants.outbox_queued)
+
+    def test_queue_email_db_error(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            status_code = queue_email(
+                email_type='x' * 100,
+                mail_data={'url': 'http://testserver/confirm/'},
+                recipient='test@cc.com',
+            )
+
+        self.assertEqual(status_code, 500)
+        self.assertEqual(len(callbacks), 0)
+        # транзакция вызывающего кода остается рабочей
+        self.assertFalse(OutboxEmail.objects.exists())
+
+    def test_deliver_outbox_email(self):
+        outbox_email = OutboxEmail.objects.create(
+            email_type=constants.CONFIRM_EMAIL,
+            mail_data={'url': 'http://testserver/confirm/'},
+            recipient='test@cc.com',
+        )
+
+        self.assertEqual(deliver_outbox_email(outbox_id=outbox_email.pk), 200)
+        self.assertEqual(deliver_outbox_email(outbox_id=outbox_email.pk), 409)
+
+        outbox_email.refresh_from_db()
+        self.assertEqual(outbox_email.status, constants.outbox_sent)
+        self.assertEqual(outbox_email.attempts, 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+    @patch('notifications.channels.SmtpChannel.send_messages', side_effect=OSError)
+    def test_deliver_outbox_email_retry(self, mock_send_messages):
+        outbox_email = OutboxEmail.objects.create(
+            email_type=constants.CONFIRM_EMAIL,
+            mail_data={'url': 'http://testserver/confirm/'},
+            recipient='test@cc.com',
+        )
+
+        status_code = deliver_outbox_email(outbox_id=outbox_email.pk)
+
+        self.assertEqual(status_code, 500)
+        outbox_email.refresh_from_db()
+        self.assertEqual(outbox_email.status, constants.outbox_queued)
+        self.assertEqual(outbox_email.attempts, 1)
+
+    def create_outbox_emails(self, count: int, **kwargs) -> list:
+        return OutboxEmail.objects.bulk_create(
+            OutboxEmail(
+                email_type=constants.CONFIRM_EMAIL,
+                mail_data={'url': f'http://testserver/confirm/{index}/'},
+                recipient=f'test{index}@cc.com',
+                **kwargs,
+            )
+            for index in range(count)
+        )
+
+    def test_deliver_outbox_emails(self):
+        self.create_outbox_emails(count=3)
+        stale = self.create_outbox_emails(
+            count=1,
+            status=constants.outbox_sending,
+            claimed_at=timezone.now() - datetime.timedelta(hours=1),
+        )[0]
+        self.create_outbox_emails(
+            count=1,
+            next_attempt_at=timezone.now() + datetime.timedelta(hours=1),
+        )
+
+        self.assertEqual(deliver_outbox_emails(limit=2), 4)
+
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertEqual(OutboxEmail.objects.filter(status=constants.outbox_sent).count(), 4)
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, constants.outbox_sent)
+
+    @patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError)
+    def test_deliver_outbox_emails_retry(self, mock_send_messages):
+        outbox_email = self.create_outbox_emails(count=1)[0]
+
+        self.assertEqual(deliver_outbox_emails(), 1)
+
+        outbox_email.refresh_from_db()
+        self.assertEqual(outbox_email.status, constants.outbox_queued)
+        self.assertEqual(outbox_email.attempts, 1)
+        self.assertGreater(outbox_email.next_attempt_at, timezone.now())
+
+    def test_deliver_outbox_emails_disabled(self):
+        outbox_email = self.create_outbox_emails(count=1)[0]
+        settings = EmailSettings.get_solo()
+        settings.send_emails = False
+        settings.save()
+
+        self.assertEqual(deliver_outbox_emails(), 0)
+        self.assertEqual(deliver_outbox_email(outbox_id=outbox_email.pk), 403)
+
+        outbox_email.refresh_from_db()
+        self.assertEqual(outbox_email.status, constants.outbox_queued)
+        self.assertEqual(outbox_email.attempts, 0)
+        self.assertGreater(outbox_email.next_attempt_at, timezone.now())
+        self.assertEqual(len(mail.outbox), 0)
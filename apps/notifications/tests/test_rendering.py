@@ -0,0 +1,45 @@
+from django.test import SimpleTestCase
+
+from notifications.models import EmailTemplate
+from notifications.rendering import CompiledEmail
+
+
+class RenderingTest(SimpleTestCase):
+
+    def test_compiled_email(self):
+        mail = CompiledEmail(template=EmailTemplate(
+            email_type='notify_3_days',
+            subject='{event_name} для {email}',
+            message='Мероприятие {event_name}\nНачало {datetime}',
+        ))
+
+        email_text = mail.render(
+            mail_data={'event_name': 'Rock & Roll', 'datetime': '10:00'},
+            personal_data={'email': 'test@cc.com'},
+        )
+        self.assertEqual(email_text['subject'], 'Rock & Roll для test@cc.com')
+        self.assertEqual(email_text['message'], 'Мероприятие Rock & Roll\nНачало 10:00')
+        self.assertEqual(
+            email_text['html_message'],
+            'Мероприятие Rock &amp; Roll<br>\nНачало 10:00',
+        )
+        with self.assertRaises(KeyError):
+            mail.render(mail_data={})
+
+    def test_html_message(self):
+        mail = CompiledEmail(template=EmailTemplate(
+            email_type='notify_3_days',
+            subject='{event_name}',
+            message='{event_name} {email}',
+            html_message='<b>{{ event_name }}</b> {{ email }}',
+        ))
+
+        email_text = mail.render(
+            mail_data={'event_name': 'Rock & Roll'},
+            personal_data={'email': '<test@cc.com>'},
+        )
+        self.assertEqual(email_text['message'], 'Rock & Roll <test@cc.com>')
+        self.assertEqual(
+            email_text['html_message'],
+            '<b>Rock &amp; Roll</b> &lt;test@cc.com&gt;',
+        )
@@ -1,11 +1,17 @@
 import json
 import os
 
+from django.core import mail
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
 from unittest.mock import patch
 
+from notifications.channels import (
+    Channel,
+    FileChannel,
+    SmtpChannel,
+)
 from notifications.models import EmailSettings
 from notifications.services import Email
 
@@ -80,4 +86,49 @@ class ServicesTest(TestCase):
             )
 
             status_code = email.send()
-            self.assertEqual(status_code, code, msg=fixture)
\ No newline at end of file
+            self.assertEqual(status_code, code, msg=fixture)
+
+    def test_send_mass(self):
+        self.settings.send_emails = True
+        self.settings.save()
+        recipients = [f'test{index}@cc.com' for index in range(5)]
+
+        email = Email(
+            email_type='confirm_email',
+            mail_data={'url': 'http://testserver/confirm/'},
+            recipient=recipients,
+        )
+
+        with patch.object(SmtpChannel, 'send_messages', autospec=True,
+                          side_effect=SmtpChannel.send_messages) as mock_send_messages:
+            status_code = email.send_mass(batch_size=2)
+
+        self.assertEqual(status_code, 200)
+        self.assertEqual(mock_send_messages.call_count, 3)
+        self.assertEqual([message.to for message in mail.outbox], [[recipient] for recipient in recipients])
+
+    def test_send_mass_file_channel(self):
+        self.settings.send_emails = True
+        self.settings.save()
+        path = f'{CUR_DIR}/emails.jsonl'
+        self.addCleanup(os.remove, path)
+
+        email = Email(
+            email_type='confirm_email',
+            mail_data={'url': 'http://testserver/confirm/'},
+            recipient=['test1@cc.com', 'test2@cc.com'],
+        )
+        status_code = email.send_mass(channel=FileChannel(path=path))
+
+        self.assertEqual(status_code, 200)
+        with open(path) as file:
+            messages = [json.loads(line) for line in file]
+        self.assertEqual([message['to'] for message in messages], [['test1@cc.com'], ['test2@cc.com']])
+        self.assertIn('http://testserver/confirm/', messages[0]['html'])
+
+    def test_incomplete_channel(self):
+        class IncompleteChannel(Channel):
+            name = 'incomplete'
+
+        with self.assertRaises(TypeError):
+            IncompleteChannel()
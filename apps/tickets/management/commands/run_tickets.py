@@ -1,15 +1,22 @@
 import time
 
 from django.core.management.base import BaseCommand
+from django.db import close_old_connections
 
 from tickets.workers import (
     user_event_notification,
     update_ticket_status,
     check_bill_status,
     check_payment_status,
+    reconcile_available_count,
 )
 
+from config.settings import METRICS_PORT
+
+from notifications.services import deliver_outbox_emails
+
 from utils.logger import get_logger
+from utils.metrics import start_metrics_server
 
 
 logger = get_logger(__name__)
@@ -19,12 +26,19 @@ class Command(BaseCommand):
     help = 'Запускать воркеры билетов каждую минуту'
 
     def handle(self, *args, **kwargs):
+        if METRICS_PORT:
+            start_metrics_server(port=METRICS_PORT)
 
         while True:
+            # цикл живет вне запроса, поэтому устаревшие соединения
+            # закрываются вручную по CONN_MAX_AGE
+            close_old_connections()
             # user_event_notification(notification_status='day_in_day')
             # user_event_notification(notification_status='3_days')
             # user_event_notification(notification_status='expired')
+            deliver_outbox_emails()
             # update_ticket_status()
             # check_bill_status()
             check_payment_status()
+            reconcile_available_count()
             time.sleep(60)
@@ -1,12 +1,17 @@
 import uuid
 
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import (
+    models,
+    transaction,
+)
+from django.forms import model_to_dict
 
 from solo.models import SingletonModel
 
 from events.models import Event
 
+from utils import redis_cache
 from utils.constants import (
     TICKET_STATUSES,
     NOTIFICATION_STATUSES,
@@ -117,6 +122,21 @@ class Ticket(models.Model):
         verbose_name = 'Билет'
         verbose_name_plural = 'Билеты'
 
+        indexes = [
+            models.Index(
+                fields=['status', 'status_updated'],
+                name='tickets_status_idx',
+            ),
+            models.Index(
+                fields=['event', 'status'],
+                name='tickets_event_status_idx',
+            ),
+            models.Index(
+                fields=['notification_status', 'status'],
+                name='tickets_notification_idx',
+            ),
+        ]
+
 
 class TicketSettings(SingletonModel):
     temporary_timeout = models.PositiveIntegerField(
@@ -135,6 +155,16 @@ class TicketSettings(SingletonModel):
     def __str__(self):
         return ''
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # в redis попадают только сохраненные в базе настройки
+        data = model_to_dict(self)
+        transaction.on_commit(lambda: redis_cache.set_key(
+            key='ticket_settings',
+            data=data,
+            time=60*60,
+        ))
+
     class Meta:
         db_table = 'tickets_settings'
         verbose_name = 'Настройки билетов'
@@ -4,9 +4,13 @@ from datetime import (
 )
 
 import requests
+import time
 import uuid
 
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.http import QueryDict
 from django.utils import timezone
 
@@ -14,6 +18,7 @@ from config.settings import (
     PAYMENT_HOST,
     PAYMENT_AUTHORIZATION_TOKEN,
     PAYMENT_SITE_ID,
+    REDIS_LOCAL_TIMEOUT,
     TZ_FOR_PAYMENT,
 )
 
@@ -33,10 +38,16 @@ from utils import (
     redis_cache,
     constants,
 )
-from utils.logger import get_logger
+from utils.db_router import (
+    get_read_db,
+    pin_to_primary,
+)
+from utils.logger import get_structured_logger
+from utils.metrics import acquiring_request_seconds
+from utils.timing import track
 
 
-logger = get_logger(__name__)
+logger = get_structured_logger(__name__)
 User = get_user_model()
 
 
@@ -76,6 +87,31 @@ class Payment:
         'post',
         'put',
     ]
+    # сегменты пути, за которыми следует id ресурса
+    id_segments = [
+        'bills',
+        'payments',
+        'refunds',
+    ]
+
+    def get_endpoint(self, path: str) -> str:
+        '''
+        Получение шаблона пути для меток метрик
+
+        Args:
+            path: путь запроса
+            "/payments/1/refunds/2/"
+
+        Returns:
+            Шаблон пути
+            "/payments/{id}/refunds/{id}/"
+        '''
+
+        parts = path.split('/')
+        for index in range(1, len(parts)):
+            if parts[index] and parts[index - 1] in self.id_segments:
+                parts[index] = '{id}'
+        return '/'.join(parts)
 
     def make_request(self, method: str, path: str, json_data: dict = None) -> (int, dict):
         '''
@@ -96,37 +132,59 @@ class Payment:
         '''
 
         logger.info(
-            msg=f'Отправка {method} запроса в платежную систему по пути {path} '
-                f'с данными {json_data}',
+            msg='Отправка запроса в платежную систему',
+            method=method,
+            path=path,
+            json_data=json_data,
         )
         if method not in self.allowed_methods:
             logger.error(
-                msg=f'Не удалось отправить {method} запрос в платежную систему '
-                    f'по пути {path} c данными {json_data}: неправильный метод',
+                msg='Не удалось отправить запрос в платежную систему: неправильный метод',
+                method=method,
+                path=path,
+                json_data=json_data,
             )
             return 400, {}
 
         url = self.url + path
         if json_data is None:
             json_data = {}
+        endpoint = self.get_endpoint(path=path)
+        started_at = time.perf_counter()
         try:
-            response = getattr(requests, method)(
-                url=url,
-                headers=self.headers,
-                json=json_data,
-            )
+            with track(kind='payment'):
+                response = getattr(requests, method)(
+                    url=url,
+                    headers=self.headers,
+                    json=json_data,
+                )
         except Exception as exc:
-            logger.error(
-                msg=f'Возникла ошибка при отправке {method} запроса в платежную '
-                    f'систему по пути {path} с данными {json_data}: {exc}',
+            acquiring_request_seconds.labels(
+                method=method,
+                endpoint=endpoint,
+                status='error',
+            ).observe(time.perf_counter() - started_at)
+            logger.error(
+                msg='Возникла ошибка при отправке запроса в платежную систему',
+                method=method,
+                path=path,
+                json_data=json_data,
+                error=exc,
             )
             return 500, {}
 
+        status = response.status_code
+        acquiring_request_seconds.labels(
+            method=method,
+            endpoint=endpoint,
+            status=status,
+        ).observe(time.perf_counter() - started_at)
         logger.info(
-            msg=f'Отправлен {method} запрос в платежную систему по пути '
-                f'{path} с данными {json_data}',
+            msg='Отправлен запрос в платежную систему',
+            method=method,
+            path=path,
+            status=status,
         )
-        status = response.status_code
 
         if status == 200:
             data = response.json()
@@ -160,7 +218,8 @@ class Payment:
         '''
 
         logger.info(
-            msg=f'Покупка билета {data} пользователем {user}',
+            msg='Покупка билета',
+            user=user,
         )
 
         serializer = TicketBuySerializer(
@@ -168,8 +227,9 @@ class Payment:
         )
         if not serializer.is_valid():
             logger.error(
-                msg=f'Некорректные данные для покупки билета {data} пользователем {user}:'
-                    f'{serializer.errors}',
+                msg='Некорректные данные для покупки билета',
+                user=user,
+                errors=serializer.errors,
             )
             return 400, {}
 
@@ -183,13 +243,16 @@ class Payment:
             ).first()
         except Exception as exc:
             logger.error(
-                msg=f'Возникла ошибка при получении мероприятия по id {event_id}: {exc}',
+                msg='Возникла ошибка при получении мероприятия',
+                event_id=event_id,
+                error=exc,
             )
             return 500, {}
 
         if event is None:
             logger.info(
-                msg=f'Мероприятие по id {event_id} не найдено',
+                msg='Мероприятие не найдено',
+                event_id=event_id,
             )
             return 404, {}
 
@@ -199,8 +262,9 @@ class Payment:
             ).values('section', 'row'))
         except Exception as exc:
             logger.error(
-                msg=f'Возникла ошибка при получении доступных посадок по мероприятию '
-                    f'{event_id}: {exc}',
+                msg='Возникла ошибка при получении доступных посадок мероприятия',
+                event_id=event_id,
+                error=exc,
             )
             return 500, {}
 
@@ -210,8 +274,10 @@ class Payment:
 
         if landing_data not in landings:
             logger.error(
-                msg=f'Некорректные данные для покупки билета {data} пользователем '
-                    f'{user}: Посадка по данным {seat_data} не доступна или не существует',
+                msg='Некорректные данные для покупки билета: посадка не доступна или не существует',
+                event_id=event_id,
+                user=user,
+                seat_data=seat_data,
             )
             return 400, {}
 
@@ -222,7 +288,8 @@ class Payment:
 
         if status != 200:
             logger.error(
-                msg=f'Не удалось получить временные брони мероприятия по id {event_id}',
+                msg='Не удалось получить временные брони мероприятия',
+                event_id=event_id,
             )
             return status, {}
 
@@ -236,8 +303,10 @@ class Payment:
             if seat_data == key_data['seat_data']:
                 if user.id != key_data['user']:
                     logger.error(
-                        msg=f'Некорретные данные для покупки билета {data} пользователем '
-                            f'{user}',
+                        msg='Некорректные данные для покупки билета: место забронировано другим пользователем',
+                        event_id=event_id,
+                        user=user,
+                        seat_data=seat_data,
                     )
                     return 400, {}
                 redis_cache.delete(key=key)
@@ -248,32 +317,39 @@ class Payment:
             ).values('section', 'row', 'seat'))
         except Exception as exc:
             logger.error(
-                msg=f'Возникла ошибка при получении билетов мероприятия по id '
-                    f'{event_id}: {exc}',
+                msg='Возникла ошибка при получении билетов мероприятия',
+                event_id=event_id,
+                error=exc,
             )
             return 500, {}
 
         if seat_data in tickets:
             logger.error(
-                msg=f'Некорретные данные для покупки билета {data} пользователем '
-                    f'{user}. Билет уже куплен',
+                msg='Некорректные данные для покупки билета: билет уже куплен',
+                event_id=event_id,
+                user=user,
+                seat_data=seat_data,
             )
             return 400, {}
 
         logger.info(
-            msg=f'Создание счета для оплаты билета {data} пользователю {user}',
+            msg='Создание счета для оплаты билета',
+            event_id=event_id,
+            user=user,
         )
         price = str(data['price'])
         status, ticket_settings = redis_cache.get(
             key='ticket_settings',
             model=TicketSettings,
             timeout=60 * 60,
+            local_timeout=REDIS_LOCAL_TIMEOUT,
             pk=1,
         )
         if status != 200:
             logger.error(
-                msg=f'Не осуществить покупку билета {data} '
-                    f'Настройки билетов не найдены',
+                msg='Не удалось осуществить покупку билета: настройки билетов не найдены',
+                event_id=event_id,
+                user=user,
             )
             return status, {}
 
@@ -301,8 +377,11 @@ class Payment:
         )
         if status != 200:
             logger.error(
-                msg=f'Возникла ошибка при создании счета для оплаты билета {data} '
-                    f' пользователю {user}: {response_data}',
+                msg='Возникла ошибка при создании счета для оплаты билета',
+                event_id=event_id,
+                user=user,
+                bill_id=bill_id,
+                response=response_data,
             )
             return 500, {}
 
@@ -322,7 +401,10 @@ class Payment:
         )
         if status != 200:
             logger.error(
-                msg=f'Не удалось создать временную бронь билета {data}',
+                msg='Не удалось создать временную бронь билета',
+                event_id=event_id,
+                user=user,
+                bill_id=bill_id,
             )
             return 500, {}
 
@@ -332,13 +414,16 @@ class Payment:
         )
         if status != 200:
             logger.error(
-                msg=f'Не удалось добавить {bill_id} в список для проверки',
+                msg='Не удалось добавить счет в список для проверки',
+                bill_id=bill_id,
             )
             return 500, {}
 
         logger.info(
-            msg=f'Временно забронированн билет {data}. Cоздан счет для оплаты '
-                f'билета пользователю {user}',
+            msg='Временно забронирован билет, создан счет для оплаты',
+            event_id=event_id,
+            user=user,
+            bill_id=bill_id,
         )
         pay_url = response_data['payUrl']
         response_data = {
@@ -358,7 +443,8 @@ class Payment:
         '''
 
         logger.info(
-            msg=f'Подтверждение покупки по счету {bill_id}'
+            msg='Подтверждение покупки по счету',
+            bill_id=bill_id,
         )
 
         path = f'/bills/{bill_id}/details/'
@@ -371,30 +457,34 @@ class Payment:
 
         if status != 200:
             logger.error(
-                msg=f'Возникла ошибка при подтверждении покупки по счету {bill_id}:'
-                    f'{response_data}',
+                msg='Возникла ошибка при подтверждении покупки по счету',
+                bill_id=bill_id,
+                response=response_data,
             )
             return 500
 
         bill_status = response_data['status']['value']
         if bill_status in self.bill_fail_statuses:
             logger.error(
-                msg=f'Не удалось подтвердить покупку по счету {bill_id}. '
-                    f'Статус счета {bill_status}',
+                msg='Не удалось подтвердить покупку по счету: счет не оплачен',
+                bill_id=bill_id,
+                bill_status=bill_status,
             )
             return 400  # Todo
 
         if bill_status not in self.bill_success_statuses:
             logger.error(
-                msg=f'Не удалось подтвердить покупку по счету {bill_id}. '
-                    f'Получен неизвестный статус счета {bill_status}',
+                msg='Не удалось подтвердить покупку по счету: неизвестный статус счета',
+                bill_id=bill_id,
+                bill_status=bill_status,
             )
             return 500
 
         payments = response_data.get('payments')
         if not payments:
             logger.info(
-                msg=f'Ожидание оплаты счета {bill_id} со стороны пользователя',
+                msg='Ожидание оплаты счета со стороны пользователя',
+                bill_id=bill_id,
             )
             return 500
 
@@ -405,15 +495,17 @@ class Payment:
         ticket_status = constants.waiting_payment
         if payment_status in self.payment_fail_statuses:
             logger.error(
-                msg=f'Не удалось подтвердить покупку по счету {bill_id}. '
-                    f'Статус платежа {payment_status}',
+                msg='Не удалось подтвердить покупку по счету: платеж не прошел',
+                bill_id=bill_id,
+                payment_status=payment_status,
             )
             return 400  # Todo
 
         if payment_status not in self.payment_success_statuses:
             logger.error(
-                msg=f'При подтверждении покупки по счету {bill_id} получен '
-                    f'неизвестный статус платежа {payment_status}',
+                msg='При подтверждении покупки по счету получен неизвестный статус платежа',
+                bill_id=bill_id,
+                payment_status=payment_status,
             )
             ticket_status = constants.unknown
 
@@ -423,8 +515,8 @@ class Payment:
         )
         if status != 200 or not keys:
             logger.error(
-                msg=f'Не удалось подтвердить покупку по счету {bill_id}. '
-                    f'Ошибка redis или временная недоступна',
+                msg='Не удалось подтвердить покупку по счету: ошибка redis или временная бронь недоступна',
+                bill_id=bill_id,
             )
             return status
 
@@ -434,8 +526,8 @@ class Payment:
         )
         if status != 200:
             logger.error(
-                msg=f'Не удалось подтвердить покупку по счету {bill_id}. '
-                    f'Ошибка redis или временная недоступна',
+                msg='Не удалось подтвердить покупку по счету: ошибка redis или временная бронь недоступна',
+                bill_id=bill_id,
             )
             return status
 
@@ -445,39 +537,55 @@ class Payment:
         seat_data = key_data['seat_data']
         section = seat_data['section']
         row = seat_data['row']
+        event_id = key_data['event']
         try:
-            ticket = Ticket.objects.create(
-                event_id=key_data['event'],
-                user_id=key_data['user'],
-                section=section,
-                row=row,
-                seat=seat_data['seat'],
-                price=key_data['price'],
-                status=ticket_status,
-                payment_id=payment_id,
-                acquiring_status=payment_status,
-                status_updated=timezone.now(),
-            )
-            landing = Landing.objects.filter(
-                event=ticket.event,
-                section=section,
-                row=row,
-            ).first()
-            landing.quantity -= 1
-            landing.save()
+            with transaction.atomic():
+                Ticket.objects.create(
+                    event_id=event_id,
+                    user_id=key_data['user'],
+                    section=section,
+                    row=row,
+                    seat=seat_data['seat'],
+                    price=key_data['price'],
+                    status=ticket_status,
+                    payment_id=payment_id,
+                    acquiring_status=payment_status,
+                    status_updated=timezone.now(),
+                )
+                updated = Landing.objects.filter(
+                    event_id=event_id,
+                    section=section,
+                    row=row,
+                    quantity__gt=0,
+                ).update(quantity=F('quantity') - 1)
+                if not updated:
+                    raise Landing.DoesNotExist(
+                        f'Посадка по данным {seat_data} не найдена или в ней нет свободных мест',
+                    )
+
+                Event.objects.filter(
+                    pk=event_id,
+                ).update(available_count=Greatest(F('available_count') - 1, 0))
         except Exception as exc:
             logger.error(
-                msg=f'Возникла ошибка при подтверждении покупки по счету {bill_id}: '
-                    f'{exc}',
+                msg='Возникла ошибка при подтверждении покупки по счету',
+                bill_id=bill_id,
+                event_id=event_id,
+                error=exc,
             )
             return 500
 
         redis_cache.delete(
             key=key,
         )
+        pin_to_primary(
+            user_id=key_data['user'],
+        )
 
         logger.info(
-            msg=f'Успешно подтверждена покупка по счету {bill_id} и создан билет',
+            msg='Успешно подтверждена покупка по счету и создан билет',
+            bill_id=bill_id,
+            event_id=event_id,
         )
         return 200
 
@@ -493,7 +601,8 @@ class Payment:
         '''
 
         logger.info(
-            msg=f'Проверка статуса платежа {payment_id}',
+            msg='Проверка статуса платежа',
+            payment_id=payment_id,
         )
 
         path = f'/payments/{payment_id}/'
@@ -507,15 +616,17 @@ class Payment:
         }
         if status == 404:
             logger.error(
-                msg=f'Возникла ошибка при проверке статуса платежа {payment_id}. '
-                    f'Платеж не найден',
+                msg='Возникла ошибка при проверке статуса платежа: платеж не найден',
+                payment_id=payment_id,
             )
             data['ticket_status'] = constants.canceled
             return status, data
 
         if status != 200:
             logger.error(
-                msg=f'Возникла ошибка при проверке статуса платежа {payment_id}',
+                msg='Возникла ошибка при проверке статуса платежа',
+                payment_id=payment_id,
+                response=response_data,
             )
             data['ticket_status'] = constants.waiting_payment
             return 500, data
@@ -525,28 +636,33 @@ class Payment:
 
         if payment_status in self.payment_fail_statuses:
             logger.error(
-                msg=f'Платеж {payment_id} не прошел',
+                msg='Платеж не прошел',
+                payment_id=payment_id,
+                payment_status=payment_status,
             )
             data['ticket_status'] = constants.canceled
             return 400, data
 
         if payment_status not in self.payment_success_statuses:
             logger.error(
-                msg=f'При проверке платежа {payment_id} получен неизвестный '
-                    f'статус {payment_status}',
+                msg='При проверке платежа получен неизвестный статус',
+                payment_id=payment_id,
+                payment_status=payment_status,
             )
             data['ticket_status'] = constants.unknown
             return 500, data
 
         if payment_status == self.payment_done_status:
             logger.info(
-                msg=f'Платеж {payment_id} прошел успешно'
+                msg='Платеж прошел успешно',
+                payment_id=payment_id,
             )
             data['ticket_status'] = constants.active
             return 200, data
 
         logger.info(
-            msg=f'Платеж {payment_id} в обработке',
+            msg='Платеж в обработке',
+            payment_id=payment_id,
         )
         data['ticket_status'] = constants.waiting_payment
         return 200, data
@@ -564,7 +680,8 @@ class Payment:
         '''
 
         logger.info(
-            msg=f'Возврат средств по платежу {payment_id}',
+            msg='Возврат средств по платежу',
+            payment_id=payment_id,
         )
 
         refund_data = {
@@ -587,24 +704,30 @@ class Payment:
 
         if status != 200:
             logger.error(
-                msg=f'Возникла ошибка при возврате средств по платежу {payment_id}:'
-                    f'{response_data}',
+                msg='Возникла ошибка при возврате средств по платежу',
+                payment_id=payment_id,
+                refund_id=refund_id,
+                response=response_data,
             )
             return 500, data
 
         refund_status = response_data['status']['value']
         if refund_status in self.refund_fail_statuses:
             logger.error(
-                msg=f'Не удалось осуществить возврат средств по платежу: {payment_id}.'
-                    f'Статус возврата {refund_status}',
+                msg='Не удалось осуществить возврат средств по платежу',
+                payment_id=payment_id,
+                refund_id=refund_id,
+                refund_status=refund_status,
             )
             data['refund_status'] = constants.fail_refund
             return 400, data #TODO
 
         if refund_status not in self.refund_success_statuses:
             logger.error(
-                msg=f'Не удалось осуществить возврат средств по платежу: {payment_id} '
-                    f'Неизвестный статус возврата {refund_status}',
+                msg='Не удалось осуществить возврат средств по платежу: неизвестный статус возврата',
+                payment_id=payment_id,
+                refund_id=refund_id,
+                refund_status=refund_status,
             )
             data['refund_status'] = constants.unknown
             return 400, data
@@ -614,8 +737,10 @@ class Payment:
             data['refund_status'] = constants.success_refund
 
         logger.info(
-            msg=f'Осуществлен возврат средств по платежу {payment_id}. '
-                f'Статус возврата {refund_status}',
+            msg='Осуществлен возврат средств по платежу',
+            payment_id=payment_id,
+            refund_id=refund_id,
+            refund_status=refund_status,
         )
         return 200, data
 
@@ -632,8 +757,9 @@ class Payment:
         '''
 
         logger.info(
-            msg=f'Проверка статуса возврата средств {refund_id} по '
-                f'платежy {payment_id}',
+            msg='Проверка статуса возврата средств',
+            payment_id=payment_id,
+            refund_id=refund_id,
         )
         path = f'/payments/{payment_id}/refunds/{refund_id}/'
         status, response_data = self.make_request(
@@ -646,16 +772,19 @@ class Payment:
         }
         if status == 404:
             logger.error(
-                msg=f'Возникла ошибка при проверке статуса возврата средств {refund_id} '
-                    f'по платежу {payment_id}. Id возврата или платежа не найден',
+                msg='Возникла ошибка при проверке статуса возврата средств: возврат или платеж не найден',
+                payment_id=payment_id,
+                refund_id=refund_id,
             )
             data['refund_status'] = constants.fail_refund
             return status, data
 
         if status != 200:
             logger.error(
-                msg=f'Не удалось проверить статус возврата средств {refund_id} '
-                    f'по платежу {payment_id}: {response_data}',
+                msg='Не удалось проверить статус возврата средств',
+                payment_id=payment_id,
+                refund_id=refund_id,
+                response=response_data,
             )
             return status, data
 
@@ -664,16 +793,20 @@ class Payment:
 
         if refund_status in self.refund_fail_statuses:
             logger.error(
-                msg=f'Ошибка возврата средств {refund_id} по платежу {payment_id}.'
-                    f'Статус возврата {refund_status}',
+                msg='Ошибка возврата средств',
+                payment_id=payment_id,
+                refund_id=refund_id,
+                refund_status=refund_status,
             )
             data['refund_status'] = constants.fail_refund
             return 400, data #todo
 
         if refund_status not in self.payment_success_statuses:
             logger.error(
-                msg=f'При проверка статуса возврата средств {refund_id} по платежу '
-                    f'{payment_id} получен неизвестный статус: {refund_status}',
+                msg='При проверке статуса возврата средств получен неизвестный статус',
+                payment_id=payment_id,
+                refund_id=refund_id,
+                refund_status=refund_status,
             )
             data['refund_status'] = constants.unknown
             return 400, data #todo
@@ -681,7 +814,9 @@ class Payment:
         data['refund_status'] = constants.waiting_refund
         if refund_status == self.refund_done_status:
             logger.info(
-                msg=f'Успешный возврат средств {refund_id} по платежу {payment_id}',
+                msg='Успешный возврат средств',
+                payment_id=payment_id,
+                refund_id=refund_id,
             )
             data['refund_status'] = constants.success_refund
 
@@ -711,17 +846,19 @@ def get_user_tickets(user: User) -> (int, list):
     '''
 
     logger.info(
-        msg=f'Получение списка билетов пользователя {user}',
+        msg='Получение списка билетов пользователя',
+        user=user,
     )
 
     try:
-        tickets = Ticket.objects.filter(
+        tickets = Ticket.objects.using(get_read_db(user=user)).filter(
             user=user,
         )
     except Exception as exc:
         logger.error(
-            msg=f'Возникла ошибка при получении списка билетов '
-                f'пользователя {user}: {exc}',
+            msg='Возникла ошибка при получении списка билетов пользователя',
+            user=user,
+            error=exc,
         )
         return 500, []
 
@@ -730,7 +867,8 @@ def get_user_tickets(user: User) -> (int, list):
         many=True,
     ).data
     logger.info(
-        msg=f'Успешно получен список билетов пользователя {user}',
+        msg='Успешно получен список билетов пользователя',
+        user=user,
     )
     return 200, response_data
 
@@ -751,7 +889,7 @@ def check_ticket_qr(data: QueryDict) -> (int, dict):
     '''
 
     logger.info(
-        msg=f'Проверка данных для qr билета {data}',
+        msg='Проверка данных для qr билета',
     )
 
     serializer = TicketQRSerializer(
@@ -759,7 +897,8 @@ def check_ticket_qr(data: QueryDict) -> (int, dict):
     )
     if not serializer.is_valid():
         logger.error(
-            msg=f'Невалидные данные для qr билета {data}: {serializer.errors}',
+            msg='Невалидные данные для qr билета',
+            errors=serializer.errors,
         )
         return 400, {}
 
@@ -770,19 +909,24 @@ def check_ticket_qr(data: QueryDict) -> (int, dict):
         ).first()
     except Exception as exc:
         logger.error(
-            msg=f'Возникла ошибка при проверке данных для qr билета {data}: {exc}',
+            msg='Возникла ошибка при получении билета для проверки qr',
+            ticket_id=validated_data['uuid'],
+            error=exc,
         )
         return 500, {}
 
     if ticket is None:
         logger.error(
-            msg=f'Билет с данными {data} для проверки qr не найден',
+            msg='Билет для проверки qr не найден',
+            ticket_id=validated_data['uuid'],
         )
         return 410, {}
 
     if ticket.status != 'active':
         logger.error(
-            msg=f'Билет с данными {data} недействителен',
+            msg='Билет недействителен',
+            ticket_id=ticket.pk,
+            ticket_status=ticket.status,
         )
         return 400, {}
 
@@ -791,11 +935,14 @@ def check_ticket_qr(data: QueryDict) -> (int, dict):
         ticket.save()
     except Exception as exc:
         logger.error(
-            msg=f'Возникла ошибка при проверке данных для qr билета {data}: {exc}',
+            msg='Возникла ошибка при сохранении билета после проверки qr',
+            ticket_id=ticket.pk,
+            error=exc,
         )
         return 500, {}
 
     logger.info(
-        msg=f'Успешно проверены qr данные билета {data}',
+        msg='Успешно проверены qr данные билета',
+        ticket_id=ticket.pk,
     )
     return 200, {}
@@ -7,59 +7,46 @@ from config.settings import (
     HOST,
 )
 
-from notifications.services import Email
-
 from tickets.api import payment
 
-from utils.logger import get_logger
+from utils.logger import get_structured_logger
 
 
-logger = get_logger(__name__)
+logger = get_structured_logger(__name__)
 
 
-@shared_task
-def notify_users(event_data: dict, recipient_list: list, email_type: str) -> int:
+def get_event_mail_data(event_data: dict) -> dict:
     '''
-    Асинхронная отправка писем-оповещений по мероприятию списку пользователей
+    Данные письма-оповещения по мероприятию
 
     Args:
-        event_data: данные мероприятия для формирования текста письма
+        event_data: данные мероприятия
             {
             "name": "Test event name",
             "datetime": datetime.datetime(2024, 9, 25, 13, 0,
             tzinfo=datetime.timezone.utc),
             "slug": "test-event-name"
             }
-        recipient_list: список получателей письма
-            ["test1@cc.com", "test2@cc.com"]
-        email_type: тип письма
-            "notify_day_in_day"
 
     Returns:
-        Код статуса
+        Словарь данных письма, который можно сохранить в JSON
     '''
 
-    event_name = event_data['name']
-    logger.info(
-        msg=f'Отправка писeм-оповещений {email_type} по мероприятию '
-            f' {event_name} списку пользователей {recipient_list}',
-    )
-
     path = reverse('event', args=(event_data['slug'],))
-    url = f'{SITE_PROTOCOL}://{HOST}/{path}'
-    mail_data = {
-        'datetime': event_data['datetime'],
-        'event_name': event_name,
-        'url': url,
+    return {
+        'datetime': str(event_data['datetime']),
+        'event_name': event_data['name'],
+        'url': f'{SITE_PROTOCOL}://{HOST}/{path}',
+        'seats': '',
+        'tickets_count': 1,
     }
 
-    email = Email(
-        email_type=email_type,
-        mail_data=mail_data,
-        recipient=recipient_list,
-    )
-    status = email.send()
-    return status
+
+def get_seats_mail_data(seats: list) -> dict:
+    return {
+        'seats': '; '.join(seats),
+        'tickets_count': len(seats),
+    }
 
 
 @shared_task
@@ -0,0 +1,123 @@
+from datetime import datetime
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.utils import timezone
+
+from config.celery import app
+
+from events.models import (
+    Event,
+    Landing,
+)
+from tickets.models import Ticket
+from tickets.services import Payment
+from tickets.workers import (
+    check_payment_status,
+    reconcile_available_count,
+)
+
+from utils import constants, redis_cache
+
+
+class TestAvailableCount(TestCase):
+    fixtures = [
+        'areas.json', 'categories.json', 'events.json', 'landings.json',
+        'users.json',
+    ]
+    bill_id = 'bill1'
+
+    def setUp(self):
+        Event.objects.update_available_count()
+
+    def tearDown(self):
+        redis_cache.delete(key=f'event1_bill{self.bill_id}')
+
+    def confirm_buying(self, seat: str) -> int:
+        redis_cache.set_key(
+            key=f'event1_bill{self.bill_id}',
+            data={
+                'seat_data': {'section': None, 'row': None, 'seat': seat},
+                'user': 1,
+                'price': '5000.00',
+                'event': 1,
+            },
+        )
+        response_data = {
+            'status': {'value': 'PAID'},
+            'payments': [
+                {'paymentId': f'payment{seat}', 'status': {'value': 'COMPLETED'}},
+            ],
+        }
+        with patch.object(Payment, 'make_request', return_value=(200, response_data)):
+            return Payment().confirm_buying(bill_id=self.bill_id)
+
+    def test_confirm_buying(self):
+        status = self.confirm_buying(seat='1')
+
+        self.assertEqual(status, 200)
+        self.assertEqual(Landing.objects.get(pk=1).quantity, 29)
+        self.assertEqual(Event.objects.get(pk=1).available_count, 29)
+
+    def test_confirm_buying_sold_out(self):
+        Landing.objects.filter(pk=1).update(quantity=0)
+        Event.objects.filter(pk=1).update(available_count=0)
+
+        status = self.confirm_buying(seat='1')
+
+        self.assertEqual(status, 500)
+        self.assertFalse(Ticket.objects.exists())
+        self.assertEqual(Landing.objects.get(pk=1).quantity, 0)
+        self.assertEqual(Event.objects.get(pk=1).available_count, 0)
+
+    def test_check_payment_status(self):
+        Ticket.objects.bulk_create(
+            Ticket(
+                event_id=event_id,
+                user_id=1,
+                section=section,
+                row=row,
+                price='5000.00',
+                seat=str(seat),
+                payment_id=payment_id,
+                status=constants.waiting_payment,
+            )
+            for event_id, section, row, seat, payment_id in (
+                (1, None, None, 1, 'declined'),
+                (1, None, None, 2, 'declined'),
+                (1, None, None, 3, 'declined'),
+                (1, None, None, 4, 'completed'),
+                (2, '1', '1', 1, 'declined'),
+            )
+        )
+
+        def check_payment(payment_id):
+            if payment_id == 'declined':
+                return 400, {'acquiring_status': 'DECLINED', 'ticket_status': constants.canceled}
+            return 200, {'acquiring_status': 'COMPLETED', 'ticket_status': constants.active}
+
+        app.conf.task_always_eager = True
+        try:
+            with patch('tickets.tasks.payment.check_payment', side_effect=check_payment):
+                self.assertTrue(check_payment_status())
+        finally:
+            app.conf.task_always_eager = False
+
+        self.assertEqual(Landing.objects.get(pk=1).quantity, 33)
+        self.assertEqual(Landing.objects.get(pk=4).quantity, 31)
+        self.assertEqual(
+            dict(Event.objects.filter(pk__in=(1, 2)).values_list('pk', 'available_count')),
+            {1: 33, 2: 31},
+        )
+
+    @patch('django.utils.timezone.now', return_value=datetime(2024, 8, 27, tzinfo=timezone.utc))
+    def test_reconcile_available_count(self, mock_now):
+        Event.objects.update(available_count=0)
+
+        self.assertTrue(reconcile_available_count())
+
+        # мероприятие 3 закончилось 26 августа и не сверяется
+        self.assertEqual(
+            dict(Event.objects.values_list('pk', 'available_count')),
+            {1: 30, 2: 30, 3: 0},
+        )
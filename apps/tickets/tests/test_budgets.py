@@ -0,0 +1,159 @@
+import uuid
+from datetime import datetime
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from tickets.models import (
+    Ticket,
+    TicketSettings,
+)
+from tickets.services import (
+    Payment,
+    check_ticket_qr,
+    get_user_tickets,
+)
+
+from utils import redis_cache
+from utils.testing import (
+    Budget,
+    BudgetMixin,
+)
+
+
+User = get_user_model()
+
+
+@patch('django.utils.timezone.now', return_value=datetime(2024, 8, 1, tzinfo=timezone.utc))
+class TestBudgets(BudgetMixin, TestCase):
+    fixtures = [
+        'areas.json', 'categories.json', 'events.json',
+        'users.json', 'landings.json',
+    ]
+    budgets = {
+        'get_user_tickets': Budget(queries=1),
+        'check_ticket_qr': Budget(queries=2),
+        'buy': Budget(queries=3, redis=4),
+        'confirm_buying': Budget(queries=5, redis=3),
+        'check_payment': Budget(queries=0),
+        'refund': Budget(queries=0),
+        'check_refund': Budget(queries=0),
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.get(pk=1)
+        cls.ticket = Ticket.objects.create(
+            event_id=1,
+            user=cls.user,
+            price='5000.00',
+            seat='1',
+            payment_id='payment',
+        )
+        cls.payment = Payment()
+
+    def setUp(self):
+        super().setUp()
+        self.bill_id = str(uuid.uuid4())
+        redis_cache.get(
+            key='ticket_settings',
+            model=TicketSettings,
+            timeout=60,
+            pk=1,
+        )
+
+    def tearDown(self):
+        redis_cache.delete(key='ticket_settings')
+        redis_cache.delete(key=f'event1_bill{self.bill_id}')
+        redis_cache.remove_from_list(key='bills_to_check', value=self.bill_id)
+        super().tearDown()
+
+    def test_get_user_tickets(self, mock_timezone):
+        with self.assertBudget('get_user_tickets'):
+            status_code, response_data = get_user_tickets(
+                user=self.user,
+            )
+        self.assertEqual(status_code, 200)
+
+    def test_check_ticket_qr(self, mock_timezone):
+        with self.assertBudget('check_ticket_qr'):
+            status_code, response_data = check_ticket_qr(
+                data={'uuid': str(self.ticket.uuid)},
+            )
+        self.assertEqual(status_code, 200)
+
+    @patch('tickets.services.uuid.uuid4')
+    @patch('tickets.services.Payment.make_request')
+    def test_buy(self, mock_make_request, mock_uuid4, mock_timezone):
+        mock_uuid4.return_value = self.bill_id
+        mock_make_request.return_value = 200, {'payUrl': 'https://pay.test'}
+
+        with self.assertBudget('buy'):
+            status_code, response_data = self.payment.buy(
+                user=self.user,
+                data={
+                    'event_id': 1,
+                    'seat_data': {'section': None, 'row': None, 'seat': '2'},
+                    'price': '5000.00',
+                },
+            )
+        self.assertEqual(status_code, 200)
+
+    @patch('tickets.services.Payment.make_request')
+    def test_confirm_buying(self, mock_make_request, mock_timezone):
+        mock_make_request.return_value = 200, {
+            'status': {'value': 'PAID'},
+            'payments': [
+                {'paymentId': 'payment', 'status': {'value': 'COMPLETED'}},
+            ],
+        }
+        redis_cache.set_key(
+            key=f'event1_bill{self.bill_id}',
+            data={
+                'seat_data': {'section': None, 'row': None, 'seat': '2'},
+                'user': self.user.id,
+                'price': '5000.00',
+                'event': 1,
+            },
+            time=60,
+        )
+
+        with self.assertBudget('confirm_buying'):
+            status_code = self.payment.confirm_buying(
+                bill_id=self.bill_id,
+            )
+        self.assertEqual(status_code, 200)
+
+    @patch('tickets.services.Payment.make_request')
+    def test_check_payment(self, mock_make_request, mock_timezone):
+        mock_make_request.return_value = 200, {'status': {'value': 'COMPLETED'}}
+
+        with self.assertBudget('check_payment'):
+            status_code, response_data = self.payment.check_payment(
+                payment_id='payment',
+            )
+        self.assertEqual(status_code, 200)
+
+    @patch('tickets.services.Payment.make_request')
+    def test_refund(self, mock_make_request, mock_timezone):
+        mock_make_request.return_value = 200, {'status': {'value': 'WAITING'}}
+
+        with self.assertBudget('refund'):
+            status_code, response_data = self.payment.refund(
+                payment_id='payment',
+                amount='5000.00',
+            )
+        self.assertEqual(status_code, 200)
+
+    @patch('tickets.services.Payment.make_request')
+    def test_check_refund(self, mock_make_request, mock_timezone):
+        mock_make_request.return_value = 200, {'status': {'value': 'COMPLETED'}}
+
+        with self.assertBudget('check_refund'):
+            status_code, response_data = self.payment.check_refund(
+                payment_id='payment',
+                refund_id='refund',
+            )
+        self.assertEqual(status_code, 200)
@@ -0,0 +1,35 @@
+from django.test import TestCase
+from django.utils import timezone
+
+from tickets.models import Ticket
+
+from utils import constants
+from utils.testing import (
+    ExplainMixin,
+    postgres_only,
+)
+
+
+@postgres_only
+class TestIndexes(ExplainMixin, TestCase):
+
+    def test_waiting_payment_tickets(self):
+        tickets = Ticket.objects.filter(
+            status=constants.waiting_payment,
+        )
+        self.assertUsesIndex(tickets, 'tickets_status_idx')
+
+    def test_event_tickets(self):
+        tickets = Ticket.objects.filter(
+            event_id=1,
+        ).exclude(
+            status=constants.canceled,
+        )
+        self.assertUsesIndex(tickets, 'tickets_event_status_idx')
+
+    def test_notification_tickets(self):
+        tickets = Ticket.objects.filter(
+            notification_status__in=['no_notify', '3_days'],
+            event__start_at__date=timezone.now().date(),
+        )
+        self.assertUsesIndex(tickets, 'tickets_notification_idx')
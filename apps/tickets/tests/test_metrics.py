@@ -0,0 +1,30 @@
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.urls import reverse
+
+from tickets.services import Payment
+
+
+class TestMetrics(TestCase):
+
+    def test_get_endpoint(self):
+        endpoint = Payment().get_endpoint(
+            path='/payments/123/refunds/456/',
+        )
+
+        self.assertEqual(endpoint, '/payments/{id}/refunds/{id}/')
+
+    @patch('utils.metrics.METRICS_TOKEN', 'secret')
+    def test_metrics_view(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 403)
+
+        response = self.client.get(
+            reverse('metrics'),
+            HTTP_AUTHORIZATION='Bearer secret',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'acquiring_request_seconds', response.content)
+        self.assertIn(b'worker_backlog', response.content)
@@ -0,0 +1,85 @@
+import threading
+
+from django.test import TestCase
+
+from tickets.models import TicketSettings
+
+from utils import redis_cache
+from utils.timing import measure
+
+
+class TestSettingsCache(TestCase):
+    key = 'ticket_settings'
+
+    def setUp(self):
+        redis_cache.delete(key=self.key)
+
+    def tearDown(self):
+        redis_cache.delete(key=self.key)
+        redis_cache.delete(key=f'lock:{self.key}')
+
+    def get_settings(self, **kwargs):
+        return redis_cache.get(
+            key=self.key,
+            model=TicketSettings,
+            timeout=60,
+            pk=1,
+            **kwargs,
+        )
+
+    def test_miss_waits_for_lock_owner(self):
+        redis_cache.redis_client.set(f'lock:{self.key}', 'other', px=5000)
+        timer = threading.Timer(
+            interval=0.1,
+            function=redis_cache.set_key,
+            kwargs={'key': self.key, 'data': {'payment_timeout': 1}},
+        )
+        timer.start()
+        try:
+            with self.assertNumQueries(0):
+                status, data = self.get_settings()
+        finally:
+            timer.join()
+
+        self.assertEqual(status, 200)
+        self.assertEqual(data, {'payment_timeout': 1})
+
+    def test_miss_loads_once_and_releases_lock(self):
+        status, data = self.get_settings()
+
+        self.assertEqual(status, 200)
+        self.assertEqual(data['payment_timeout'], 60*3)
+        self.assertEqual(redis_cache.exists(key=f'lock:{self.key}'), (200, False))
+        with self.assertNumQueries(0):
+            self.get_settings()
+
+    def test_lock_owner_rechecks_key(self):
+        redis_cache.set_key(key=self.key, data={'payment_timeout': 1})
+
+        with self.assertNumQueries(0):
+            status, data = redis_cache.load_model(
+                key=self.key,
+                model=TicketSettings,
+                timeout=60,
+                pk=1,
+            )
+
+        self.assertEqual(data, {'payment_timeout': 1})
+        self.assertEqual(redis_cache.exists(key=f'lock:{self.key}'), (200, False))
+
+    def test_local_cache(self):
+        self.get_settings(local_timeout=60)
+        with measure() as timing:
+            status, data = self.get_settings(local_timeout=60)
+        self.assertEqual(status, 200)
+        self.assertEqual(timing.counts['redis'], 0)
+
+        ticket_settings = TicketSettings.get_solo()
+        ticket_settings.payment_timeout = 10
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket_settings.save()
+            status, data = self.get_settings(local_timeout=60)
+            self.assertEqual(data['payment_timeout'], 60*3)
+
+        status, data = self.get_settings(local_timeout=60)
+        self.assertEqual(data['payment_timeout'], 10)
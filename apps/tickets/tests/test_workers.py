@@ -0,0 +1,100 @@
+from datetime import datetime
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from notifications.models import OutboxEmail
+
+from tickets.models import Ticket
+from tickets.workers import (
+    iter_event_batches,
+    iter_ticket_rows,
+    user_event_notification,
+)
+
+
+User = get_user_model()
+
+
+class TestNotificationWorker(TestCase):
+    fixtures = [
+        'areas.json', 'categories.json', 'events.json', 'users.json',
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        users = User.objects.bulk_create(
+            User(email=f'worker{index}@cc.com')
+            for index in range(3)
+        )
+        Ticket.objects.bulk_create(
+            Ticket(
+                event_id=event_id,
+                user=user,
+                section='1',
+                row='2',
+                price='5000.00',
+                seat=seat,
+                payment_id='payment',
+            )
+            for event_id in (2, 1)
+            for user in users
+            for seat in (f'{user.pk}-1', f'{user.pk}-2')
+        )
+
+    def test_iter_event_batches(self):
+        batches = list(iter_event_batches(
+            tickets=Ticket.objects.all(),
+            batch_size=2,
+            chunk_size=1,
+        ))
+
+        self.assertEqual(
+            [(event_data['slug'], len(recipients), len(ticket_uuids)) for event_data, recipients, ticket_uuids in batches],
+            [
+                ('testing-test1-event', 2, 4),
+                ('testing-test1-event', 1, 2),
+                ('testing-test1-another-event', 2, 4),
+                ('testing-test1-another-event', 1, 2),
+            ],
+        )
+        event_data, recipients, ticket_uuids = batches[0]
+        self.assertEqual(event_data['name'], 'Testing test1 event')
+        user = User.objects.get(email='worker0@cc.com')
+        recipient = recipients['worker0@cc.com']
+        self.assertEqual(recipient['user_id'], user.pk)
+        self.assertEqual(
+            sorted(recipient['seats']),
+            [f'секция 1, ряд 2, место {user.pk}-1', f'секция 1, ряд 2, место {user.pk}-2'],
+        )
+
+    def test_iter_ticket_rows(self):
+        # 12 билетов страницами по 5: 5, 5, 2
+        with self.assertNumQueries(3):
+            rows = list(iter_ticket_rows(tickets=Ticket.objects.all(), chunk_size=5))
+
+        self.assertEqual(len({row[0] for row in rows}), 12)
+        self.assertEqual(
+            [row[1:6:4] for row in rows],
+            sorted(row[1:6:4] for row in rows),
+        )
+
+    @patch('django.utils.timezone.now', return_value=datetime(2024, 8, 27, tzinfo=timezone.utc))
+    def test_user_event_notification(self, mock_now):
+        # 30 августа начинается мероприятие 1, 28 августа - мероприятие 2
+        user_event_notification(notification_status='3_days')
+
+        self.assertEqual(
+            set(Ticket.objects.values_list('event_id', 'notification_status')),
+            {(1, '3_days'), (2, 'no_notify')},
+        )
+        outbox_email = OutboxEmail.objects.get(recipient='worker0@cc.com')
+        self.assertEqual(outbox_email.event_id, 1)
+        self.assertEqual(outbox_email.mail_data['tickets_count'], 2)
+
+        # повторная постановка после сбоя не создает дубликатов
+        Ticket.objects.update(notification_status='no_notify')
+        user_event_notification(notification_status='3_days')
+        self.assertEqual(OutboxEmail.objects.count(), 3)
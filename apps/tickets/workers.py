@@ -1,18 +1,31 @@
 import datetime
+from collections import Counter
 
 from celery import group
 
+from django.db import transaction
 from django.db.models import (
     Q,
     F,
 )
 from django.utils import timezone
 
-from events.models import Landing
+from config.settings import (
+    NOTIFY_BATCH_SIZE,
+    NOTIFY_CHUNK_SIZE,
+)
+
+from events.models import (
+    Event,
+    Landing,
+)
 
 from tickets.services import Payment
+from notifications.services import queue_notifications
+
 from tickets.tasks import (
-    notify_users,
+    get_event_mail_data,
+    get_seats_mail_data,
     check_bill,
     check_payment,
     refund,
@@ -22,6 +35,12 @@ from tickets.models import Ticket
 
 from utils import redis_cache, constants
 from utils.logger import get_logger
+from utils.metrics import (
+    observe_cycle,
+    tickets_polled,
+    worker_backlog,
+    worker_batch_size,
+)
 from utils.constants import (
     NOTIFY_DAY_IN_DAY,
     NOTIFY_3_DAYS,
@@ -33,9 +52,135 @@ logger = get_logger(__name__)
 payment = Payment()
 
 
+def format_seat(section: str | None, row: str | None, seat: str) -> str:
+    parts = []
+    if section:
+        parts.append(f'секция {section}')
+    if row:
+        parts.append(f'ряд {row}')
+    parts.append(f'место {seat}')
+    return ', '.join(parts)
+
+
+def iter_ticket_rows(tickets, chunk_size: int = NOTIFY_CHUNK_SIZE):
+    '''
+    Постраничная выборка строк билетов по ключу (event_id, user_id, uuid).
+    Серверный курсор iterator() не используется: с pgbouncer
+    (DISABLE_SERVER_SIDE_CURSORS) он загружает в память всю выборку.
+    Каждая страница - отдельный запрос, поэтому билеты, обновленные
+    между страницами, не пропускаются и не читаются повторно
+
+    Args:
+        tickets: QuerySet билетов
+        chunk_size: количество строк на странице
+
+    Returns:
+        Генератор строк (uuid, event_id, event__name, event__start_at,
+        event__slug, user_id, user__email, section, row, seat)
+    '''
+
+    # без мероприятия оповещение не сформировать
+    rows = tickets.filter(
+        event__isnull=False,
+    ).order_by(
+        'event_id', 'user_id', 'uuid',
+    ).values_list(
+        'uuid',
+        'event_id',
+        'event__name',
+        'event__start_at',
+        'event__slug',
+        'user_id',
+        'user__email',
+        'section',
+        'row',
+        'seat',
+    )
+
+    page = rows
+    while True:
+        chunk = list(page[:chunk_size])
+        yield from chunk
+        if len(chunk) < chunk_size:
+            return
+
+        ticket_uuid, event_id, *_, user_id = chunk[-1][:6]
+        page = rows.filter(
+            Q(event_id__gt=event_id) |
+            Q(event_id=event_id, user_id__gt=user_id) |
+            Q(event_id=event_id, user_id=user_id, uuid__gt=ticket_uuid)
+        )
+
+
+def iter_event_batches(tickets, batch_size: int = NOTIFY_BATCH_SIZE, chunk_size: int = NOTIFY_CHUNK_SIZE):
+    '''
+    Потоковая выборка получателей оповещений по мероприятиям. Билеты
+    читаются страницами по chunk_size без загрузки объектов User и Event,
+    в памяти держится только текущая страница и пачка. Билеты одного пользователя
+    группируются: он получает одно письмо со списком своих мест
+
+    Args:
+        tickets: QuerySet билетов
+        batch_size: максимальное количество получателей в пачке
+        chunk_size: количество строк в одной выборке из базы
+
+    Returns:
+        Генератор данных мероприятия, получателей с их местами и id билетов пачки
+        (
+            {
+                "id": 1,
+                "name": "Test event name",
+                "datetime": datetime.datetime(2024, 9, 25, 13, 0,
+                tzinfo=datetime.timezone.utc),
+                "slug": "test-event-name"
+            },
+            {
+                "test1@cc.com": {
+                    "user_id": 1,
+                    "seats": ["секция 1, ряд 1, место 1", "секция 1, ряд 1, место 2"]
+                },
+                "test2@cc.com": {"user_id": 2, "seats": ["место 7"]}
+            },
+            ["6a6f9d6e-...", "0c1e2f3a-...", "9b8c7d6e-..."]
+        )
+    '''
+
+    rows = iter_ticket_rows(tickets=tickets, chunk_size=chunk_size)
+
+    event_id = None
+    event_data = None
+    recipients = {}
+    ticket_uuids = []
+    for ticket_uuid, row_event_id, name, start_at, slug, user_id, email, section, row, seat in rows:
+        # пачка не разрывает билеты одного пользователя
+        new_batch = email not in recipients and len(recipients) >= batch_size
+        if row_event_id != event_id or new_batch:
+            if recipients:
+                yield event_data, recipients, ticket_uuids
+            event_id = row_event_id
+            event_data = {
+                'id': row_event_id,
+                'name': name,
+                'datetime': start_at,
+                'slug': slug,
+            }
+            recipients = {}
+            ticket_uuids = []
+        recipient = recipients.setdefault(email, {'user_id': user_id, 'seats': []})
+        recipient['seats'].append(format_seat(section=section, row=row, seat=seat))
+        ticket_uuids.append(str(ticket_uuid))
+
+    if recipients:
+        yield event_data, recipients, ticket_uuids
+
+
+@observe_cycle
 def user_event_notification(notification_status: str) -> None:
     '''
-    Оповещение пользователей по билетам
+    Оповещение пользователей по билетам. Оповещения пачки ставятся
+    в очередь писем в одной транзакции с обновлением статуса оповещения
+    ее билетов, отправляет их deliver_outbox_emails. После сбоя пачка
+    либо уже в очереди вместе со статусом, либо будет выбрана снова
 
     Args:
         notification_status: статус оповещения
@@ -69,56 +214,44 @@ def user_event_notification(notification_status: str) -> None:
         case _:
             return
 
+    tickets = Ticket.objects.filter(**filters)
+    batches = 0
     try:
-        tickets = Ticket.objects.filter(**filters).select_related('event', 'user')
+        for event_data, recipients, ticket_uuids in iter_event_batches(tickets=tickets):
+            with transaction.atomic():
+                status = queue_notifications(
+                    email_type=email_type,
+                    event_id=event_data['id'],
+                    mail_data=get_event_mail_data(event_data=event_data),
+                    recipients={
+                        email: {
+                            'user_id': recipient['user_id'],
+                            'mail_data': get_seats_mail_data(seats=recipient['seats']),
+                        }
+                        for email, recipient in recipients.items()
+                    },
+                )
+                if status != 200:
+                    return
+
+                Ticket.objects.filter(
+                    uuid__in=ticket_uuids,
+                ).update(
+                    notification_status=notification_status,
+                )
+            batches += 1
     except Exception as exc:
         logger.error(
-            msg=f'Возникла ошибка при получении билетов для оповещения '
+            msg=f'Возникла ошибка при постановке в очередь оповещений '
                 f'пользователей {notification_status}: {exc}',
         )
-        return
-
-    aggregated_events = {}
-    for ticket in tickets:
-        if not aggregated_events.get(ticket.event.id):
-            aggregated_events[ticket.event.id] = {}
-            event_data = {
-                'name': ticket.event_name,
-                'datetime': ticket.event.start_at,
-                'slug': ticket.event.slug,
-            }
-            aggregated_events[ticket.event.id]['event_data'] = event_data
-            aggregated_events[ticket.event.id]['recipients'] = []
-        aggregated_events[ticket.event.id]['recipients'].append(ticket.user.email)
-
-    for event, value in aggregated_events.items():
-        status = notify_users.delay(
-            event_data=value['event_data'],
-            recipient_list=value['recipients'],
-            email_type=email_type,
-        )
-        if status.get() != 200:
-            return
-
-        logger.info(
-            msg=f'Отправлено {len(tickets)} писем-оповещений {email_type} '
-                f'пользователям'
-        )
-        try:
-            tickets.update(notification_status=notification_status)
-        except Exception as exc:
-            logger.error(
-                msg=f'Возникла ошибка при обновлении статуса оповещения '
-                    f'{notification_status} билетов: {exc}',
-            )
-            return
 
-        logger.info(
-            msg=f'Успешно обновлены статусы оповещения {notification_status}'
-                f'билетов',
-        )
+    logger.info(
+        msg=f'Поставлено в очередь {batches} пачек писем-оповещений {email_type}',
+    )
 
 
+@observe_cycle
 def update_ticket_status() -> None:
     '''
     Обновление статуса просроченных билетов
@@ -148,6 +281,7 @@ def update_ticket_status() -> None:
     )
 
 
+@observe_cycle
 def check_bill_status() -> None:
     '''
     Проверка статусов счетов для оплаты из списка redis
@@ -169,6 +303,9 @@ def check_bill_status() -> None:
         )
         return
 
+    worker_backlog.labels(backlog='bills_to_check').set(len(bills))
+    worker_batch_size.labels(worker='check_bill_status').observe(len(bills))
+
     task_group = group(check_bill.s(bill_id=bill) for bill in bills)
     result_group = task_group.apply_async()
     results = result_group.join()
@@ -194,6 +331,7 @@ def check_bill_status() -> None:
     )
 
 
+@observe_cycle
 def check_payment_status() -> bool:
     '''
     Проверка статусов платежей в ожидании
@@ -216,7 +354,10 @@ def check_payment_status() -> bool:
         )
         return False
 
-    landing_filters = []
+    worker_backlog.labels(backlog='waiting_payment').set(len(tickets))
+    worker_batch_size.labels(worker='check_payment_status').observe(len(tickets))
+
+    landing_counter = Counter()
     tickets_data = {}
 
     task_group = group(check_payment.s(
@@ -238,14 +379,13 @@ def check_payment_status() -> bool:
         ticket.acquiring_status = acquiring_status if acquiring_status else ticket.acquiring_status
         ticket.status_updated = timezone.now()
         ticket.check_count += 1
+        tickets_polled.labels(
+            worker='check_payment_status',
+            status=ticket_status,
+        ).inc()
 
         if ticket_status == constants.canceled:
-            filter_dict = {
-                'event': ticket.event,
-                'section': ticket.section,
-                'row': ticket.row,
-            }
-            landing_filters.append(filter_dict)
+            landing_counter[(ticket.event_id, ticket.section, ticket.row)] += 1
 
         if ticket_status == constants.active:
             ticket.check_count = 0
@@ -264,22 +404,24 @@ def check_payment_status() -> bool:
             )
             return False
 
-    if landing_filters:
-        query_filter = Q()
-        for filter_dict in landing_filters:
-            filter_object = Q(event=filter_dict['event'])
-            filter_object &= Q(section=filter_dict['section'])
-            filter_object &= Q(row=filter_dict['row'])
-
-            query_filter |= filter_object
+    if landing_counter:
+        event_counter = Counter()
+        for (event_id, section, row), count in landing_counter.items():
+            event_counter[event_id] += count
 
         try:
-            landings = (Landing.objects.filter(query_filter).
-                        select_related('event'))
-            for landing in landings:
-                landing.quantity += 1
-
-            Landing.objects.bulk_update(landings, ['quantity'])
+            with transaction.atomic():
+                for (event_id, section, row), count in landing_counter.items():
+                    Landing.objects.filter(
+                        event_id=event_id,
+                        section=section,
+                        row=row,
+                    ).update(quantity=F('quantity') + count)
+
+                for event_id, count in event_counter.items():
+                    Event.objects.filter(
+                        pk=event_id,
+                    ).update(available_count=F('available_count') + count)
         except Exception as exc:
             logger.error(
                 msg=f'Возникла ошибка при проверке статусов билетов в ожидании. '
@@ -293,6 +435,37 @@ def check_payment_status() -> bool:
     return True
 
 
+@observe_cycle
+def reconcile_available_count() -> bool:
+    '''
+    Сверка количества свободных мест активных мероприятий с посадками
+
+    Returns:
+        True/False
+    '''
+
+    logger.info(
+        msg='Сверка количества свободных мест активных мероприятий',
+    )
+
+    try:
+        updated = Event.objects.filter(
+            canceled=False,
+            end_at__gte=timezone.now(),
+        ).update_available_count()
+    except Exception as exc:
+        logger.error(
+            msg=f'Возникла ошибка при сверке количества свободных мест: {exc}',
+        )
+        return False
+
+    logger.info(
+        msg=f'Сверено количество свободных мест у {updated} мероприятий',
+    )
+    return True
+
+
+@observe_cycle
 def need_refund() -> bool:
     '''
     закрывается площадка -> выборка активных билетов -≥
@@ -328,6 +501,8 @@ def need_refund() -> bool:
         )
         return False
 
+    worker_batch_size.labels(worker='need_refund').observe(len(tickets))
+
     tickets_data = {}
 
     task_group = group(refund.s(
@@ -350,6 +525,10 @@ def need_refund() -> bool:
         ticket.status = refund_status
         ticket.refund_id = refund_id
         ticket.status_updated = timezone.now()
+        tickets_polled.labels(
+            worker='need_refund',
+            status=refund_status,
+        ).inc()
 
     if tickets:
         try:
@@ -369,6 +548,7 @@ def need_refund() -> bool:
     return True
 
 
+@observe_cycle
 def check_refund_status() -> bool:
     '''
     Проверка статуса возврата средств у билетов с возвратом в ожидании
@@ -391,6 +571,9 @@ def check_refund_status() -> bool:
         )
         return False
 
+    worker_backlog.labels(backlog='waiting_refund').set(len(tickets))
+    worker_batch_size.labels(worker='check_refund_status').observe(len(tickets))
+
     tickets_data = {}
     task_group = group(check_refund.s(
         payment_id=ticket.payment_id,
@@ -413,6 +596,10 @@ def check_refund_status() -> bool:
         ticket.acquiring_status = acquiring_status if acquiring_status else ticket.acquiring_status
         ticket.status_updated = timezone.now()
         ticket.check_count += 1
+        tickets_polled.labels(
+            worker='check_refund_status',
+            status=refund_status,
+        ).inc()
 
     if tickets:
         try:
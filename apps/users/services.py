@@ -1,7 +1,11 @@
 import uuid
 
 from django.contrib.auth import authenticate
-from django.db import IntegrityError
+from django.db import (
+    DatabaseError,
+    IntegrityError,
+    transaction,
+)
 from django.http import QueryDict
 from django.urls import reverse
 
@@ -15,7 +19,7 @@ from config.settings import (
 
 from google_custom_oauth2.google_oauth import GoogleOAuth
 
-from notifications.services import Email
+from notifications.services import queue_email
 
 from users.models import CustomUser
 from users.serializers import (
@@ -32,13 +36,10 @@ from utils.constants import (
     CONFIRM_EMAIL,
     PASSWORD_RESTORE,
 )
-from utils.logger import (
-    get_logger,
-    get_log_user_data,
-)
+from utils.logger import get_structured_logger
 
 
-logger = get_logger(__name__)
+logger = get_structured_logger(__name__)
 oauth = GoogleOAuth(
     client_id=CLIENT_ID,
     client_secret=CLIENT_SECRET,
@@ -70,11 +71,11 @@ def register(data: QueryDict, host: str) -> (int, dict):
         }
     '''
 
-    user_data = get_log_user_data(
-        user_data=dict(data),
-    )
+    # пароли в лог не попадают, пользователь определяется по email
+    email = data.get('email')
     logger.info(
-        msg=f'Регистрация пользователя с данными {user_data}',
+        msg='Регистрация пользователя',
+        email=email,
     )
 
     serializer = RegisterSerializer(
@@ -82,36 +83,47 @@ def register(data: QueryDict, host: str) -> (int, dict):
     )
     if not serializer.is_valid():
         logger.error(
-            msg=f'Невалидные данные для регистрации пользователя '
-                f'с данными {user_data}: {serializer.errors}',
+            msg='Невалидные данные для регистрации пользователя',
+            email=email,
+            errors=serializer.errors,
         )
         return 400, {}
 
     validated_data = serializer.validated_data
     try:
-        user = CustomUser.objects.create_user(
-            email=validated_data['email'],
-            password=validated_data['password'],
-        )
+        # письмо ставится в очередь в транзакции создания пользователя
+        # и отправляется только после ее коммита. Без письма подтверждения
+        # пользователь не создается
+        with transaction.atomic():
+            user = CustomUser.objects.create_user(
+                email=validated_data['email'],
+                password=validated_data['password'],
+            )
+            status = send_user_email(
+                user=user,
+                host=host,
+                email_type=CONFIRM_EMAIL,
+            )
+            if status != 200:
+                raise DatabaseError('Не удалось поставить письмо подтверждения email в очередь')
     except IntegrityError as exc:
         logger.error(
-            msg=f'Пользователь с данными {user_data} уже существует: {exc}',
+            msg='Пользователь уже существует',
+            email=email,
+            error=exc,
         )
         return 406, {}
     except Exception as exc:
         logger.error(
-            msg=f'Не удалось создать пользователя с данными {user_data}: {exc}',
+            msg='Не удалось создать пользователя',
+            email=email,
+            error=exc,
         )
         return 500, {}
 
     logger.info(
-        msg=f'Успешно зарегистрирован пользователь с данными: {user_data}',
-    )
-
-    send_user_email(
-        user=user,
-        host=host,
-        email_type=CONFIRM_EMAIL,
+        msg='Успешно зарегистрирован пользователь',
+        email=email,
     )
 
     try:
@@ -120,8 +132,10 @@ def register(data: QueryDict, host: str) -> (int, dict):
         )
     except Exception as exc:
         logger.error(
-            msg=f'Не удалось получить токен для аутентификации пользователя '
-                f'с данными {user_data} после регистрации: {exc}',
+            msg='Не удалось получить токен для аутентификации пользователя '
+                'после регистрации',
+            email=email,
+            error=exc,
         )
         return 201, {}
 
@@ -155,11 +169,10 @@ def auth(data: QueryDict) -> (int, dict):
         }
     '''
 
-    user_data = get_log_user_data(
-        user_data=dict(data),
-    )
+    email = data.get('email')
     logger.info(
-        msg=f'Аутентификация пользователя с данными: {user_data}',
+        msg='Аутентификация пользователя',
+        email=email,
     )
 
     serializer = AuthSerializer(
@@ -167,8 +180,9 @@ def auth(data: QueryDict) -> (int, dict):
     )
     if not serializer.is_valid():
         logger.error(
-            msg=f'Невалидные данные для аутентификации пользователя '
-                f'с данными {user_data}: {serializer.errors}',
+            msg='Невалидные данные для аутентификации пользователя',
+            email=email,
+            errors=serializer.errors,
         )
         return 400, {}
 
@@ -180,15 +194,17 @@ def auth(data: QueryDict) -> (int, dict):
         )
     except Exception as exc:
         logger.error(
-            msg=f'Не удалось аутентифицировать пользователя с данными {user_data}: '
-                f'{exc}',
+            msg='Не удалось аутентифицировать пользователя',
+            email=email,
+            error=exc,
         )
         return 500, {}
 
     if user is None:
         logger.error(
-            msg=f'Не удалось аутентифицировать пользователя с данными {user_data}: '
+            msg='Не удалось аутентифицировать пользователя: '
                 'неправильные email или пароль',
+            email=email,
         )
         return 401, {}
 
@@ -198,8 +214,9 @@ def auth(data: QueryDict) -> (int, dict):
         )
     except Exception as exc:
         logger.error(
-            msg=f'Не удалось получить токен для аутентификации пользователя '
-                f'с данными {user_data}: {exc}',
+            msg='Не удалось получить токен для аутентификации пользователя',
+            email=email,
+            error=exc,
         )
         return 500, {}
 
@@ -211,7 +228,8 @@ def auth(data: QueryDict) -> (int, dict):
         'access': access,
     }
     logger.info(
-        msg=f'Успешная аутентификация пользователя с данными: {user_data}',
+        msg='Успешная аутентификация пользователя',
+        email=email,
     )
     return 200, response_data
 
@@ -236,7 +254,7 @@ def get_google_auth_link() -> (int, dict):
     '''
 
     logger.info(
-        msg=f'Получение ссылки для авторизации через google',
+        msg='Получение ссылки для авторизации через google',
     )
 
     state = str(uuid.uuid4())
@@ -305,8 +323,9 @@ def google_callback(code: str) -> (int, dict):
             user.save()
     except Exception as exc:
         logger.error(
-            msg=f'Возникла ошибка при авторизации пользователя через google: '
-                f'{exc}',
+            msg='Возникла ошибка при авторизации пользователя через google',
+            email=email,
+            error=exc,
         )
         return 500, {}
 
@@ -316,8 +335,10 @@ def google_callback(code: str) -> (int, dict):
         )
     except Exception as exc:
         logger.error(
-            msg=f'Не удалось получить токен для авторизации пользователя '
-                f'через google: {exc}',
+            msg='Не удалось получить токен для авторизации пользователя '
+                'через google',
+            email=email,
+            error=exc,
         )
         return 500, {}
 
@@ -330,6 +351,7 @@ def google_callback(code: str) -> (int, dict):
     }
     logger.info(
         msg='Успешная авторизация пользователя через google',
+        email=email,
     )
     return 200, response_data
 
@@ -362,7 +384,8 @@ def refresh_token(data: QueryDict) -> (int, dict):
     )
     if not serializer.is_valid():
         logger.error(
-            msg=f'Невалидные данные для обновления токена: {serializer.errors}',
+            msg='Невалидные данные для обновления токена',
+            errors=serializer.errors,
         )
         return 400, {}
 
@@ -373,7 +396,8 @@ def refresh_token(data: QueryDict) -> (int, dict):
         user = CustomUser.objects.get(id=user_id)
     except Exception as exc:
         logger.error(
-            msg=f'Не удалось обновить токен: {exc}',
+            msg='Не удалось обновить токен',
+            error=exc,
         )
         return 403, {}
 
@@ -382,7 +406,8 @@ def refresh_token(data: QueryDict) -> (int, dict):
         'access': str(refresh.access_token),
     }
     logger.info(
-        msg='Успешно обновлен токен'
+        msg='Успешно обновлен токен',
+        user=user,
     )
     return 200, response_data
 
@@ -404,7 +429,8 @@ def logout(data: QueryDict, user: CustomUser) -> (int, dict):
     '''
 
     logger.info(
-        msg=f'Выход из системы пользователя {user}',
+        msg='Выход из системы пользователя',
+        user=user,
     )
 
     serializer = RefreshAndLogoutSerializer(
@@ -412,8 +438,9 @@ def logout(data: QueryDict, user: CustomUser) -> (int, dict):
     )
     if not serializer.is_valid():
         logger.error(
-            msg=f'Невалидные данные для выхода из системы пользователя {user}: '
-                f'{serializer.errors}',
+            msg='Невалидные данные для выхода из системы пользователя',
+            user=user,
+            errors=serializer.errors,
         )
         return 400, {}
 
@@ -422,7 +449,9 @@ def logout(data: QueryDict, user: CustomUser) -> (int, dict):
         refresh = RefreshToken(validated_data['refresh'])
     except Exception as exc:
         logger.error(
-            msg=f'Невалидный токен для выхода пользователя {user}: {exc}',
+            msg='Невалидный токен для выхода пользователя',
+            user=user,
+            error=exc,
         )
         return 500, {}
 
@@ -430,13 +459,15 @@ def logout(data: QueryDict, user: CustomUser) -> (int, dict):
         refresh.blacklist()
     except Exception as exc:
         logger.error(
-            msg=f'Не удалось занести токен пользователя {user} '
-                f'в черный список: {exc}',
+            msg='Не удалось занести токен пользователя в черный список',
+            user=user,
+            error=exc,
         )
         return 500, {}
 
     logger.info(
-        msg=f'Успешный выход из системы пользователя {user}',
+        msg='Успешный выход из системы пользователя',
+        user=user,
     )
     return 200, {}
 
@@ -453,8 +484,9 @@ def confirm_email(url_hash: str) -> (int, dict):
         200, {}
     '''
 
+    # хэш из ссылки письма не пишется в лог
     logger.info(
-        msg=f'Подтверждение email пользователя с хэшем: {url_hash}',
+        msg='Подтверждение email пользователя по хэшу',
     )
 
     try:
@@ -463,15 +495,15 @@ def confirm_email(url_hash: str) -> (int, dict):
         ).first()
     except Exception as exc:
         logger.error(
-            msg=f'Возникла ошибки при поиске пользователя с хэшем {url_hash} '
-                f'для потвреждения email: {exc}',
+            msg='Возникла ошибка при поиске пользователя по хэшу '
+                'для подтверждения email',
+            error=exc,
         )
         return 500, {}
 
     if user is None:
         logger.error(
-            msg=f'Не удалось найти пользователя с хэшем {url_hash} '
-                'для подтвреждения email',
+            msg='Не удалось найти пользователя по хэшу для подтверждения email',
         )
         return 404, {}
 
@@ -481,13 +513,15 @@ def confirm_email(url_hash: str) -> (int, dict):
         user.save()
     except Exception as exc:
         logger.error(
-            msg=f'Не удалось подтвердить email пользователя {user} '
-                f'с хэшем {url_hash}: {exc}',
+            msg='Не удалось подтвердить email пользователя',
+            user=user,
+            error=exc,
         )
         return 500, {}
 
     logger.info(
-        msg=f'Успешно подтвержден email пользователя {user}',
+        msg='Успешно подтвержден email пользователя',
+        user=user,
     )
     return 200, {}
 
@@ -509,11 +543,10 @@ def password_restore_request(data: QueryDict, host: str) -> (int, dict):
         200, {}
     '''
 
-    user_data = get_log_user_data(
-        user_data=dict(data),
-    )
+    email = data.get('email')
     logger.info(
-        msg=f'Запрос на восстановление пароля пользователя c данными {user_data}',
+        msg='Запрос на восстановление пароля пользователя',
+        email=email,
     )
 
     serializer = PasswordRestoreRequestSerializer(
@@ -521,8 +554,9 @@ def password_restore_request(data: QueryDict, host: str) -> (int, dict):
     )
     if not serializer.is_valid():
         logger.error(
-            msg='Невалидные данные для запроса на восстановление пароля '
-                f'пользователя c данными {user_data}: {serializer.errors}',
+            msg='Невалидные данные для запроса на восстановление пароля',
+            email=email,
+            errors=serializer.errors,
         )
         return 400, {}
 
@@ -533,15 +567,17 @@ def password_restore_request(data: QueryDict, host: str) -> (int, dict):
         ).first()
     except Exception as exc:
         logger.error(
-            msg=f'Возникла ошибка при поиске пользователя с данными {user_data} '
-                f'для запроса на восстановление пароля: {exc}',
+            msg='Возникла ошибка при поиске пользователя '
+                'для запроса на восстановление пароля',
+            email=email,
+            error=exc,
         )
         return 500, {}
 
     if user is None:
         logger.error(
-            msg='При запросе на восстановление пароля не найден '
-                f'пользователь с данными {user_data} '
+            msg='При запросе на восстановление пароля не найден пользователь',
+            email=email,
         )
         return 404, {}
 
@@ -552,13 +588,14 @@ def password_restore_request(data: QueryDict, host: str) -> (int, dict):
     )
     if status_code != 200:
         logger.error(
-            msg='Запрос на восстановление пароля пользователя '
-                f'с данными {user_data} не прошел',
+            msg='Запрос на восстановление пароля пользователя не прошел',
+            email=email,
+            status=status_code,
         )
     else:
         logger.info(
-            msg='Запрос на сброс пароля пользователя '
-                f'с данными {user_data} прошел успешно',
+            msg='Запрос на восстановление пароля пользователя прошел успешно',
+            email=email,
         )
     return status_code, {}
 
@@ -581,7 +618,7 @@ def password_restore(data: QueryDict, url_hash: str) -> (int, dict):
     '''
 
     logger.info(
-        msg=f'Восстановление пароля пользователя с хэшем: {url_hash}',
+        msg='Восстановление пароля пользователя по хэшу',
     )
 
     try:
@@ -590,14 +627,15 @@ def password_restore(data: QueryDict, url_hash: str) -> (int, dict):
         ).first()
     except Exception as exc:
         logger.error(
-            msg=f'Возникла ошибка при поиске пользователя с хэшем {url_hash} '
-                f'для восстановления пароля: {url_hash}'
+            msg='Возникла ошибка при поиске пользователя по хэшу '
+                'для восстановления пароля',
+            error=exc,
         )
         return 500, {}
 
     if user is None:
         logger.error(
-            msg=f'При восстановлении пароля не найден пользователь с хэшем: {url_hash}',
+            msg='При восстановлении пароля не найден пользователь по хэшу',
         )
         return 404, {}
 
@@ -606,8 +644,9 @@ def password_restore(data: QueryDict, url_hash: str) -> (int, dict):
     )
     if not serializer.is_valid():
         logger.error(
-            msg=f'Невалидные данные для восстановления пароля '
-                f'пользователя {user} c хэшем {url_hash}: {serializer.errors}',
+            msg='Невалидные данные для восстановления пароля пользователя',
+            user=user,
+            errors=serializer.errors,
         )
         return 400, {}
 
@@ -618,12 +657,15 @@ def password_restore(data: QueryDict, url_hash: str) -> (int, dict):
         user.save()
     except Exception as exc:
         logger.error(
-            msg=f'Не удалось восстановить пароль пользователя {user}: {exc}'
+            msg='Не удалось восстановить пароль пользователя',
+            user=user,
+            error=exc,
         )
         return 500, {}
 
     logger.info(
-        msg=f'Успешно восстановлен пароль пользователя {user}',
+        msg='Успешно восстановлен пароль пользователя',
+        user=user,
     )
     return 200, {}
 
@@ -645,14 +687,17 @@ def detail(user: CustomUser) -> (int, dict):
     '''
 
     logger.info(
-        msg=f'Получение данных пользователя {user}',
+        msg='Получение данных пользователя',
+        user=user,
     )
 
     response_data = DetailSerializer(
         instance=user,
     ).data
     logger.info(
-        msg=f'Данные пользователя {user} успешно получены: {response_data}',
+        msg='Данные пользователя успешно получены',
+        user=user,
+        data=response_data,
     )
     return 200, response_data
 
@@ -671,19 +716,23 @@ def remove(user: CustomUser) -> (int, dict):
 
     email = user.email
     logger.info(
-        msg=f'Удаление пользователя {email}',
+        msg='Удаление пользователя',
+        email=email,
     )
 
     try:
         user.delete()
     except Exception as exc:
         logger.error(
-            msg=f'Не удалось удалить пользователя {email}: {exc}',
+            msg='Не удалось удалить пользователя',
+            email=email,
+            error=exc,
         )
         return 500, {}
 
     logger.info(
-        msg=f'Успешное удален пользователь {email}',
+        msg='Успешно удален пользователь',
+        email=email,
     )
     return 200, {}
 
@@ -711,7 +760,8 @@ def change_password(data: QueryDict, user: CustomUser) -> (int, dict):
     '''
 
     logger.info(
-        msg=f'Смена пароля пользователя {user}',
+        msg='Смена пароля пользователя',
+        user=user,
     )
 
     serializer = ChangePasswordSerializer(
@@ -720,8 +770,9 @@ def change_password(data: QueryDict, user: CustomUser) -> (int, dict):
     )
     if not serializer.is_valid():
         logger.error(
-            msg=f'Невалидные данные для смены пароля пользователя {user}: '
-                f'{serializer.errors}',
+            msg='Невалидные данные для смены пароля пользователя',
+            user=user,
+            errors=serializer.errors,
         )
         return 400, {}
 
@@ -733,12 +784,15 @@ def change_password(data: QueryDict, user: CustomUser) -> (int, dict):
         )
     except Exception as exc:
         logger.error(
-            msg=f'Не удалось сменить пароль пользователя {user}: {exc}',
+            msg='Не удалось сменить пароль пользователя',
+            user=user,
+            error=exc,
         )
         return 500, {}
 
     logger.info(
-        msg=f'Успешно изменен пароль пользователя {user}',
+        msg='Успешно изменен пароль пользователя',
+        user=user,
     )
     response_data = DetailSerializer(
         instance=user,
@@ -748,7 +802,7 @@ def change_password(data: QueryDict, user: CustomUser) -> (int, dict):
 
 def send_user_email(user: CustomUser, email_type: str, host: str) -> int:
     '''
-    Отправка письма по типу
+    Постановка письма по типу в очередь на отправку
 
     Args:
         user: пользователь
@@ -761,38 +815,43 @@ def send_user_email(user: CustomUser, email_type: str, host: str) -> int:
     '''
 
     logger.info(
-        msg='Получение данных для формирования текста '
-            f'письма {email_type} пользователю {user}',
+        msg='Получение данных для формирования текста письма',
+        email_type=email_type,
+        user=user,
     )
 
     url_hash = str(uuid.uuid4())
+    path = reverse(email_type, args=(url_hash,))
+    url = f'{SITE_PROTOCOL}://{host}{path}'
+    mail_data = {
+        'url': url,
+    }
+
     user.url_hash = url_hash
     try:
-        user.save()
+        with transaction.atomic():
+            user.save()
     except Exception as exc:
         logger.error(
-            msg=f'Не удалось получить данные для формирования текста письма {email_type} '
-                f'пользователю {user}: {exc}',
+            msg='Не удалось получить данные для формирования текста письма',
+            email_type=email_type,
+            user=user,
+            error=exc,
         )
         return 500
 
-    path = reverse(email_type, args=(user.url_hash,))
-    url = f'{SITE_PROTOCOL}://{host}{path}'
-    mail_data = {
-        'url': url,
-    }
-
+    # ссылка с хэшем в лог не пишется
     logger.info(
-        msg=f'Данные для формирования текста письма {email_type} '
-            f'пользователю {user} получены: {mail_data}',
+        msg='Данные для формирования текста письма получены',
+        email_type=email_type,
+        user=user,
     )
 
-    email = Email(
+    status = queue_email(
         email_type=email_type,
         mail_data=mail_data,
-        recipient=user,
+        recipient=user.email,
     )
-    status = email.send()
     return status
 
 
@@ -811,8 +870,8 @@ def confirm_email_request(user: CustomUser, host: str) -> (int, dict):
     '''
 
     logger.info(
-        msg=f'Запрос на отправку письма для подтверждения email '
-            f'пользователя {user}',
+        msg='Запрос на отправку письма для подтверждения email пользователя',
+        user=user,
     )
 
     status_code = send_user_email(
@@ -823,11 +882,14 @@ def confirm_email_request(user: CustomUser, host: str) -> (int, dict):
     if status_code != 200:
         logger.error(
             msg='Запрос на отправку письма для подтверждения email '
-                f'пользователя {user} не прошел',
+                'пользователя не прошел',
+            user=user,
+            status=status_code,
         )
     else:
         logger.info(
             msg='Запрос на отправку письма для подтверждения email '
-                f'пользователя {user} прошел успешно',
+                'пользователя прошел успешно',
+            user=user,
         )
     return status_code, {}
@@ -0,0 +1,159 @@
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users.models import CustomUser
+from users.services import (
+    register,
+    auth,
+    refresh_token,
+    logout,
+    confirm_email,
+    password_restore_request,
+    password_restore,
+    detail,
+    remove,
+    change_password,
+    confirm_email_request,
+)
+
+from utils.testing import (
+    Budget,
+    BudgetMixin,
+)
+
+
+HOST = 'testserver'
+URL_HASH = 'fc0ecf9c-4c37-4bb2-8c22-938a1dc65da4'
+
+
+@patch('users.services.send_user_email', return_value=200)
+class TestBudgets(BudgetMixin, TestCase):
+    budgets = {
+        'register': Budget(queries=4),
+        'auth': Budget(queries=2),
+        'refresh_token': Budget(queries=2),
+        'logout': Budget(queries=6),
+        'confirm_email': Budget(queries=2),
+        'password_restore_request': Budget(queries=1),
+        'password_restore': Budget(queries=2),
+        'detail': Budget(queries=0),
+        'remove': Budget(queries=7),
+        'change_password': Budget(queries=1),
+        'confirm_email_request': Budget(queries=0),
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email='test@cc.com',
+            password='test123',
+            url_hash=URL_HASH,
+        )
+
+    def test_register(self, mock_send_user_email):
+        with self.assertBudget('register'):
+            status_code, response_data = register(
+                data={
+                    'email': 'test_new@cc.com',
+                    'password': 'test123',
+                    'confirm_password': 'test123',
+                },
+                host=HOST,
+            )
+        self.assertEqual(status_code, 200)
+
+    def test_auth(self, mock_send_user_email):
+        with self.assertBudget('auth'):
+            status_code, response_data = auth(
+                data={
+                    'email': 'test@cc.com',
+                    'password': 'test123',
+                },
+            )
+        self.assertEqual(status_code, 200)
+
+    def test_refresh_token(self, mock_send_user_email):
+        token = RefreshToken.for_user(
+            user=self.user,
+        )
+
+        with self.assertBudget('refresh_token'):
+            status_code, response_data = refresh_token(
+                data={'refresh': str(token)},
+            )
+        self.assertEqual(status_code, 200)
+
+    def test_logout(self, mock_send_user_email):
+        token = RefreshToken.for_user(
+            user=self.user,
+        )
+
+        with self.assertBudget('logout'):
+            status_code, response_data = logout(
+                data={'refresh': str(token)},
+                user=self.user,
+            )
+        self.assertEqual(status_code, 200)
+
+    def test_confirm_email(self, mock_send_user_email):
+        with self.assertBudget('confirm_email'):
+            status_code, response_data = confirm_email(
+                url_hash=URL_HASH,
+            )
+        self.assertEqual(status_code, 200)
+
+    def test_password_restore_request(self, mock_send_user_email):
+        with self.assertBudget('password_restore_request'):
+            status_code, response_data = password_restore_request(
+                data={'email': 'test@cc.com'},
+                host=HOST,
+            )
+        self.assertEqual(status_code, 200)
+
+    def test_password_restore(self, mock_send_user_email):
+        with self.assertBudget('password_restore'):
+            status_code, response_data = password_restore(
+                data={
+                    'new_password': 'new_password123',
+                    'confirm_password': 'new_password123',
+                },
+                url_hash=URL_HASH,
+            )
+        self.assertEqual(status_code, 200)
+
+    def test_detail(self, mock_send_user_email):
+        with self.assertBudget('detail'):
+            status_code, response_data = detail(
+                user=self.user,
+            )
+        self.assertEqual(status_code, 200)
+
+    def test_remove(self, mock_send_user_email):
+        with self.assertBudget('remove'):
+            status_code, response_data = remove(
+                user=self.user,
+            )
+        self.assertEqual(status_code, 200)
+
+    def test_change_password(self, mock_send_user_email):
+        with self.assertBudget('change_password'):
+            status_code, response_data = change_password(
+                data={
+                    'old_password': 'test123',
+                    'new_password': 'new_password123',
+                    'confirm_password': 'new_password123',
+                },
+                user=self.user,
+            )
+        self.assertEqual(status_code, 200)
+
+    def test_confirm_email_request(self, mock_send_user_email):
+        with self.assertBudget('confirm_email_request'):
+            status_code, response_data = confirm_email_request(
+                user=self.user,
+                host=HOST,
+            )
+        self.assertEqual(status_code, 200)
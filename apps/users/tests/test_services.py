@@ -58,11 +58,28 @@ class ServicesTest(TestCase):
             with open(f'{path}/{fixture}_request.json') as file:
                 data = json.load(file)
 
-            status_code, response_data = register(
-                data=data,
-                host=host,
-            )
+            with self.assertLogs('users.services', level='INFO') as logs:
+                status_code, response_data = register(
+                    data=data,
+                    host=host,
+                )
             self.assertEqual(status_code, code, msg=fixture)
+            self.assertNotIn('test123', '\n'.join(logs.output), msg=fixture)
+
+    @patch('users.services.queue_email', return_value=500)
+    def test_register_queue_error(self, mock_queue_email):
+        status_code, response_data = register(
+            data={
+                'email': 'test_new@cc.com',
+                'password': 'test123',
+                'confirm_password': 'test123',
+            },
+            host='testserver',
+        )
+
+        self.assertEqual(status_code, 500)
+        mock_queue_email.assert_called_once()
+        self.assertFalse(CustomUser.objects.filter(email='test_new@cc.com').exists())
 
     def test_auth(self):
         path = f'{self.path}/auth'
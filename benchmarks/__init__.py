@@ -0,0 +1,16 @@
+import os
+
+import django
+
+
+def setup() -> None:
+    '''
+    Настройка django для запуска бенчмарков из корня проекта
+    python -m benchmarks.<name>
+
+    Returns:
+        None
+    '''
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    django.setup()
@@ -0,0 +1,401 @@
+'''
+Заглушка платежной системы для бенчмарков
+
+Реализует запросы, которые отправляет Payment.make_request:
+    PUT /sites/{id}/bills/{bill_id}/
+    GET /sites/{id}/bills/{bill_id}/details/
+    GET /sites/{id}/payments/{payment_id}/
+    PUT /sites/{id}/payments/{payment_id}/refunds/{refund_id}/
+    GET /sites/{id}/payments/{payment_id}/refunds/{refund_id}/
+    GET /stats/ - количество запросов и ответов по эндпоинтам
+
+Статусы меняются по количеству опросов: счет в WAITING первые
+--bill-waiting-polls запросов деталей, затем PAID. Платеж и возврат
+в WAITING первые --payment-waiting-polls/--refund-waiting-polls
+запросов, затем COMPLETED или DECLINED с вероятностью --decline-rate.
+Неизвестные id получают ответ 500 {"message": "Not found"}, как
+у платежной системы
+
+Задержка задается распределением в мс для всех или отдельных эндпоинтов:
+    fixed:50, uniform:20:80, normal:50:10, lognormal:3.9:0.5, exponential:50
+
+python -m benchmarks.acquiring_stub --port 8010 --latency normal:80:20 \
+    --endpoint-latency payment=uniform:200:400 --error-rate 0.05 --seed 1
+PAYMENT_HOST=http://127.0.0.1:8010 PAYMENT_SITE_ID=bench
+'''
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import (
+    BaseHTTPRequestHandler,
+    ThreadingHTTPServer,
+)
+
+
+class Latency:
+    '''
+    Распределение задержки ответа в мс
+    '''
+
+    distributions = {
+        'fixed': lambda rng, value: value,
+        'uniform': lambda rng, low, high: rng.uniform(low, high),
+        'normal': lambda rng, mu, sigma: rng.gauss(mu, sigma),
+        'lognormal': lambda rng, mu, sigma: rng.lognormvariate(mu, sigma),
+        'exponential': lambda rng, mean: rng.expovariate(1 / mean),
+    }
+
+    def __init__(self, spec: str):
+        '''
+        Args:
+            spec: распределение и его параметры
+                "uniform:20:80"
+        '''
+
+        name, *params = spec.split(':')
+        if name not in self.distributions:
+            raise ValueError(f'Неизвестное распределение задержки {name}')
+        self.spec = spec
+        self.name = name
+        self.params = [float(param) for param in params]
+
+    def sample(self, rng: random.Random) -> float:
+        return max(self.distributions[self.name](rng, *self.params), 0) / 1000
+
+
+class Operation:
+    '''
+    Счет, платеж или возврат со статусом, который меняется по опросам
+    '''
+
+    __slots__ = ('polls', 'waiting_polls', 'final_status', 'data')
+
+    def __init__(self, waiting_polls: int, final_status: str, data: dict = None):
+        self.polls = 0
+        self.waiting_polls = waiting_polls
+        self.final_status = final_status
+        self.data = data or {}
+
+    def poll(self) -> str:
+        self.polls += 1
+        if self.polls <= self.waiting_polls:
+            return 'WAITING'
+        return self.final_status
+
+
+class AcquiringHandler(BaseHTTPRequestHandler):
+    routes = (
+        ('PUT', re.compile(r'^/sites/[^/]+/bills/(?P<bill_id>[^/]+)/$'), 'create_bill'),
+        ('GET', re.compile(r'^/sites/[^/]+/bills/(?P<bill_id>[^/]+)/details/$'), 'bill_details'),
+        ('GET', re.compile(r'^/sites/[^/]+/payments/(?P<payment_id>[^/]+)/$'), 'payment'),
+        (
+            'PUT',
+            re.compile(r'^/sites/[^/]+/payments/(?P<payment_id>[^/]+)/refunds/(?P<refund_id>[^/]+)/$'),
+            'create_refund',
+        ),
+        (
+            'GET',
+            re.compile(r'^/sites/[^/]+/payments/(?P<payment_id>[^/]+)/refunds/(?P<refund_id>[^/]+)/$'),
+            'refund',
+        ),
+        ('GET', re.compile(r'^/stats/$'), 'stats'),
+    )
+
+    def do_GET(self):
+        self.dispatch(method='GET')
+
+    def do_PUT(self):
+        self.dispatch(method='PUT')
+
+    def dispatch(self, method: str) -> None:
+        for route_method, pattern, name in self.routes:
+            match = pattern.match(self.path)
+            if route_method == method and match:
+                break
+        else:
+            self.send_json(status=500, data={'message': 'Not found'})
+            return
+
+        if name == 'stats':
+            self.send_json(status=200, data=self.server.get_stats())
+            return
+
+        self.server.delay(endpoint=name)
+        if self.server.inject_error():
+            status, data = 500, {'message': 'Internal server error'}
+        else:
+            with self.server.lock:
+                status, data = getattr(self, name)(**match.groupdict())
+        self.server.count(endpoint=name, status=status)
+        self.send_json(status=status, data=data)
+
+    def read_json(self) -> dict:
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length))
+
+    def send_json(self, status: int, data: dict) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def not_found(self) -> (int, dict):
+        # платежная система отвечает на неизвестные id кодом 500
+        return 500, {'message': 'Not found'}
+
+    def create_bill(self, bill_id: str) -> (int, dict):
+        data = self.read_json()
+        payment_id = str(uuid.uuid4())
+        self.server.bills[bill_id] = Operation(
+            waiting_polls=self.server.bill_waiting_polls,
+            final_status='PAID',
+            data={'payment_id': payment_id},
+        )
+        self.server.payments[payment_id] = Operation(
+            waiting_polls=self.server.payment_waiting_polls,
+            final_status=self.server.get_final_status(),
+            data={'amount': data.get('amount')},
+        )
+        return 200, {
+            'billId': bill_id,
+            'amount': data.get('amount'),
+            'status': {'value': 'WAITING'},
+            'payUrl': f'{self.server.url}/pay/{bill_id}',
+        }
+
+    def bill_details(self, bill_id: str) -> (int, dict):
+        bill = self.server.bills.get(bill_id)
+        if bill is None:
+            return self.not_found()
+
+        bill_status = bill.poll()
+        data = {
+            'billId': bill_id,
+            'status': {'value': bill_status},
+        }
+        if bill_status == 'PAID':
+            payment_id = bill.data['payment_id']
+            data['payments'] = [
+                {
+                    'paymentId': payment_id,
+                    'status': {'value': self.server.payments[payment_id].poll()},
+                },
+            ]
+        return 200, data
+
+    def payment(self, payment_id: str) -> (int, dict):
+        payment = self.server.payments.get(payment_id)
+        if payment is None:
+            return self.not_found()
+
+        return 200, {
+            'paymentId': payment_id,
+            'amount': payment.data['amount'],
+            'status': {'value': payment.poll()},
+        }
+
+    def create_refund(self, payment_id: str, refund_id: str) -> (int, dict):
+        data = self.read_json()
+        if payment_id not in self.server.payments:
+            return self.not_found()
+
+        refund = Operation(
+            waiting_polls=self.server.refund_waiting_polls,
+            final_status=self.server.get_final_status(),
+        )
+        self.server.refunds[(payment_id, refund_id)] = refund
+        return 200, {
+            'refundId': refund_id,
+            'amount': data.get('amount'),
+            'status': {'value': refund.poll()},
+        }
+
+    def refund(self, payment_id: str, refund_id: str) -> (int, dict):
+        refund = self.server.refunds.get((payment_id, refund_id))
+        if refund is None:
+            return self.not_found()
+
+        return 200, {
+            'refundId': refund_id,
+            'status': {'value': refund.poll()},
+        }
+
+    def log_message(self, format, *args):
+        pass
+
+
+class AcquiringStub(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+            self,
+            host: str = '127.0.0.1',
+            port: int = 0,
+            latency: str = 'fixed:0',
+            endpoint_latency: dict = None,
+            error_rate: float = 0,
+            decline_rate: float = 0,
+            bill_waiting_polls: int = 0,
+            payment_waiting_polls: int = 1,
+            refund_waiting_polls: int = 1,
+            seed: int = None,
+    ):
+        '''
+        Args:
+            host: адрес сервера
+            port: порт сервера, 0 - свободный порт
+            latency: распределение задержки всех эндпоинтов
+                "normal:50:10"
+            endpoint_latency: распределения задержки отдельных эндпоинтов
+                {"payment": "uniform:200:400"}
+            error_rate: доля ответов 500 Internal server error
+            decline_rate: доля платежей и возвратов в статусе DECLINED
+            bill_waiting_polls: количество запросов деталей счета в WAITING
+            payment_waiting_polls: количество опросов платежа в WAITING,
+                включая детали счета
+            refund_waiting_polls: количество опросов возврата в WAITING,
+                включая создание
+            seed: начальное значение генератора случайных чисел
+        '''
+
+        super().__init__((host, port), AcquiringHandler)
+        self.latency = Latency(latency)
+        self.endpoint_latency = {
+            endpoint: Latency(spec)
+            for endpoint, spec in (endpoint_latency or {}).items()
+        }
+        self.error_rate = error_rate
+        self.decline_rate = decline_rate
+        self.bill_waiting_polls = bill_waiting_polls
+        self.payment_waiting_polls = payment_waiting_polls
+        self.refund_waiting_polls = refund_waiting_polls
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.bills = {}
+        self.payments = {}
+        self.refunds = {}
+        self.requests = Counter()
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def random(self) -> float:
+        with self.lock:
+            return self.rng.random()
+
+    def delay(self, endpoint: str) -> None:
+        latency = self.endpoint_latency.get(endpoint, self.latency)
+        with self.lock:
+            seconds = latency.sample(self.rng)
+        if seconds:
+            time.sleep(seconds)
+
+    def inject_error(self) -> bool:
+        return bool(self.error_rate) and self.random() < self.error_rate
+
+    def get_final_status(self) -> str:
+        if self.decline_rate and self.rng.random() < self.decline_rate:
+            return 'DECLINED'
+        return 'COMPLETED'
+
+    def count(self, endpoint: str, status: int) -> None:
+        with self.lock:
+            self.requests[(endpoint, status)] += 1
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            requests = {}
+            for (endpoint, status), count in self.requests.items():
+                requests.setdefault(endpoint, {})[str(status)] = count
+            return {
+                'requests': requests,
+                'bills': len(self.bills),
+                'payments': len(self.payments),
+                'refunds': len(self.refunds),
+            }
+
+    def start(self) -> 'AcquiringStub':
+        '''
+        Запуск сервера в фоновом потоке
+
+        Returns:
+            Объект AcquiringStub
+        '''
+
+        self.thread = threading.Thread(
+            target=self.serve_forever,
+            name='acquiring-stub',
+            daemon=True,
+        )
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def parse_endpoint_latency(values: list) -> dict:
+    endpoint_latency = {}
+    for value in values:
+        endpoint, spec = value.split('=', 1)
+        endpoint_latency[endpoint] = spec
+    return endpoint_latency
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8010)
+    parser.add_argument('--latency', default='fixed:0')
+    parser.add_argument(
+        '--endpoint-latency',
+        nargs='*',
+        default=[],
+        help='create_bill, bill_details, payment, create_refund, refund: '
+             'payment=uniform:200:400',
+    )
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--decline-rate', type=float, default=0)
+    parser.add_argument('--bill-waiting-polls', type=int, default=0)
+    parser.add_argument('--payment-waiting-polls', type=int, default=1)
+    parser.add_argument('--refund-waiting-polls', type=int, default=1)
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    stub = AcquiringStub(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        endpoint_latency=parse_endpoint_latency(args.endpoint_latency),
+        error_rate=args.error_rate,
+        decline_rate=args.decline_rate,
+        bill_waiting_polls=args.bill_waiting_polls,
+        payment_waiting_polls=args.payment_waiting_polls,
+        refund_waiting_polls=args.refund_waiting_polls,
+        seed=args.seed,
+    )
+    print(f'Заглушка платежной системы: {stub.url}')
+    try:
+        stub.serve_forever()
+    except KeyboardInterrupt:
+        stub.server_close()
+
+
+if __name__ == '__main__':
+    main()
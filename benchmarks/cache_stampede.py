@@ -0,0 +1,216 @@
+'''
+Бенчмарк промаха кэша настроек под нагрузкой
+
+Несколько потоков одновременно читают ticket_settings сразу после
+удаления ключа из redis, как после истечения TTL или сохранения настроек.
+Сравниваются режимы:
+
+    plain - прежний redis_cache.get: каждый поток при промахе идет в базу
+    single_flight - в базу идет один поток, остальные ждут значение в redis
+    local - single_flight и кэш процесса REDIS_LOCAL_TIMEOUT
+
+--db-delay добавляет задержку к запросам к tickets_settings, имитируя
+нагруженную базу. Результат в JSON: задержки p50/p99 в мс и суммарное
+количество запросов к базе и команд redis на один промах
+
+LOG_LEVEL=WARNING python -m benchmarks.cache_stampede --threads 32 \
+    --storms 20 --db-delay 20
+'''
+import argparse
+import json
+import statistics
+import threading
+import time
+
+from benchmarks import setup
+
+
+KEY = 'ticket_settings'
+MODES = ('plain', 'single_flight', 'local')
+
+
+def percentile(values: list, percent: int) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[percent - 1]
+
+
+def get_plain() -> (int, dict):
+    '''
+    Промах redis_cache.get без защиты от одновременной загрузки
+    '''
+
+    from django.forms import model_to_dict
+
+    from tickets.models import TicketSettings
+
+    from utils import redis_cache
+
+    data = redis_cache.redis_client.get(name=KEY)
+    if data is not None:
+        return 200, json.loads(s=data)
+
+    data, created = TicketSettings.objects.get_or_create(pk=1)
+    data = model_to_dict(data)
+    redis_cache.set_key(key=KEY, data=data, time=60*60)
+    return 200, data
+
+
+def get_single_flight(local_timeout: float = None) -> (int, dict):
+    from tickets.models import TicketSettings
+
+    from utils import redis_cache
+
+    return redis_cache.get(
+        key=KEY,
+        model=TicketSettings,
+        timeout=60*60,
+        local_timeout=local_timeout,
+        pk=1,
+    )
+
+
+def run_mode(mode: str, threads: int, storms: int, reads: int, db_delay: float) -> dict:
+    '''
+    Серия промахов: перед каждым ключ удаляется, и все потоки
+    по сигналу барьера читают настройки reads раз
+
+    Args:
+        mode: plain, single_flight или local
+        threads: количество потоков
+        storms: количество промахов
+        reads: количество чтений потока за промах
+        db_delay: задержка запросов к настройкам в секундах
+
+    Returns:
+        Словарь результатов
+    '''
+
+    from django.db import connections
+
+    from config.settings import REDIS_LOCAL_TIMEOUT
+    from utils import redis_cache
+    from utils.timing import measure
+
+    def slow_query(execute, sql, params, many, context):
+        if db_delay and 'tickets_settings' in sql:
+            time.sleep(db_delay)
+        return execute(sql, params, many, context)
+
+    if mode == 'plain':
+        operation = get_plain
+    elif mode == 'local':
+        operation = lambda: get_single_flight(local_timeout=REDIS_LOCAL_TIMEOUT)  # noqa: E731
+    else:
+        operation = get_single_flight
+
+    barrier = threading.Barrier(threads, action=lambda: redis_cache.delete(key=KEY))
+    lock = threading.Lock()
+    latencies = []
+    counts = {'db': 0, 'redis': 0}
+    errors = []
+
+    def worker():
+        try:
+            for _ in range(storms):
+                barrier.wait()
+                with connections['default'].execute_wrapper(slow_query), measure() as timing:
+                    for _ in range(reads):
+                        started_at = time.perf_counter()
+                        status, data = operation()
+                        latency = time.perf_counter() - started_at
+                        if status != 200:
+                            errors.append(status)
+                        with lock:
+                            latencies.append(latency * 1000)
+                with lock:
+                    counts['db'] += timing.counts['db']
+                    counts['redis'] += timing.counts['redis']
+        finally:
+            connections.close_all()
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    started_at = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    duration = time.perf_counter() - started_at
+
+    return {
+        'mode': mode,
+        'threads': threads,
+        'storms': storms,
+        'reads': reads,
+        'errors': len(errors),
+        'duration': round(duration, 4),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'max_ms': round(max(latencies), 2),
+        'db_queries_per_storm': round(counts['db'] / storms, 1),
+        'redis_commands_per_storm': round(counts['redis'] / storms, 1),
+    }
+
+
+def run(threads: int, storms: int, reads: int, db_delay: float, modes: list) -> dict:
+    from django.db import connection
+    from django.test.utils import (
+        setup_test_environment,
+        teardown_test_environment,
+    )
+
+    from tickets.models import TicketSettings
+
+    from utils import redis_cache
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+    results = []
+    try:
+        TicketSettings.get_solo()
+        for mode in modes:
+            redis_cache._local_cache.clear()
+            results.append(run_mode(
+                mode=mode,
+                threads=threads,
+                storms=storms,
+                reads=reads,
+                db_delay=db_delay / 1000,
+            ))
+    finally:
+        redis_cache.delete(key=KEY)
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+    return {
+        'db_delay_ms': db_delay,
+        'results': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--storms', type=int, default=20)
+    parser.add_argument('--reads', type=int, default=5,
+                        help='Количество чтений потока за промах')
+    parser.add_argument('--db-delay', type=float, default=20,
+                        help='Задержка запросов к настройкам в мс')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    args = parser.parse_args()
+
+    setup()
+    report = run(
+        threads=args.threads,
+        storms=args.storms,
+        reads=args.reads,
+        db_delay=args.db_delay,
+        modes=args.modes,
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
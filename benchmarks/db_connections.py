@@ -0,0 +1,67 @@
+'''
+Бенчмарк переиспользования соединений с базой
+
+Имитирует короткие запросы/задачи celery: request_started -> SELECT 1 ->
+request_finished, как это делают django и celery, и сравнивает
+CONN_MAX_AGE=0 с постоянными соединениями
+
+python -m benchmarks.db_connections --requests 500 --max-age 0 60
+'''
+import argparse
+import json
+import time
+
+from benchmarks import setup
+
+
+def run(requests: int, max_age: int | None) -> dict:
+    from django.core.signals import (
+        request_started,
+        request_finished,
+    )
+    from django.db import connection
+    from django.db.backends.signals import connection_created
+
+    opened = []
+
+    def on_connection_created(sender, connection, **kwargs):
+        opened.append(connection.alias)
+
+    connection.close()
+    connection.settings_dict['CONN_MAX_AGE'] = max_age
+    connection_created.connect(on_connection_created)
+    try:
+        started_at = time.perf_counter()
+        for _ in range(requests):
+            request_started.send(sender=None)
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            request_finished.send(sender=None)
+        duration = time.perf_counter() - started_at
+    finally:
+        connection_created.disconnect(on_connection_created)
+        connection.close()
+
+    return {
+        'conn_max_age': max_age,
+        'requests': requests,
+        'connections_opened': len(opened),
+        'duration': round(duration, 4),
+        'requests_per_second': round(requests / duration, 1),
+        'connections_per_second': round(len(opened) / duration, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--max-age', type=int, nargs='+', default=[0, 60])
+    args = parser.parse_args()
+
+    setup()
+    results = [run(requests=args.requests, max_age=max_age) for max_age in args.max_age]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
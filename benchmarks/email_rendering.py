@@ -0,0 +1,110 @@
+'''
+Микробенчмарк рендеринга писем-оповещений
+
+Пачка оповещений из outbox: один шаблон, общие данные мероприятия и персональные
+данные каждого получателя. Сравнивает str.format сырого текста на каждое
+письмо, с построением HTML версии шаблона и экранированием данных заново,
+с рендерингом CompiledEmail: HTML версия строится из готового текста,
+либо из html_message шаблоном django
+
+python -m benchmarks.email_rendering --recipients 10000
+'''
+import argparse
+import json
+import time
+
+from benchmarks import setup
+
+
+SUBJECT = 'Мероприятие {event_name} через 3 дня'
+MESSAGE = (
+    'Здравствуйте, {email}!\n'
+    'Напоминаем, что мероприятие {event_name} начнется {datetime}.\n'
+    'Ваш билет: {url}'
+)
+HTML_MESSAGE = (
+    '<p>Здравствуйте, {{ email }}!</p>'
+    '<p>Напоминаем, что мероприятие {{ event_name }} начнется {{ datetime }}.</p>'
+    '<p>Ваш билет: <a href="{{ url }}">{{ url }}</a></p>'
+)
+
+
+def render_format(mail_data: dict, recipients: list) -> list:
+    from html import escape
+
+    result = []
+    for email in recipients:
+        data = dict(mail_data, email=email)
+        # без компиляции HTML версия шаблона и экранированные данные
+        # готовятся заново для каждого письма
+        html_template = escape(MESSAGE).replace('\n', '<br>\n')
+        html_data = {key: escape(str(value)) for key, value in data.items()}
+        result.append({
+            'subject': SUBJECT.format_map(data),
+            'message': MESSAGE.format_map(data),
+            'html_message': html_template.format_map(html_data),
+        })
+    return result
+
+
+def render_compiled(mail_data: dict, recipients: list, html_message: str = '') -> list:
+    from notifications.models import EmailTemplate
+    from notifications.rendering import CompiledEmail
+
+    mail = CompiledEmail(template=EmailTemplate(
+        email_type='notify_3_days',
+        subject=SUBJECT,
+        message=MESSAGE,
+        html_message=html_message,
+    ))
+    return [
+        mail.render(mail_data=mail_data, personal_data={'email': email})
+        for email in recipients
+    ]
+
+
+def render_django_html(mail_data: dict, recipients: list) -> list:
+    return render_compiled(
+        mail_data=mail_data,
+        recipients=recipients,
+        html_message=HTML_MESSAGE,
+    )
+
+
+def run(render, recipients: int) -> dict:
+    mail_data = {
+        'event_name': 'Rock & Roll',
+        'datetime': '2026-10-22 19:00',
+        'url': 'http://127.0.0.1:8000/api/v1/tickets/',
+    }
+    recipient_list = [f'user{index}@cc.com' for index in range(recipients)]
+
+    started_at = time.perf_counter()
+    result = render(mail_data=mail_data, recipients=recipient_list)
+    duration = time.perf_counter() - started_at
+
+    return {
+        'renderer': render.__name__,
+        'recipients': recipients,
+        'last_html_message': result[-1]['html_message'],
+        'duration': round(duration, 4),
+        'renders_per_second': round(recipients / duration, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--recipients', type=int, default=10000)
+    args = parser.parse_args()
+
+    setup()
+    results = [
+        run(render=render_format, recipients=args.recipients),
+        run(render=render_compiled, recipients=args.recipients),
+        run(render=render_django_html, recipients=args.recipients),
+    ]
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+'''
+Микробенчмарк CustomFormatter
+
+Сравнивает прежнее получение иерархии функции через inspect.stack()
+с обходом кадров через sys._getframe. Записи форматируются из вложенных
+вызовов, как в сервисах
+
+python -m benchmarks.logger_formatter --records 5000
+'''
+import argparse
+import inspect
+import io
+import json
+import logging
+import time
+
+from utils.logger import CustomFormatter
+
+
+FORMAT = '%(asctime)s %(levelname)s %(message)s %(name)s.%(funcName)s %(func_hierarchy)s'
+
+
+class InspectFormatter(CustomFormatter):
+
+    def get_func_hierarchy(self, record) -> str:
+        stack = inspect.stack()
+
+        record_file = record.pathname
+
+        for frame in stack[1:]:
+            if frame.filename == record_file:
+                function_name = frame.function
+                if function_name != record.funcName:
+                    return function_name
+        return ""
+
+
+def log_record(logger: logging.Logger) -> None:
+    logger.info('Получение данных из redis по ключу %s', 'ticket_settings')
+
+
+def service(logger: logging.Logger, records: int) -> None:
+    for _ in range(records):
+        log_record(logger)
+
+
+def run(formatter: logging.Formatter, records: int) -> dict:
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(formatter)
+    logger = logging.getLogger(f'benchmarks.{type(formatter).__name__}')
+    logger.handlers = [handler]
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+
+    started_at = time.perf_counter()
+    service(logger=logger, records=records)
+    duration = time.perf_counter() - started_at
+
+    return {
+        'formatter': type(formatter).__name__,
+        'hierarchy_level': logging.getLevelName(formatter.hierarchy_level),
+        'records': records,
+        'last_record': stream.getvalue().splitlines()[-1],
+        'duration': round(duration, 4),
+        'records_per_second': round(records / duration, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--records', type=int, default=5000)
+    args = parser.parse_args()
+
+    results = [
+        run(formatter=InspectFormatter(FORMAT), records=args.records),
+        run(formatter=CustomFormatter(FORMAT), records=args.records),
+        run(
+            formatter=CustomFormatter(FORMAT, hierarchy_level=logging.ERROR),
+            records=args.records,
+        ),
+    ]
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+'''
+Бенчмарк каналов доставки писем-оповещений
+
+Одна кампания напоминаний: письма рендерятся заранее из скомпилированного
+шаблона, затем отправляются пачками через каждый канал. Для smtp и http
+поднимаются локальные приемники, поэтому бенчмарк работает без сети и
+показывает накладные расходы протокола и сериализации, а не провайдера
+
+python -m benchmarks.notification_channels --messages 5000 --channels smtp http file
+'''
+import argparse
+import json
+import os
+import socketserver
+import tempfile
+import threading
+import time
+from http.server import (
+    BaseHTTPRequestHandler,
+    ThreadingHTTPServer,
+)
+
+from benchmarks import setup
+
+
+class SmtpSinkHandler(socketserver.StreamRequestHandler):
+    '''
+    Минимальный SMTP сервер, принимающий и отбрасывающий письма
+    '''
+
+    disable_nagle_algorithm = True
+
+    def reply(self, line: str) -> None:
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.reply('220 benchmark ESMTP')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+
+            command = line[:4].upper()
+            if command == b'EHLO':
+                self.reply('250-benchmark')
+                self.reply('250 8BITMIME')
+            elif command == b'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                self.reply('250 OK')
+            elif command == b'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class SmtpSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class HttpSinkHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server(server) -> threading.Thread:
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return thread
+
+
+def build_messages(count: int) -> list:
+    from notifications.models import EmailTemplate
+    from notifications.rendering import CompiledEmail
+    from notifications.services import Email
+
+    mail_data = {
+        'event_name': 'Rock & Roll',
+        'datetime': '2026-10-22 19:00',
+        'url': 'http://127.0.0.1:8000/api/v1/events/rock-and-roll/',
+    }
+    mail = CompiledEmail(template=EmailTemplate(
+        email_type='notify_3_days',
+        subject='Мероприятие {event_name} через 3 дня',
+        message='Напоминаем, что {event_name} начнется {datetime}.\nВаши места: {seats}\n{url}',
+    ))
+    email = Email(email_type='notify_3_days', mail_data=mail_data, recipient=[])
+    return [
+        email.build_message(
+            email_text=mail.render(
+                mail_data=mail_data,
+                personal_data={'email': f'user{index}@cc.com', 'seats': f'место {index}'},
+            ),
+            to=[f'user{index}@cc.com'],
+        )
+        for index in range(count)
+    ]
+
+
+def run(channel, messages: list, batch_size: int = None) -> dict:
+    batch_size = batch_size or channel.batch_size
+    sent = 0
+    started_at = time.perf_counter()
+    channel.open()
+    try:
+        for start in range(0, len(messages), batch_size):
+            sent += channel.send_messages(messages[start:start + batch_size])
+    finally:
+        channel.close()
+    duration = time.perf_counter() - started_at
+
+    return {
+        'channel': channel.name,
+        'batch_size': batch_size,
+        'messages': sent,
+        'duration': round(duration, 4),
+        'messages_per_second': round(sent / duration, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--messages', type=int, default=5000)
+    parser.add_argument('--channels', nargs='+', default=['smtp', 'http', 'file'])
+    parser.add_argument('--batch-size', type=int, help='Размер пачки вместо размера канала')
+    args = parser.parse_args()
+
+    setup()
+    from notifications.channels import (
+        FileChannel,
+        HttpChannel,
+        SmtpChannel,
+    )
+
+    messages = build_messages(count=args.messages)
+    results = []
+    for name in args.channels:
+        if name == 'smtp':
+            server = SmtpSink(('127.0.0.1', 0), SmtpSinkHandler)
+            start_server(server)
+            channel = SmtpChannel(
+                backend='django.core.mail.backends.smtp.EmailBackend',
+                host='127.0.0.1',
+                port=server.server_address[1],
+                use_tls=False,
+                username='',
+                password='',
+            )
+        elif name == 'http':
+            server = ThreadingHTTPServer(('127.0.0.1', 0), HttpSinkHandler)
+            start_server(server)
+            channel = HttpChannel(url=f'http://127.0.0.1:{server.server_address[1]}/send/')
+        else:
+            server = None
+            fd, path = tempfile.mkstemp(suffix='.jsonl')
+            os.close(fd)
+            channel = FileChannel(path=path)
+
+        try:
+            results.append(run(channel=channel, messages=messages, batch_size=args.batch_size))
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+            else:
+                os.remove(channel.path)
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
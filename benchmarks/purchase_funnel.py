@@ -0,0 +1,403 @@
+'''
+Бенчмарк воронки покупки билета
+
+Список мероприятий -> мероприятие -> покупка билета -> подтверждение
+покупки по счету -> проверка статусов платежей. Запускается на отдельной
+тестовой базе PostgreSQL и локальном redis, платежная система заменена
+заглушкой benchmarks.acquiring_stub. Задачи celery выполняются синхронно
+
+Результат в JSON: задержки p50/p95/p99 в мс, пропускная способность
+и среднее количество запросов к базе и команд redis на операцию
+
+Логи на уровне INFO заметно влияют на задержки, поэтому для сравнения
+между коммитами бенчмарк лучше запускать с LOG_LEVEL=WARNING
+
+LOG_LEVEL=WARNING python -m benchmarks.purchase_funnel --requests 200 \
+    --concurrency 1 8 --output purchase_funnel.json
+'''
+import argparse
+import datetime
+import itertools
+import json
+import os
+import statistics
+import subprocess
+import threading
+import time
+from urllib.parse import urlparse
+
+from benchmarks import setup
+
+
+EVENT_PREFIX = 'Benchmark event'
+SCENARIOS = (
+    'event_list',
+    'event_detail',
+    'ticket_buy',
+    'confirm_buying',
+    'check_payment_status',
+)
+
+
+def percentile(values: list, percent: int) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[percent - 1]
+
+
+def parse_server_timing(header: str) -> dict:
+    '''
+    Получение количества вызовов из заголовка Server-Timing
+
+    Args:
+        header: значение заголовка
+            'db;dur=3.1;desc="4", redis;dur=0.4;desc="2", total;dur=5.2'
+
+    Returns:
+        Словарь количества вызовов
+        {"db": 4, "redis": 2}
+    '''
+
+    counts = {}
+    for metric in header.split(', '):
+        name, *params = metric.split(';')
+        for param in params:
+            if param.startswith('desc='):
+                counts[name] = int(param[len('desc='):].strip('"'))
+    return counts
+
+
+def get_commit() -> str | None:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            text=True,
+            stderr=subprocess.DEVNULL,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def create_data(events: int, users: int) -> None:
+    '''
+    Создание мероприятий с посадками и пользователей для бенчмарка
+
+    Args:
+        events: количество мероприятий
+        users: количество пользователей
+
+    Returns:
+        None
+    '''
+
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+
+    from events.models import (
+        Area,
+        Category,
+        Event,
+        Landing,
+    )
+
+    area = Area.objects.create(name='Benchmark area', city='Astana', address='-')
+    category = Category.objects.create(name='Benchmark')
+    start_at = timezone.now() + datetime.timedelta(days=30)
+    event_list = Event.objects.bulk_create(
+        Event(
+            area=area,
+            category=category,
+            name=f'{EVENT_PREFIX} {index}',
+            slug=f'benchmark-event-{index}',
+            start_at=start_at,
+            end_at=start_at + datetime.timedelta(hours=4),
+            age_limit=0,
+            description='',
+            quantity=10 ** 6,
+        )
+        for index in range(events)
+    )
+    Landing.objects.bulk_create(
+        Landing(
+            event=event,
+            section=str(section),
+            row=str(row),
+            quantity=10 ** 5,
+            price=1000 * section,
+        )
+        for event in event_list
+        for section in range(1, 4)
+        for row in range(1, 4)
+    )
+    Event.objects.all().update_landing_aggregates()
+
+    User = get_user_model()
+    User.objects.bulk_create(
+        User(email=f'benchmark{index}@cc.com', is_active=True)
+        for index in range(users)
+    )
+
+
+class Funnel:
+    '''
+    Сценарии воронки покупки. Каждая операция возвращает количество
+    запросов к базе и команд redis
+    '''
+
+    def __init__(self):
+        from django.contrib.auth import get_user_model
+        from django.urls import reverse
+
+        from events.models import Event
+
+        self.events = list(Event.objects.values('id', 'slug'))
+        self.users = list(get_user_model().objects.all())
+        self.list_url = reverse('events')
+        self.event_urls = [reverse('event', args=(event['slug'],)) for event in self.events]
+        self.buy_url = reverse('ticket_buy')
+        self.seats = itertools.count(1)
+        self.bills = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    @property
+    def client(self):
+        from rest_framework.test import APIClient
+
+        if not hasattr(self.local, 'client'):
+            self.local.client = APIClient()
+        return self.local.client
+
+    def request(self, method: str, url: str, **kwargs) -> dict:
+        response = getattr(self.client, method)(url, **kwargs)
+        if response.status_code != 200:
+            raise RuntimeError(f'{url}: {response.status_code} {response.content[:200]}')
+        self.local.response = response
+        return parse_server_timing(response['Server-Timing'])
+
+    def event_list(self, index: int) -> dict:
+        return self.request(method='get', url=self.list_url)
+
+    def event_detail(self, index: int) -> dict:
+        return self.request(
+            method='get',
+            url=self.event_urls[index % len(self.event_urls)],
+        )
+
+    def ticket_buy(self, index: int) -> dict:
+        event = self.events[index % len(self.events)]
+        self.client.force_authenticate(user=self.users[index % len(self.users)])
+        counts = self.request(
+            method='post',
+            url=self.buy_url,
+            data={
+                'event_id': event['id'],
+                'seat_data': {
+                    'section': '1',
+                    'row': '1',
+                    'seat': str(next(self.seats)),
+                },
+                'price': '1000.00',
+            },
+            format='json',
+        )
+        pay_url = self.local.response.json()['data']['pay_url']
+        with self.lock:
+            self.bills.append(urlparse(pay_url).path.rsplit('/', 1)[-1])
+        return counts
+
+    def confirm_buying(self, index: int) -> dict:
+        from tickets.api import payment
+
+        from utils.timing import measure
+
+        with measure() as timing:
+            status = payment.confirm_buying(bill_id=self.bills[index])
+        if status != 200:
+            raise RuntimeError(f'confirm_buying: {status}')
+        return timing.counts
+
+    def check_payment_status(self, index: int) -> dict:
+        from tickets.workers import check_payment_status
+
+        from utils.timing import measure
+
+        with measure() as timing:
+            if not check_payment_status():
+                raise RuntimeError('check_payment_status: False')
+        return timing.counts
+
+
+def run_scenario(funnel: Funnel, name: str, requests: int, concurrency: int) -> dict:
+    '''
+    Выполнение операций сценария в нескольких потоках
+
+    Args:
+        funnel: объект Funnel
+        name: название сценария
+        requests: количество операций
+        concurrency: количество потоков
+
+    Returns:
+        Словарь результатов
+    '''
+
+    from django.db import connections
+
+    operation = getattr(funnel, name)
+    indexes = iter(range(requests))
+    lock = threading.Lock()
+    latencies = []
+    counts = []
+    errors = []
+
+    def worker():
+        try:
+            while True:
+                with lock:
+                    index = next(indexes, None)
+                if index is None:
+                    return
+
+                started_at = time.perf_counter()
+                try:
+                    operation_counts = operation(index)
+                except Exception as exc:
+                    errors.append(str(exc))
+                    continue
+                latencies.append(time.perf_counter() - started_at)
+                counts.append(operation_counts)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started_at = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - started_at
+
+    result = {
+        'scenario': name,
+        'concurrency': concurrency,
+        'requests': requests,
+        'errors': len(errors),
+        'duration': round(duration, 4),
+        'throughput': round(len(latencies) / duration, 1),
+    }
+    if latencies:
+        latencies_ms = [latency * 1000 for latency in latencies]
+        result.update({
+            'p50_ms': round(percentile(latencies_ms, 50), 2),
+            'p95_ms': round(percentile(latencies_ms, 95), 2),
+            'p99_ms': round(percentile(latencies_ms, 99), 2),
+            'db_queries': round(statistics.mean(count.get('db', 0) for count in counts), 1),
+            'redis_commands': round(statistics.mean(count.get('redis', 0) for count in counts), 1),
+        })
+    if errors:
+        result['first_error'] = errors[0]
+    return result
+
+
+def cleanup_redis(bills: list) -> None:
+    from utils import redis_cache
+
+    for bill_id in bills:
+        redis_cache.remove_from_list(key='bills_to_check', value=bill_id)
+    for key in redis_cache.redis_client.scan_iter('*_bill*'):
+        redis_cache.redis_client.delete(key)
+    redis_cache.redis_client.delete('ticket_settings')
+
+
+def run(requests: int, concurrency: list, events: int, users: int, stub_options: dict) -> dict:
+    from django.db import connection
+    from django.test.utils import (
+        setup_test_environment,
+        teardown_test_environment,
+    )
+
+    from config import celery_app
+    from tickets.services import Payment
+
+    from benchmarks.acquiring_stub import AcquiringStub
+
+    setup_test_environment()
+    celery_app.conf.task_always_eager = True
+    stub = AcquiringStub(**stub_options).start()
+    Payment.url = f'{stub.url}/sites/benchmark'
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+    results = []
+    try:
+        cleanup_redis(bills=[])
+        create_data(events=events, users=users)
+        funnel = Funnel()
+        for threads in concurrency:
+            funnel.bills = []
+            for name in SCENARIOS:
+                scenario_requests = requests
+                if name == 'confirm_buying':
+                    scenario_requests = len(funnel.bills)
+                if name == 'check_payment_status':
+                    # проверка статусов опрашивает все подтвержденные билеты разом
+                    scenario_requests = 1
+                results.append(run_scenario(
+                    funnel=funnel,
+                    name=name,
+                    requests=scenario_requests,
+                    concurrency=1 if scenario_requests == 1 else threads,
+                ))
+            cleanup_redis(bills=funnel.bills)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        stub.stop()
+        teardown_test_environment()
+
+    return {
+        'commit': get_commit(),
+        'started_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'events': events,
+        'users': users,
+        'acquiring': dict(stub_options, stats=stub.get_stats()),
+        'results': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8])
+    parser.add_argument('--events', type=int, default=50)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--acquiring-latency', default='fixed:0',
+                        help='Распределение задержки заглушки платежной системы')
+    parser.add_argument('--acquiring-error-rate', type=float, default=0)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Файл для сохранения результата')
+    args = parser.parse_args()
+
+    # количество запросов к базе и redis берется из заголовка Server-Timing
+    os.environ.setdefault('REQUEST_TIMING_HEADER', 'True')
+    setup()
+    report = run(
+        requests=args.requests,
+        concurrency=args.concurrency,
+        events=args.events,
+        users=args.users,
+        stub_options={
+            'latency': args.acquiring_latency,
+            'error_rate': args.acquiring_error_rate,
+            'seed': args.seed,
+        },
+    )
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -88,6 +88,28 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Время запроса, запросов к базе, redis и платежной системе
+# в гистограммах Prometheus по маршруту
+REQUEST_TIMING = os.environ.get(
+    'REQUEST_TIMING', 'True'
+)
+REQUEST_TIMING = REQUEST_TIMING == 'True'
+if REQUEST_TIMING:
+    MIDDLEWARE.insert(0, 'utils.timing.ServerTimingMiddleware')
+
+# Заголовок Server-Timing отдается всем клиентам, иначе только при DEBUG
+# и сотрудникам. Включается для бенчмарков
+REQUEST_TIMING_HEADER = os.environ.get(
+    'REQUEST_TIMING_HEADER', 'False'
+)
+REQUEST_TIMING_HEADER = REQUEST_TIMING_HEADER == 'True'
+
+# Порог медленного запроса в миллисекундах, такие запросы пишутся в лог
+# с уровнем WARNING
+REQUEST_SLOW_MS = int(os.environ.get(
+    'REQUEST_SLOW_MS', 1000
+))
+
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
@@ -125,6 +147,33 @@ DB_HOST = os.environ.get(
     'DB_HOST', 'localhost'
 )
 
+DB_PORT = os.environ.get(
+    'DB_PORT', '5432'
+)
+DB_REPLICA_HOST = os.environ.get(
+    'DB_REPLICA_HOST', ''
+)
+
+# Время жизни соединения в секундах: 0 - новое соединение на каждый запрос
+# и задачу celery, пустая строка - без ограничения
+DB_CONN_MAX_AGE = os.environ.get(
+    'DB_CONN_MAX_AGE', '60'
+)
+DB_CONN_MAX_AGE = int(DB_CONN_MAX_AGE) if DB_CONN_MAX_AGE else None
+
+DB_CONN_HEALTH_CHECKS = os.environ.get(
+    'DB_CONN_HEALTH_CHECKS', 'True'
+)
+DB_CONN_HEALTH_CHECKS = DB_CONN_HEALTH_CHECKS == 'True'
+
+# pgbouncer в режиме transaction: соединение сервера меняется между
+# транзакциями, поэтому серверные курсоры (QuerySet.iterator) отключаются.
+# psycopg2 не использует серверные prepared statements, дополнительная
+# настройка для них не нужна
+DB_POOLER = os.environ.get(
+    'DB_POOLER', ''
+)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql_psycopg2',
@@ -132,10 +181,33 @@ DATABASES = {
         'USER': DB_USER,
         'PASSWORD': DB_PASSWORD,
         'HOST': DB_HOST,
-        'PORT': '5432',
+        'PORT': DB_PORT,
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
+        'DISABLE_SERVER_SIDE_CURSORS': DB_POOLER == 'pgbouncer',
     }
 }
 
+# Реплика для чтения, используется только если задан DB_REPLICA_HOST
+if DB_REPLICA_HOST:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': DB_REPLICA_HOST,
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    }
+
+DATABASE_ROUTERS = [
+    'utils.db_router.ReplicaRouter',
+]
+
+# Время в секундах, в течение которого чтения пользователя после его покупки
+# идут в основную базу, пока реплика не догонит
+REPLICA_STICKY_TIMEOUT = int(os.environ.get(
+    'REPLICA_STICKY_TIMEOUT', 60
+))
+
 # DRF
 
 REST_FRAMEWORK = {
@@ -182,6 +254,24 @@ REDIS_HOST = os.environ.get(
     'REDIS_HOST', '127.0.0.1'
 )
 
+# Защита от одновременной загрузки ключа из базы при промахе: загружает
+# процесс, взявший блокировку на REDIS_LOCK_TIMEOUT секунд, остальные ждут
+# значение в redis до REDIS_LOCK_WAIT секунд, опрашивая его каждые
+# REDIS_LOCK_POLL_INTERVAL секунд, и только потом идут в базу сами
+REDIS_LOCK_TIMEOUT = float(os.environ.get(
+    'REDIS_LOCK_TIMEOUT', 5
+))
+REDIS_LOCK_WAIT = float(os.environ.get(
+    'REDIS_LOCK_WAIT', 2
+))
+REDIS_LOCK_POLL_INTERVAL = float(os.environ.get(
+    'REDIS_LOCK_POLL_INTERVAL', 0.02
+))
+# Время жизни настроек-синглтонов в памяти процесса в секундах
+REDIS_LOCAL_TIMEOUT = float(os.environ.get(
+    'REDIS_LOCAL_TIMEOUT', 5
+))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -250,6 +340,134 @@ EMAIL_PORT = os.environ.get(
 )
 EMAIL_USE_TLS = True
 
+# Повторные попытки отправки письма из очереди и задержка первой
+# попытки в секундах, дальше задержка удваивается
+EMAIL_OUTBOX_MAX_RETRIES = int(os.environ.get(
+    'EMAIL_OUTBOX_MAX_RETRIES', 5
+))
+EMAIL_OUTBOX_RETRY_DELAY = int(os.environ.get(
+    'EMAIL_OUTBOX_RETRY_DELAY', 30
+))
+# Количество писем, которые воркер забирает из очереди за раз, и время
+# в секундах, после которого письмо в статусе sending считается брошенным
+# упавшим процессом и забирается снова
+EMAIL_OUTBOX_CLAIM_SIZE = int(os.environ.get(
+    'EMAIL_OUTBOX_CLAIM_SIZE', 500
+))
+EMAIL_OUTBOX_SENDING_TIMEOUT = int(os.environ.get(
+    'EMAIL_OUTBOX_SENDING_TIMEOUT', 600
+))
+
+# Массовая рассылка: писем на одно SMTP соединение за вызов send_messages
+# и ограничение провайдера в письмах в секунду, 0 - без ограничения
+EMAIL_BATCH_SIZE = int(os.environ.get(
+    'EMAIL_BATCH_SIZE', 100
+))
+EMAIL_RATE_LIMIT = float(os.environ.get(
+    'EMAIL_RATE_LIMIT', 0
+))
+
+# Канал доставки писем: smtp - почтовый бэкенд django, http - пачками через
+# API провайдера, file - строки JSON в файл EMAIL_FILE_PATH ("-" - консоль)
+EMAIL_CHANNEL = os.environ.get(
+    'EMAIL_CHANNEL', 'smtp'
+)
+EMAIL_HTTP_URL = os.environ.get(
+    'EMAIL_HTTP_URL', ''
+)
+EMAIL_HTTP_TOKEN = os.environ.get(
+    'EMAIL_HTTP_TOKEN', ''
+)
+EMAIL_HTTP_BATCH_SIZE = int(os.environ.get(
+    'EMAIL_HTTP_BATCH_SIZE', 500
+))
+EMAIL_HTTP_TIMEOUT = int(os.environ.get(
+    'EMAIL_HTTP_TIMEOUT', 10
+))
+EMAIL_FILE_PATH = os.environ.get(
+    'EMAIL_FILE_PATH', '-'
+)
+
+# Время жизни шаблонов писем и настроек email в памяти процесса в секундах.
+# Изменения сбрасывают кэш сразу через redis pub/sub, время жизни - страховка
+EMAIL_CACHE_TTL = int(os.environ.get(
+    'EMAIL_CACHE_TTL', 300
+))
+
+# Оповещения по билетам читаются из базы порциями NOTIFY_CHUNK_SIZE строк,
+# в одну транзакцию постановки писем в outbox попадает не больше NOTIFY_BATCH_SIZE получателей
+NOTIFY_CHUNK_SIZE = int(os.environ.get(
+    'NOTIFY_CHUNK_SIZE', 2000
+))
+NOTIFY_BATCH_SIZE = int(os.environ.get(
+    'NOTIFY_BATCH_SIZE', 1000
+))
+
+
+# Logging
+
+# Запись логов в консоль и файл в фоновом потоке через QueueHandler
+LOG_ASYNC = os.environ.get(
+    'LOG_ASYNC', 'True'
+)
+LOG_ASYNC = LOG_ASYNC == 'True'
+
+# Формат записей: text или json (одна строка JSON на запись)
+LOG_FORMAT = os.environ.get(
+    'LOG_FORMAT', 'text'
+)
+
+# Максимальная длина значения поля структурированной записи
+LOG_FIELD_MAX_LENGTH = int(os.environ.get(
+    'LOG_FIELD_MAX_LENGTH', 1000
+))
+
+# Уровень логов по умолчанию
+LOG_LEVEL = os.environ.get(
+    'LOG_LEVEL', 'INFO'
+)
+
+# Уровни логов модулей: "utils.redis_cache=WARNING,tickets.workers=DEBUG"
+LOG_LEVELS = os.environ.get(
+    'LOG_LEVELS', ''
+)
+LOG_LEVELS = dict(
+    item.strip().split('=', 1) for item in LOG_LEVELS.split(',') if item.strip()
+)
+
+# Доля записанных логов модулей ниже WARNING: "utils.redis_cache=0.01".
+# Предупреждения и ошибки записываются всегда
+LOG_SAMPLING = os.environ.get(
+    'LOG_SAMPLING', 'utils.redis_cache=0.01'
+)
+LOG_SAMPLING = {
+    name.strip(): float(rate)
+    for name, rate in (
+        item.split('=', 1) for item in LOG_SAMPLING.split(',') if item.strip()
+    )
+}
+
+
+# Metrics
+
+# Порт отдельного HTTP сервера метрик для run_tickets. Без него метрики
+# всех процессов отдаются веб-приложением по /metrics/, если задана
+# PROMETHEUS_MULTIPROC_DIR
+METRICS_PORT = int(os.environ.get(
+    'METRICS_PORT', 0
+))
+
+# Доступ к /metrics/: токен в заголовке Authorization: Bearer <token>,
+# адреса из METRICS_ALLOWED_IPS или сотрудники. Без них эндпоинт закрыт
+METRICS_TOKEN = os.environ.get(
+    'METRICS_TOKEN', ''
+)
+METRICS_ALLOWED_IPS = [
+    ip for ip in os.environ.get(
+        'METRICS_ALLOWED_IPS', ''
+    ).replace(' ', '').split(',') if ip
+]
+
 
 # Fixtures
 
@@ -26,7 +26,10 @@ from drf_spectacular.views import (
 
 from config import settings
 
+from utils.metrics import metrics_view
+
 urlpatterns = [
+    path('metrics/', metrics_view, name='metrics'),
     path('admin/', admin.site.urls),
     path('api/v1/users/', include('users.urls')),
     path('api/v1/events/', include('events.urls')),
@@ -69,3 +69,17 @@ SEAT_TYPES = (
     ('vip', 'ВИП'),
     ('discounted', 'Уцененное'),
 )
+
+
+# OUTBOX STATUSES
+outbox_queued = 'queued'
+outbox_sending = 'sending'
+outbox_sent = 'sent'
+outbox_failed = 'failed'
+
+OUTBOX_STATUSES = (
+    (outbox_queued, 'В очереди'),
+    (outbox_sending, 'Отправляется'),
+    (outbox_sent, 'Отправлено'),
+    (outbox_failed, 'Ошибка отправки'),
+)
@@ -0,0 +1,88 @@
+from django.contrib.auth.models import AnonymousUser
+
+from config.settings import (
+    DATABASES,
+    REPLICA_STICKY_TIMEOUT,
+)
+
+from utils import redis_cache
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+PRIMARY = 'default'
+REPLICA = 'replica'
+
+
+class ReplicaRouter:
+    '''
+    Роутер для реплики чтения.
+
+    Чтения идут в реплику только явно через QuerySet.using(get_read_db(...))
+    в сервисах только для чтения. Все записи, в том числе объектов,
+    полученных из реплики, идут в основную базу
+    '''
+
+    def db_for_read(self, model, **hints):
+        return None
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return {obj1._state.db, obj2._state.db} <= {PRIMARY, REPLICA}
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+def get_primary_key(user_id: int) -> str:
+    return f'primary_user{user_id}'
+
+
+def pin_to_primary(user_id: int) -> None:
+    '''
+    Закрепление чтений пользователя за основной базой после его записи
+
+    Args:
+        user_id: id пользователя
+
+    Returns:
+        None
+    '''
+
+    if REPLICA not in DATABASES:
+        return
+
+    redis_cache.set_key(
+        key=get_primary_key(user_id=user_id),
+        data=True,
+        time=REPLICA_STICKY_TIMEOUT,
+    )
+
+
+def get_read_db(user=None) -> str:
+    '''
+    Получение базы для чтения
+
+    Args:
+        user: пользователь, чьи недавние покупки должны быть видны сразу
+
+    Returns:
+        Название базы
+        "replica"
+    '''
+
+    if REPLICA not in DATABASES:
+        return PRIMARY
+
+    if user is None or isinstance(user, AnonymousUser):
+        return REPLICA
+
+    status, pinned = redis_cache.exists(
+        key=get_primary_key(user_id=user.id),
+    )
+    if status != 200 or pinned:
+        return PRIMARY
+    return REPLICA
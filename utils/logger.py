@@ -1,9 +1,38 @@
+import atexit
 import gzip
-import inspect
 import logging
 import os
+import queue
+import random
 import shutil
+import sys
+import threading
 import datetime
+import json
+from contextvars import ContextVar
+from typing import Any
+from logging.handlers import (
+    QueueHandler,
+    QueueListener,
+)
+
+from celery.signals import (
+    task_postrun,
+    task_prerun,
+)
+from django.core.signals import (
+    request_finished,
+    request_started,
+)
+
+from config.settings import (
+    LOG_ASYNC,
+    LOG_FORMAT,
+    LOG_FIELD_MAX_LENGTH,
+    LOG_LEVEL,
+    LOG_LEVELS,
+    LOG_SAMPLING,
+)
 
 
 LOG_DIR = 'logs'
@@ -11,11 +40,26 @@ LOG_DIR_ARCHIVE = 'archive'
 
 
 class CustomFormatter(logging.Formatter):
+    # Глубина поиска вызывающей функции: кадры logging + несколько кадров модуля
+    hierarchy_depth = 32
+
+    def __init__(self, *args, hierarchy_level: int = logging.DEBUG, **kwargs):
+        '''
+        Args:
+            hierarchy_level: минимальный уровень записи, для которой
+                вычисляется иерархия функции
+        '''
+
+        super().__init__(*args, **kwargs)
+        self.hierarchy_level = hierarchy_level
 
     def get_func_hierarchy(self, record) -> str:
         '''
         Получение иерархии функции
 
+        Кадры обходятся через sys._getframe без inspect.stack(),
+        который читает исходный код для каждого кадра всего стека
+
         Args:
             record: запись
 
@@ -23,15 +67,19 @@ class CustomFormatter(logging.Formatter):
             Название фукнции
         '''
 
-        stack = inspect.stack()
+        if record.levelno < self.hierarchy_level:
+            return ""
 
+        frame = sys._getframe(1)
         record_file = record.pathname
 
-        for frame in stack[1:]:
-            if frame.filename == record_file:
-                function_name = frame.function
-                if function_name != record.funcName:
-                    return function_name
+        for _ in range(self.hierarchy_depth):
+            if frame is None:
+                break
+            code = frame.f_code
+            if code.co_filename == record_file and code.co_name != record.funcName:
+                return code.co_name
+            frame = frame.f_back
         return ""
 
     def format(self, record):
@@ -40,40 +88,230 @@ class CustomFormatter(logging.Formatter):
         return super().format(record)
 
 
+def truncate(value: Any, max_length: int = LOG_FIELD_MAX_LENGTH) -> Any:
+    '''
+    Обрезка больших значений полей записи
+
+    Args:
+        value: значение поля
+        max_length: максимальная длина строкового представления
+
+    Returns:
+        Значение для записи в лог
+    '''
+
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+
+    if isinstance(value, str):
+        text = value
+    else:
+        try:
+            text = json.dumps(value, ensure_ascii=False, default=str)
+        except (TypeError, ValueError):
+            text = str(value)
+
+    if len(text) > max_length:
+        return f'{text[:max_length]}...<{len(text)}>'
+    return value
+
+
+class StructuredMessage:
+    '''
+    Сообщение с полями ключ-значение. Строка собирается только
+    при форматировании записи, то есть для включенного уровня
+    '''
+
+    __slots__ = ('msg', 'fields')
+
+    def __init__(self, msg: str, fields: dict):
+        self.msg = msg
+        self.fields = fields
+
+    def __str__(self):
+        if not self.fields:
+            return self.msg
+
+        fields = ' '.join(
+            f'{key}={truncate(value)}' for key, value in self.fields.items()
+        )
+        return f'{self.msg} {fields}'
+
+
+class JsonFormatter(CustomFormatter):
+    '''
+    Форматирование записи в одну строку JSON
+    '''
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'func': record.funcName,
+            'func_hierarchy': self.get_func_hierarchy(record),
+        }
+
+        if isinstance(record.msg, StructuredMessage):
+            message = record.msg.msg
+            if record.args:
+                message = message % record.args
+            data['message'] = message
+            for key, value in record.msg.fields.items():
+                data[key] = truncate(value)
+        else:
+            data['message'] = record.getMessage()
+
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class StructuredLogger(logging.LoggerAdapter):
+    '''
+    Логгер с полями ключ-значение
+
+        logger.info('Добавление данных в redis', key=key, data=data)
+
+    Для выключенного уровня запись и сообщение не создаются
+    '''
+
+    logging_kwargs = (
+        'exc_info',
+        'stack_info',
+        'stacklevel',
+        'extra',
+    )
+
+    def log(self, level, msg, *args, **kwargs):
+        if not self.isEnabledFor(level):
+            return
+
+        logging_kwargs = {
+            key: kwargs.pop(key) for key in self.logging_kwargs if key in kwargs
+        }
+        # пропуск кадра адаптера, чтобы funcName указывал на вызывающую функцию
+        logging_kwargs['stacklevel'] = logging_kwargs.get('stacklevel', 1) + 1
+        self.logger.log(
+            level,
+            StructuredMessage(msg=msg, fields=kwargs),
+            *args,
+            **logging_kwargs,
+        )
+
+
+# Случайное число запроса или задачи celery для выборки логов
+_sample_roll = ContextVar('log_sample_roll', default=None)
+
+
+def start_log_sampling(**kwargs) -> None:
+    _sample_roll.set(random.random())
+
+
+def stop_log_sampling(**kwargs) -> None:
+    _sample_roll.set(None)
+
+
+# выборка решается один раз на запрос или задачу,
+# поэтому записи одной операции сохраняются или пропускаются вместе
+request_started.connect(start_log_sampling, dispatch_uid='start_log_sampling')
+request_finished.connect(stop_log_sampling, dispatch_uid='stop_log_sampling')
+task_prerun.connect(start_log_sampling, dispatch_uid='start_log_sampling')
+task_postrun.connect(stop_log_sampling, dispatch_uid='stop_log_sampling')
+
+
+class SamplingFilter(logging.Filter):
+    '''
+    Пропуск доли записей ниже уровня WARNING.
+    Предупреждения и ошибки проходят всегда. В запросе и задаче celery
+    используется одно случайное число, поэтому сохраненные записи операции
+    полные, а модуль с меньшей долей пишется только вместе с модулями
+    с большей. Вне них выборка по каждой записи
+    '''
+
+    def __init__(self, rate: float):
+        '''
+        Args:
+            rate: доля записываемых записей от 0 до 1
+        '''
+
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+
+        roll = _sample_roll.get()
+        if roll is None:
+            roll = random.random()
+        return roll < self.rate
+
+
+def get_module_setting(name: str, settings: dict, default: Any = None) -> Any:
+    '''
+    Получение настройки модуля по самому длинному совпадающему префиксу:
+    для "utils.redis_cache" подходят ключи "utils.redis_cache" и "utils"
+
+    Args:
+        name: название модуля
+        settings: настройки модулей
+        default: значение, если модуль не найден
+
+    Returns:
+        Значение настройки
+    '''
+
+    parts = name.split('.')
+    for index in range(len(parts), 0, -1):
+        prefix = '.'.join(parts[:index])
+        if prefix in settings:
+            return settings[prefix]
+    return default
+
+
 def namer(name):
     name = name.replace('.log.', '-')
     path, name = name.split('logs/')
     return f'{LOG_DIR}/{LOG_DIR_ARCHIVE}/{name}.log.gz'
 
 
+def compress(source: str, dest: str) -> None:
+    with open(source, 'rb') as f_in:
+        with gzip.open(dest, 'wb') as f_out:
+            shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
 def rotator(source, dest):
     dest_dir = os.path.dirname(dest)
     if not os.path.exists(dest_dir):
         os.makedirs(dest_dir)
 
-    with open(source, 'rb') as f_in:
-        with gzip.open(dest, 'wb') as f_out:
-            shutil.copyfileobj(f_in, f_out)
-    os.remove(source)
+    # Переименование мгновенное, сжатие архива идет в отдельном потоке,
+    # чтобы не блокировать запись логов в полночь
+    rotated = f'{source}.{os.getpid()}.rotated'
+    os.rename(source, rotated)
+    threading.Thread(
+        target=compress,
+        args=(rotated, dest),
+        name='log-rotator',
+    ).start()
 
 
-def get_logger(name: str, app: str = 'events') -> logging.Logger:
+def create_handlers(app: str, formatter: logging.Formatter) -> list:
     '''
-    Получение логгера
+    Создание обработчиков вывода в консоль и файл
 
     Args:
-        name: название модуля
+        app: название файла логов
+        formatter: форматтер записей
 
     Returns:
-        Объект логгера
+        Список обработчиков
     '''
 
-    logger = logging.getLogger(name)
     console_handler = logging.StreamHandler()
-    logger.setLevel(logging.DEBUG)
-    formatter = CustomFormatter(
-        '%(asctime)s %(levelname)s %(message)s %(name)s.%(funcName)s %(func_hierarchy)s'
-    )
     console_handler.setFormatter(formatter)
 
     if not os.path.exists(LOG_DIR):
@@ -89,36 +327,140 @@ def get_logger(name: str, app: str = 'events') -> logging.Logger:
     file_handler.namer = namer
     file_handler.rotator = rotator
     file_handler.setFormatter(formatter)
-    logger.handlers = [console_handler, file_handler]
+    return [console_handler, file_handler]
+
+
+_handlers = {}
+_queue_handlers = {}
+_queue_listeners = {}
+
+
+def start_listener(app: str) -> None:
+    queue_handler = _queue_handlers[app]
+    queue_handler.queue = queue.SimpleQueue()
+    # запись уже отформатирована в QueueHandler.prepare
+    handlers = create_handlers(
+        app=app,
+        formatter=logging.Formatter('%(message)s'),
+    )
+    listener = QueueListener(
+        queue_handler.queue,
+        *handlers,
+        respect_handler_level=True,
+    )
+    listener.start()
+    _queue_listeners[app] = listener
+
+
+def restart_listeners() -> None:
+    # Поток обработчика не переживает fork (prefork воркеры celery),
+    # поэтому в дочернем процессе создаются своя очередь и поток
+    for app in _queue_handlers:
+        start_listener(app=app)
+
+
+def stop_listeners() -> None:
+    for listener in _queue_listeners.values():
+        listener.stop()
+    _queue_listeners.clear()
+
+
+def get_queue_handler(app: str, formatter: logging.Formatter) -> QueueHandler:
+    '''
+    Получение обработчика, передающего записи в фоновый поток.
+    Запись в консоль и файл выполняется в потоке QueueListener
+
+    Args:
+        app: название файла логов
+        formatter: форматтер записей, применяется в вызывающем потоке
+
+    Returns:
+        Объект QueueHandler
+    '''
+
+    if app not in _queue_handlers:
+        queue_handler = QueueHandler(queue.SimpleQueue())
+        queue_handler.setFormatter(formatter)
+        _queue_handlers[app] = queue_handler
+        start_listener(app=app)
+    return _queue_handlers[app]
+
+
+atexit.register(stop_listeners)
+os.register_at_fork(after_in_child=restart_listeners)
+
+
+def get_handlers(app: str) -> list:
+    '''
+    Получение обработчиков файла логов. Создаются один раз
+    и используются всеми логгерами этого файла
+
+    Args:
+        app: название файла логов
+
+    Returns:
+        Список обработчиков
+    '''
+
+    if app in _handlers:
+        return _handlers[app]
+
+    if LOG_FORMAT == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = CustomFormatter(
+            '%(asctime)s %(levelname)s %(message)s %(name)s.%(funcName)s %(func_hierarchy)s'
+        )
+
+    if LOG_ASYNC:
+        handlers = [get_queue_handler(app=app, formatter=formatter)]
+    else:
+        handlers = create_handlers(app=app, formatter=formatter)
+    _handlers[app] = handlers
+    return handlers
+
+
+def get_logger(name: str, app: str = 'events') -> logging.Logger:
+    '''
+    Получение логгера. Уровень берется из LOG_LEVELS или LOG_LEVEL,
+    доля записей ниже WARNING из LOG_SAMPLING
+
+    Args:
+        name: название модуля
+
+    Returns:
+        Объект логгера
+    '''
+
+    logger = logging.getLogger(name)
+    logger.setLevel(get_module_setting(
+        name=name,
+        settings=LOG_LEVELS,
+        default=LOG_LEVEL,
+    ))
+    logger.handlers = list(get_handlers(app=app))
+
+    for log_filter in logger.filters[:]:
+        if isinstance(log_filter, SamplingFilter):
+            logger.removeFilter(log_filter)
+    rate = get_module_setting(name=name, settings=LOG_SAMPLING)
+    if rate is not None and rate < 1:
+        logger.addFilter(SamplingFilter(rate=rate))
     return logger
 
 
-def get_log_user_data(user_data: dict) -> dict:
+def get_structured_logger(name: str, app: str = 'events') -> StructuredLogger:
     '''
-    Получение данных пользователя для логов
+    Получение логгера с полями ключ-значение
 
     Args:
-        user_data: данные пользователя
-            {
-              "email": "test_new@cc.com",
-              "password": "test123",
-              "confirm_password": "test123"
-            }
+        name: название модуля
 
     Returns:
-        Словарь данных
-        {
-          "email": "test_new@cc.com"
-        }
+        Объект StructuredLogger
     '''
 
-    data = user_data.copy()
-    keys = [
-        'password',
-        'confirm_password',
-        'old_password',
-        'new_password',
-    ]
-    for key in keys:
-        data.pop(key, None)
-    return data
+    return StructuredLogger(
+        logger=get_logger(name=name, app=app),
+    )
+
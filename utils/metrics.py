@@ -0,0 +1,190 @@
+import functools
+import os
+import secrets
+import time
+
+from celery.signals import (
+    before_task_publish,
+    task_prerun,
+)
+from django.http import (
+    HttpResponse,
+    HttpResponseForbidden,
+)
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+
+from config.settings import (
+    METRICS_ALLOWED_IPS,
+    METRICS_TOKEN,
+)
+
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+# Заголовок задачи celery со временем постановки в очередь
+PUBLISHED_AT_HEADER = 'published_at'
+
+BATCH_SIZE_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+request_seconds = Histogram(
+    name='request_seconds',
+    documentation='Время запроса к API по маршруту',
+    labelnames=('method', 'route', 'status'),
+)
+request_dependency_seconds = Histogram(
+    name='request_dependency_seconds',
+    documentation='Время запросов к базе, redis и платежной системе за запрос к API',
+    labelnames=('route', 'dependency'),
+)
+request_dependency_calls = Histogram(
+    name='request_dependency_calls',
+    documentation='Количество запросов к базе, redis и платежной системе за запрос к API',
+    labelnames=('route', 'dependency'),
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 500),
+)
+tickets_polled = Counter(
+    name='tickets_polled',
+    documentation='Количество опрошенных билетов по воркеру и новому статусу',
+    labelnames=('worker', 'status'),
+)
+acquiring_request_seconds = Histogram(
+    name='acquiring_request_seconds',
+    documentation='Время запроса в платежную систему',
+    labelnames=('method', 'endpoint', 'status'),
+)
+task_queue_seconds = Histogram(
+    name='task_queue_seconds',
+    documentation='Время ожидания задачи celery в очереди',
+    labelnames=('task',),
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+worker_batch_size = Histogram(
+    name='worker_batch_size',
+    documentation='Количество билетов или счетов в цикле воркера',
+    labelnames=('worker',),
+    buckets=BATCH_SIZE_BUCKETS,
+)
+worker_cycle_seconds = Histogram(
+    name='worker_cycle_seconds',
+    documentation='Время цикла воркера',
+    labelnames=('worker',),
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+worker_backlog = Gauge(
+    name='worker_backlog',
+    documentation='Очередь воркера: билеты в ожидании оплаты, счета для проверки',
+    labelnames=('backlog',),
+    multiprocess_mode='mostrecent',
+)
+
+
+@before_task_publish.connect
+def mark_task_published(headers=None, **kwargs):
+    if headers is not None:
+        headers[PUBLISHED_AT_HEADER] = time.time()
+
+
+@task_prerun.connect
+def observe_task_queue_time(task=None, **kwargs):
+    published_at = getattr(task.request, PUBLISHED_AT_HEADER, None)
+    if published_at is None:
+        return
+
+    task_queue_seconds.labels(
+        task=task.name.rsplit('.', 1)[-1],
+    ).observe(max(time.time() - published_at, 0))
+
+
+def observe_cycle(func):
+    '''
+    Учет времени цикла воркера по названию функции
+    '''
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with worker_cycle_seconds.labels(worker=func.__name__).time():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def get_registry() -> CollectorRegistry:
+    '''
+    Получение реестра метрик. При заданной PROMETHEUS_MULTIPROC_DIR
+    метрики собираются со всех процессов: веб, run_tickets, воркеры celery
+
+    Returns:
+        Объект CollectorRegistry
+    '''
+
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def has_metrics_access(request) -> bool:
+    '''
+    Проверка доступа к метрикам: токен METRICS_TOKEN,
+    адрес из METRICS_ALLOWED_IPS или сотрудник
+
+    Returns:
+        True, если доступ разрешен
+    '''
+
+    if METRICS_TOKEN:
+        authorization = request.headers.get('Authorization', '')
+        if secrets.compare_digest(authorization, f'Bearer {METRICS_TOKEN}'):
+            return True
+    if request.META.get('REMOTE_ADDR') in METRICS_ALLOWED_IPS:
+        return True
+    user = getattr(request, 'user', None)
+    return bool(user is not None and user.is_staff)
+
+
+def metrics_view(request) -> HttpResponse:
+    '''
+    Отдача метрик в формате Prometheus. Метрики содержат бизнес-счетчики,
+    поэтому доступны только внутренним клиентам
+    '''
+
+    if not has_metrics_access(request=request):
+        logger.warning(
+            msg=f'Запрос метрик без доступа с адреса {request.META.get("REMOTE_ADDR")}',
+        )
+        return HttpResponseForbidden()
+
+    return HttpResponse(
+        generate_latest(get_registry()),
+        content_type=CONTENT_TYPE_LATEST,
+    )
+
+
+def start_metrics_server(port: int) -> None:
+    '''
+    Запуск HTTP сервера метрик для процесса вне веб-приложения
+
+    Args:
+        port: порт сервера
+
+    Returns:
+        None
+    '''
+
+    logger.info(
+        msg=f'Запуск сервера метрик на порту {port}',
+    )
+    start_http_server(port=port, registry=get_registry())
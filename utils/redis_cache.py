@@ -1,5 +1,10 @@
 import json
 import redis
+import uuid
+from time import (
+    monotonic,
+    sleep,
+)
 from typing import Any
 
 from django.contrib.auth import get_user_model
@@ -7,23 +12,51 @@ from django.forms import model_to_dict
 
 from config.settings import (
     REDIS_HOST,
+    REDIS_LOCK_POLL_INTERVAL,
+    REDIS_LOCK_TIMEOUT,
+    REDIS_LOCK_WAIT,
     REDIS_PORT,
 )
 
-from utils.logger import get_logger
+from utils.logger import get_structured_logger
+from utils.timing import track
+
+
+class TrackedRedis(redis.StrictRedis):
+    '''
+    Клиент redis с учетом времени команд в метриках запроса
+    '''
+
+    def execute_command(self, *args, **options):
+        with track(kind='redis'):
+            return super().execute_command(*args, **options)
 
 
 User = get_user_model()
-logger = get_logger(__name__)
-redis_client = redis.StrictRedis(host=REDIS_HOST, port=REDIS_PORT, db=1)
+logger = get_structured_logger(__name__)
+redis_client = TrackedRedis(host=REDIS_HOST, port=REDIS_PORT, db=1)
+
+# Снятие блокировки, только если она еще принадлежит этому процессу
+release_lock_script = redis_client.register_script('''
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+''')
+
+# Локальный кэш процесса: ключ -> (время истечения, данные)
+_local_cache = {}
 
 
 def set_key(key: str, data: Any, time: int = None) -> int:
     logger.info(
-        msg=f'Добавление данных {data} в redis по ключу {key}',
+        msg='Добавление данных в redis',
+        key=key,
+        data=data,
     )
 
     data_json = json.dumps(obj=data)
+    _local_cache.pop(key, None)
     try:
         if time is None:
             redis_client.set(name=key, value=data_json)
@@ -31,44 +64,89 @@ def set_key(key: str, data: Any, time: int = None) -> int:
             redis_client.setex(name=key, time=time, value=data_json)
     except Exception as exc:
         logger.error(
-            msg=f'Возникла ошибка при добавлении данных {data} '
-                f'в redis по ключу {key}: {exc}',
+            msg='Возникла ошибка при добавлении данных в redis',
+            key=key,
+            data=data,
+            error=exc,
         )
         return 500
 
     logger.info(
-        msg=f'Успешно добавлены данные {data} в redis по ключу {key}',
+        msg='Успешно добавлены данные в redis',
+        key=key,
     )
     return 200
 
 
-def get(key: str, model: Any = None, timeout: int = None, **kwargs) -> (int, Any):
-    logger.info(
-        msg=f'Получение данных из redis по ключу {key}',
-    )
+def load_model(key: str, model: Any, timeout: int = None, **kwargs) -> (int, Any):
+    '''
+    Загрузка данных из базы при промахе с защитой от одновременной
+    загрузки: в базу идет только процесс, взявший блокировку lock:<key>,
+    остальные ждут, пока он запишет значение в redis
+
+    Args:
+        key: ключ
+        model: модель
+        timeout: время жизни ключа
+        kwargs: параметры get_or_create
 
+    Returns:
+        Код статуса и словарь данных
+    '''
+
+    lock_key = f'lock:{key}'
+    token = uuid.uuid4().hex
     try:
-        data = redis_client.get(name=key)
+        locked = redis_client.set(
+            name=lock_key,
+            value=token,
+            nx=True,
+            px=int(REDIS_LOCK_TIMEOUT * 1000),
+        )
     except Exception as exc:
         logger.error(
-            msg=f'Возникла ошибка при получении данных из redis '
-                f'по ключу {key}: {exc}',
+            msg='Возникла ошибка при получении блокировки в redis',
+            key=lock_key,
+            error=exc,
         )
-        return 500, None
+        locked = False
+    else:
+        if not locked:
+            deadline = monotonic() + REDIS_LOCK_WAIT
+            while monotonic() < deadline:
+                sleep(REDIS_LOCK_POLL_INTERVAL)
+                try:
+                    data = redis_client.get(name=key)
+                except Exception:
+                    break
+                if data is not None:
+                    return 200, json.loads(s=data)
+
+            logger.warning(
+                msg='Не дождались загрузки данных другим процессом',
+                key=key,
+            )
 
-    if model and data is None:
+    try:
+        if locked:
+            # предыдущий владелец блокировки мог записать значение
+            # между промахом и получением блокировки
+            try:
+                cached = redis_client.get(name=key)
+            except Exception:
+                cached = None
+            if cached is not None:
+                return 200, json.loads(s=cached)
+
+        data, created = model.objects.get_or_create(**kwargs)
+    except Exception as exc:
         logger.error(
-            msg=f'Данные по ключу {key} не существуют в redis',
+            msg='Возникла ошибка при получении данных из базы для redis',
+            key=key,
+            error=exc,
         )
-        try:
-            data, created = model.objects.get_or_create(**kwargs)
-        except Exception as exc:
-            logger.error(
-                msg=f'Возникла ошибка при получении данных из redis '
-                    f'по ключу {key}: {exc}',
-            )
-            return 500, None
-
+        return 500, None
+    else:
         data = model_to_dict(data)
         set_key(
             key=key,
@@ -76,115 +154,200 @@ def get(key: str, model: Any = None, timeout: int = None, **kwargs) -> (int, Any
             time=timeout,
         )
         return 200, data
+    finally:
+        if locked:
+            try:
+                release_lock_script(keys=[lock_key], args=[token])
+            except Exception:
+                # блокировка истечет сама через REDIS_LOCK_TIMEOUT
+                pass
+
+
+def get(
+        key: str,
+        model: Any = None,
+        timeout: int = None,
+        local_timeout: float = None,
+        **kwargs,
+) -> (int, Any):
+    if local_timeout:
+        cached = _local_cache.get(key)
+        if cached is not None and cached[0] > monotonic():
+            return 200, cached[1]
+
+    logger.info(
+        msg='Получение данных из redis',
+        key=key,
+    )
+
+    try:
+        data = redis_client.get(name=key)
+    except Exception as exc:
+        logger.error(
+            msg='Возникла ошибка при получении данных из redis',
+            key=key,
+            error=exc,
+        )
+        return 500, None
+
+    if model and data is None:
+        logger.error(
+            msg='Данные не существуют в redis',
+            key=key,
+        )
+        status, data = load_model(key=key, model=model, timeout=timeout, **kwargs)
+    else:
+        logger.info(
+            msg='Успешно получены данные из redis',
+            key=key,
+        )
+        status, data = 200, json.loads(s=data)
 
+    if status == 200 and local_timeout:
+        _local_cache[key] = (monotonic() + local_timeout, data)
+    return status, data
+
+
+def exists(key: str) -> (int, bool):
     logger.info(
-        msg=f'Успешно получены данные из redis по ключу {key}'
+        msg='Проверка существования ключа в redis',
+        key=key,
     )
-    return 200, json.loads(s=data)
+
+    try:
+        found = bool(redis_client.exists(key))
+    except Exception as exc:
+        logger.error(
+            msg='Возникла ошибка при проверке существования ключа в redis',
+            key=key,
+            error=exc,
+        )
+        return 500, False
+
+    return 200, found
 
 
 def get_matching_keys(key_pattern: str) -> (int, list):
     logger.info(
-        msg=f'Получение списка подходящих ключей из redis '
-            f'по шаблону {key_pattern}',
+        msg='Получение списка подходящих ключей из redis',
+        key_pattern=key_pattern,
     )
 
     try:
         matching_keys = redis_client.keys(key_pattern)
     except Exception as exc:
         logger.error(
-            msg=f'Возникла ошибка при получении списка подходящих '
-                f'ключей из redis по шаблону {key_pattern}: {exc}',
+            msg='Возникла ошибка при получении списка подходящих ключей из redis',
+            key_pattern=key_pattern,
+            error=exc,
         )
         return 500, []
 
     logger.info(
-        msg=f'Получен список подходящих ключей из redis '
-            f'по шаблону {key_pattern}',
+        msg='Получен список подходящих ключей из redis',
+        key_pattern=key_pattern,
+        count=len(matching_keys),
     )
     return 200, matching_keys
 
 
 def delete(key: str) -> int:
     logger.info(
-        msg=f'Удаление ключа из redis {key}',
+        msg='Удаление ключа из redis',
+        key=key,
     )
+    _local_cache.pop(key, None)
 
     try:
         redis_client.delete(key)
     except Exception as exc:
         logger.error(
-            msg=f'Возникла ошибка при удалении ключа {key} из redis:'
-                f'{exc}',
+            msg='Возникла ошибка при удалении ключа из redis',
+            key=key,
+            error=exc,
         )
         return 500
 
     logger.info(
-        msg=f'Успешно удален ключ {key} из redis',
+        msg='Успешно удален ключ из redis',
+        key=key,
     )
     return 200
 
 
 def push_to_list(key: str, value: str | int) -> int:
     logger.info(
-        msg=f'Добавление значения {value} в список redis по '
-            f'ключу {key}',
+        msg='Добавление значения в список redis',
+        key=key,
+        value=value,
     )
 
     try:
         redis_client.lpush(key, value)
     except Exception as exc:
         logger.error(
-            msg=f'Возникла ошибка при добавлении значения {value} '
-                f'в список redis по ключу {key}',
+            msg='Возникла ошибка при добавлении значения в список redis',
+            key=key,
+            value=value,
+            error=exc,
         )
         return 500
 
     logger.info(
-        msg=f'Успешно добавлено значение {value} в список redis по'
-            f'ключу {key}',
+        msg='Успешно добавлено значение в список redis',
+        key=key,
+        value=value,
     )
     return 200
 
 
 def get_list(key: str) -> (int, list):
     logger.info(
-        msg=f'Получение списка из redis по ключу {key}',
+        msg='Получение списка из redis',
+        key=key,
     )
 
     try:
         redis_list = redis_client.lrange(name=key, start=0, end=-1)
     except Exception as exc:
         logger.error(
-            msg=f'Возникла ошибка при получении списка из redis по'
-                f'ключу {key}',
+            msg='Возникла ошибка при получении списка из redis',
+            key=key,
+            error=exc,
         )
         return 500, []
 
     value_list = [value.decode('utf-8') for value in redis_list]
 
     logger.info(
-        msg=f'Успешно получен список из redis по ключу {key}',
+        msg='Успешно получен список из redis',
+        key=key,
+        count=len(value_list),
     )
     return 200, value_list
 
 
 def remove_from_list(key: str, value: str) -> int:
     logger.info(
-        msg=f'Удаление значения {value} из списка redis по ключу {key}',
+        msg='Удаление значения из списка redis',
+        key=key,
+        value=value,
     )
 
     try:
         redis_client.lrem(name=key, count=0, value=value)
     except Exception as exc:
         logger.error(
-            msg=f'Возникла ошибка при удалении значения {value} из '
-                f'списка redis по ключу {key}',
+            msg='Возникла ошибка при удалении значения из списка redis',
+            key=key,
+            value=value,
+            error=exc,
         )
         return 500
 
     logger.info(
-        msg=f'Успешно удалено значение {value} из списка redis по '
-            f'ключу {key}',
+        msg='Успешно удалено значение из списка redis',
+        key=key,
+        value=value,
     )
     return 200
@@ -0,0 +1,116 @@
+import time
+from contextlib import contextmanager
+from typing import NamedTuple
+from unittest import skipUnless
+
+from django.db import connection
+from django.db.models import QuerySet
+from django.test.utils import CaptureQueriesContext
+
+from utils.timing import measure
+
+
+postgres_only = skipUnless(
+    connection.vendor == 'postgresql',
+    'Проверка планов запросов доступна только для PostgreSQL',
+)
+
+
+class ExplainMixin:
+    '''
+    Проверка использования индексов горячими запросами через EXPLAIN
+
+    На тестовых данных таблицы маленькие и планировщик всегда выбирает
+    последовательное сканирование, поэтому оно отключается в рамках
+    транзакции теста
+    '''
+
+    def setUp(self):
+        super().setUp()
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertUsesIndex(self, queryset: QuerySet, index_name: str) -> None:
+        '''
+        Проверка, что план запроса использует индекс
+
+        Args:
+            queryset: проверяемый запрос
+            index_name: название индекса
+                "events_active_idx"
+
+        Returns:
+            None
+        '''
+
+        plan = queryset.explain()
+        self.assertIn(
+            index_name,
+            plan,
+            msg=f'Запрос не использует индекс {index_name}:\n{plan}',
+        )
+
+
+class Budget(NamedTuple):
+    queries: int
+    redis: int = 0
+    duration_ms: float | None = None
+
+
+class BudgetMixin:
+    '''
+    Бюджеты запросов к базе и команд redis для сервисов
+
+        budgets = {
+            'get_event': Budget(queries=4, redis=1),
+        }
+
+        with self.assertBudget('get_event'):
+            get_event(user=user, slug=slug)
+
+    Превышение бюджета, например новый N+1 в сериализаторе, валит тест
+    со списком выполненных запросов. Бюджет времени задается только
+    для заведомо медленных операций, чтобы тесты не зависели от машины
+    '''
+
+    budgets = {}
+
+    @contextmanager
+    def assertBudget(self, name: str):
+        '''
+        Проверка, что блок кода укладывается в бюджет сервиса
+
+        Args:
+            name: название сервиса в budgets
+                "get_event"
+        '''
+
+        budget = self.budgets[name]
+        started_at = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            with measure() as timing:
+                yield timing
+        duration_ms = (time.perf_counter() - started_at) * 1000
+
+        sql = '\n'.join(
+            f'{index}. {query["sql"]}'
+            for index, query in enumerate(queries.captured_queries, start=1)
+        )
+        self.assertLessEqual(
+            timing.counts['db'],
+            budget.queries,
+            msg=f'{name}: {timing.counts["db"]} запросов к базе при бюджете '
+                f'{budget.queries}:\n{sql}',
+        )
+        self.assertLessEqual(
+            timing.counts['redis'],
+            budget.redis,
+            msg=f'{name}: {timing.counts["redis"]} команд redis при бюджете '
+                f'{budget.redis}',
+        )
+        if budget.duration_ms is not None:
+            self.assertLessEqual(
+                duration_ms,
+                budget.duration_ms,
+                msg=f'{name}: {duration_ms:.1f} мс при бюджете {budget.duration_ms} мс',
+            )
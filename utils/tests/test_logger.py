@@ -0,0 +1,50 @@
+import logging
+from unittest.mock import patch
+
+from django.core.signals import (
+    request_finished,
+    request_started,
+)
+from django.test import SimpleTestCase
+
+from utils.logger import SamplingFilter
+
+
+class TestLogSampling(SimpleTestCase):
+
+    def make_record(self, level: int = logging.INFO) -> logging.LogRecord:
+        return logging.LogRecord('events', level, __file__, 1, 'msg', None, None)
+
+    def test_sampling_per_request(self):
+        log_filter = SamplingFilter(rate=0.5)
+
+        for _ in range(20):
+            request_started.send(sender=None)
+            try:
+                kept = {log_filter.filter(self.make_record()) for _ in range(20)}
+            finally:
+                request_finished.send(sender=None)
+            self.assertEqual(len(kept), 1)
+
+    def test_sampling_resets_between_requests(self):
+        log_filter = SamplingFilter(rate=0.5)
+        kept = []
+
+        with patch('utils.logger.random.random', side_effect=[0.1, 0.9, 0.1, 0.9]):
+            for _ in range(2):
+                request_started.send(sender=None)
+                try:
+                    kept.append([log_filter.filter(self.make_record()) for _ in range(3)])
+                finally:
+                    request_finished.send(sender=None)
+
+            # вне запроса выборка по каждой записи
+            kept.append([log_filter.filter(self.make_record()) for _ in range(2)])
+
+        self.assertEqual(kept, [[True] * 3, [False] * 3, [True, False]])
+
+    def test_warnings_always_kept(self):
+        log_filter = SamplingFilter(rate=0)
+
+        self.assertTrue(log_filter.filter(self.make_record(level=logging.WARNING)))
+        self.assertFalse(log_filter.filter(self.make_record()))
@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.test import (
+    TestCase,
+    override_settings,
+)
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from rest_framework.test import APIClient
+
+
+User = get_user_model()
+
+
+class TestServerTiming(TestCase):
+    fixtures = [
+        'areas.json', 'categories.json', 'events.json', 'landings.json',
+    ]
+
+    def get_observed(self) -> float:
+        value = REGISTRY.get_sample_value('request_seconds_sum', {
+            'method': 'GET',
+            'route': 'api/v1/events/',
+            'status': '200',
+        })
+        return value or 0
+
+    @override_settings(DEBUG=True)
+    def test_server_timing_header(self):
+        observed = self.get_observed()
+        response = self.client.get(reverse('events'))
+
+        self.assertEqual(response.status_code, 200)
+        metrics = {
+            metric.split(';')[0]: metric
+            for metric in response['Server-Timing'].split(', ')
+        }
+        self.assertIn('db', metrics)
+        self.assertIn('total', metrics)
+        self.assertNotIn('payment', metrics)
+        self.assertGreater(self.get_observed(), observed)
+
+    def test_server_timing_header_hidden(self):
+        response = self.client.get(reverse('events'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Server-Timing', response)
+
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create(email='staff@cc.com', is_staff=True))
+        response = client.get(reverse('events'))
+        self.assertIn('Server-Timing', response)
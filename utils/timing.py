@@ -0,0 +1,194 @@
+import time
+from contextlib import (
+    ExitStack,
+    contextmanager,
+)
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+from config.settings import (
+    REQUEST_SLOW_MS,
+    REQUEST_TIMING_HEADER,
+)
+
+from utils.logger import get_structured_logger
+from utils.metrics import (
+    request_dependency_calls,
+    request_dependency_seconds,
+    request_seconds,
+)
+
+
+logger = get_structured_logger(__name__)
+
+# Источники времени запроса в порядке вывода в Server-Timing
+TIMING_KINDS = (
+    'db',
+    'redis',
+    'payment',
+)
+
+_request_timing = ContextVar('request_timing', default=None)
+
+
+class RequestTiming:
+    '''
+    Количество вызовов и время внешних зависимостей одного запроса
+    '''
+
+    __slots__ = ('counts', 'durations')
+
+    def __init__(self):
+        self.counts = dict.fromkeys(TIMING_KINDS, 0)
+        self.durations = dict.fromkeys(TIMING_KINDS, 0.0)
+
+    def add(self, kind: str, duration: float) -> None:
+        self.counts[kind] += 1
+        self.durations[kind] += duration
+
+
+@contextmanager
+def track(kind: str):
+    '''
+    Учет времени вызова зависимости в текущем запросе.
+    Вне запроса ничего не измеряется
+
+    Args:
+        kind: источник времени
+            "redis"
+    '''
+
+    timing = _request_timing.get()
+    if timing is None:
+        yield
+        return
+
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(kind=kind, duration=time.perf_counter() - started_at)
+
+
+def track_query(execute, sql, params, many, context):
+    with track(kind='db'):
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def measure():
+    '''
+    Сбор метрик зависимостей блока кода: запросов к базе во всех
+    подключениях потока, команд redis и запросов в платежную систему
+
+        with measure() as timing:
+            payment.confirm_buying(bill_id=bill_id)
+        timing.counts['db']
+
+    Returns:
+        Объект RequestTiming
+    '''
+
+    timing = RequestTiming()
+    token = _request_timing.set(timing)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(track_query))
+            yield timing
+    finally:
+        _request_timing.reset(token)
+
+
+def get_route(request) -> str:
+    # маршрут вместо пути, чтобы метрики не дробились по slug и id
+    # а ненайденные пути не создавали новых меток
+    resolver_match = getattr(request, 'resolver_match', None)
+    if resolver_match is None:
+        return 'unmatched'
+    return resolver_match.route or request.path_info
+
+
+def get_server_timing(timing: RequestTiming, total: float) -> str:
+    '''
+    Формирование заголовка Server-Timing
+
+    Args:
+        timing: метрики запроса
+        total: полное время запроса в секундах
+
+    Returns:
+        Значение заголовка
+        'db;dur=3.1;desc="4", redis;dur=0.4;desc="2", total;dur=5.2'
+    '''
+
+    metrics = [
+        f'{kind};dur={timing.durations[kind] * 1000:.1f};desc="{timing.counts[kind]}"'
+        for kind in TIMING_KINDS
+        if timing.counts[kind]
+    ]
+    metrics.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(metrics)
+
+
+def show_server_timing(request) -> bool:
+    # заголовок раскрывает устройство запросов, поэтому не отдается всем
+    if REQUEST_TIMING_HEADER or settings.DEBUG:
+        return True
+    user = getattr(request, 'user', None)
+    return bool(user is not None and user.is_staff)
+
+
+class ServerTimingMiddleware:
+    '''
+    Измерение времени запроса, количества и времени запросов к базе,
+    команд redis и запросов в платежную систему. Результат пишется
+    в гистограммы Prometheus по маршруту, медленные запросы - в лог.
+    Заголовок Server-Timing отдается при DEBUG и сотрудникам
+    '''
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started_at = time.perf_counter()
+        with measure() as timing:
+            response = self.get_response(request)
+
+        total = time.perf_counter() - started_at
+        if show_server_timing(request=request):
+            response['Server-Timing'] = get_server_timing(timing=timing, total=total)
+        self.observe(request=request, response=response, timing=timing, total=total)
+        return response
+
+    def observe(self, request, response, timing: RequestTiming, total: float) -> None:
+        route = get_route(request=request)
+        request_seconds.labels(
+            method=request.method,
+            route=route,
+            status=response.status_code,
+        ).observe(total)
+        for kind in TIMING_KINDS:
+            request_dependency_calls.labels(route=route, dependency=kind).observe(
+                timing.counts[kind],
+            )
+            request_dependency_seconds.labels(route=route, dependency=kind).observe(
+                timing.durations[kind],
+            )
+
+        if total * 1000 < REQUEST_SLOW_MS:
+            return
+
+        fields = {
+            'method': request.method,
+            'route': route,
+            'path': request.path_info,
+            'status': response.status_code,
+            'duration_ms': round(total * 1000, 1),
+        }
+        for kind in TIMING_KINDS:
+            fields[f'{kind}_count'] = timing.counts[kind]
+            fields[f'{kind}_ms'] = round(timing.durations[kind] * 1000, 1)
+        logger.warning(msg='Медленный запрос', **fields)